@@ -76,3 +76,20 @@ ADDONS = {
     'gitops': 'gitops',
     'azure-keyvault-secrets-provider': CONST_AZURE_KEYVAULT_SECRETS_PROVIDER_ADDON_NAME
 }
+
+# how long to wait for the aks-periscope diagnostics of all ready nodes, in seconds
+CONST_PERISCOPE_DIAGNOSTICS_TIMEOUT = 300
+
+# how many clusters to get the credentials of at the same time
+CONST_GET_CREDENTIALS_MAX_PARALLELISM = 8
+
+# run command requests are sent through ARM, which rejects request bodies larger than 4 MB
+CONST_RUN_COMMAND_MAX_REQUEST_SIZE = 4 * 1024 * 1024
+# how long to wait between polls of a run command result, in seconds, doubling up to the maximum
+CONST_RUN_COMMAND_POLL_INTERVAL = 1
+CONST_RUN_COMMAND_MAX_POLL_INTERVAL = 30
+
+# how many node pools a batch operation runs on at the same time, and how often it polls them, in seconds
+CONST_NODEPOOL_BATCH_MAX_PARALLEL = 10
+CONST_NODEPOOL_BATCH_POLL_INTERVAL = 15
+CONST_NODEPOOL_BATCH_MAX_POLL_ERRORS = 5
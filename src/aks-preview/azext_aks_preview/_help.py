@@ -613,6 +613,20 @@ helps['aks command invoke'] = """
         - name: --file -f
           type: string
           short-summary: files will be used by the command, use '.' to attach the current folder.
+        - name: --exclude
+          type: string
+          short-summary: .gitignore style patterns of the files and folders to leave out when attaching the current folder.
+          long-summary: Patterns without a slash match file and folder names at any depth, patterns with a slash match paths from the current folder, and patterns ending with a slash only match folders. The attached files, zipped and base64 encoded, have to fit in the 4 MB limit of the request.
+        - name: --no-wait
+          type: bool
+          short-summary: start the command and return its ID without waiting for it to complete, use 'az aks command result' to get its result.
+    examples:
+        - name: Run kubectl with the manifests of the current folder, leaving out the git history and the logs.
+          text: az aks command invoke -g MyResourceGroup -n MyManagedCluster -c "kubectl apply -f ." -f . --exclude .git/ "*.log"
+        - name: Start a long running command, and wait for its result later.
+          text: |
+            id=$(az aks command invoke -g MyResourceGroup -n MyManagedCluster -c "helm upgrade --install myapp ./chart --wait" -f . --no-wait --query id -o tsv)
+            az aks command result -g MyResourceGroup -n MyManagedCluster -i $id --wait
 """
 
 helps['aks command result'] = """
@@ -622,6 +636,9 @@ helps['aks command result'] = """
         - name: --command-id -i
           type: string
           short-summary: commandId returned from 'aks command invoke'.
+        - name: --wait
+          type: bool
+          short-summary: wait for the command to complete, polling its result with backoff, and print its state while it runs.
 """
 
 helps['aks maintenanceconfiguration'] = """
@@ -892,6 +909,65 @@ helps['aks nodepool upgrade'] = """
           short-summary: Extra nodes used to speed upgrade. When specified, it represents the number or percent used, eg. 5 or 33%
 """
 
+helps['aks nodepool batch'] = """
+    type: group
+    short-summary: Run operations on many node pools of many managed Kubernetes clusters at once.
+    long-summary: The operations run on at most --max-parallel node pools at a time, and the number of node pools in each state is shown until all operations completed.
+"""
+
+helps['aks nodepool batch upgrade'] = """
+    type: command
+    short-summary: Upgrade many node pools of many managed Kubernetes clusters.
+    parameters:
+        - name: --ids
+          type: string
+          short-summary: Resource IDs of the node pools, or of managed clusters to upgrade all their node pools.
+        - name: --targets-file
+          type: string
+          short-summary: File with the resource IDs of the node pools or managed clusters.
+          long-summary: One ID per line, a JSON array of IDs or of objects with an "id" property, or newline-delimited JSON objects with an "id" property, as written by 'az graph query'.
+        - name: --kubernetes-version -k
+          type: string
+          short-summary: Version of Kubernetes to upgrade the node pools to, such as "1.11.12".
+        - name: --node-image-only
+          type: bool
+          short-summary: Only upgrade the node image of the node pools.
+        - name: --max-surge
+          type: string
+          short-summary: Extra nodes used to speed upgrade. When specified, it represents the number or percent used, eg. 5 or 33%
+        - name: --max-parallel
+          type: int
+          short-summary: The maximum number of node pools to upgrade at the same time.
+    examples:
+        - name: Upgrade the node images of all node pools of the managed clusters found by a resource graph query.
+          text: |
+            az graph query -q "where type =~ 'microsoft.containerservice/managedclusters' and location =~ 'westus2' | project id" --first 100000 --stream ndjson > clusters.json
+            az aks nodepool batch upgrade --targets-file clusters.json --node-image-only --max-parallel 20
+"""
+
+helps['aks nodepool batch scale'] = """
+    type: command
+    short-summary: Scale many node pools of many managed Kubernetes clusters to the same node count.
+    long-summary: Node pools that already have the node count are skipped.
+    parameters:
+        - name: --ids
+          type: string
+          short-summary: Resource IDs of the node pools, or of managed clusters to scale all their node pools.
+        - name: --targets-file
+          type: string
+          short-summary: File with the resource IDs of the node pools or managed clusters.
+          long-summary: One ID per line, a JSON array of IDs or of objects with an "id" property, or newline-delimited JSON objects with an "id" property, as written by 'az graph query'.
+        - name: --node-count -c
+          type: int
+          short-summary: Number of nodes in the node pools.
+        - name: --max-parallel
+          type: int
+          short-summary: The maximum number of node pools to scale at the same time.
+    examples:
+        - name: Scale the given node pools to 5 nodes.
+          text: az aks nodepool batch scale --ids $(az aks nodepool list -g MyResourceGroup --cluster-name MyManagedCluster --query "[?mode=='User'].id" -o tsv) --node-count 5
+"""
+
 helps['aks nodepool update'] = """
     type: command
     short-summary: Update a node pool to enable/disable cluster-autoscaler or change min-count or max-count
@@ -1041,6 +1117,33 @@ examples:
     crafted: true
 """
 
+helps['aks get-credentials-bulk'] = """
+type: command
+short-summary: Get access credentials for many managed Kubernetes clusters at once.
+long-summary: The credentials of the clusters are fetched in parallel and merged into the Kubernetes configuration file with a single write. The context of the last cluster becomes the current context.
+parameters:
+  - name: --ids
+    type: string
+    short-summary: Resource IDs of the managed clusters. By default all managed clusters of the resource group, or of the subscription, are used.
+  - name: --admin -a
+    type: bool
+    short-summary: "Get cluster administrator credentials.  Default: cluster user credentials."
+  - name: --user -u
+    type: string
+    short-summary: "Get credentials for the user. Only valid when --admin is False.  Default: cluster user credentials."
+  - name: --file -f
+    type: string
+    short-summary: Kubernetes configuration file to update. Use "-" to print YAML to stdout instead.
+  - name: --overwrite-existing
+    type: bool
+    short-summary: Overwrite any existing cluster entry with the same name.
+examples:
+  - name: Get access credentials for all managed Kubernetes clusters in a resource group.
+    text: az aks get-credentials-bulk --resource-group MyResourceGroup
+  - name: Get access credentials for the given managed Kubernetes clusters.
+    text: az aks get-credentials-bulk --ids $(az aks list --query "[?location=='westus2'].id" -o tsv)
+"""
+
 helps['aks rotate-certs'] = """
     type: command
     short-summary: Rotate certificates and keys on a managed Kubernetes cluster
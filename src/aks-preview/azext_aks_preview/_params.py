@@ -186,9 +186,11 @@ def load_arguments(self, _):
     with self.argument_context('aks command invoke') as c:
         c.argument('command_string', type=str, options_list=["--command", "-c"], help='the command to run')
         c.argument('command_files', options_list=["--file", "-f"], required=False, action="append", help='attach any files the command may use, or use \'.\' to upload the current folder.')
+        c.argument('exclude', options_list=["--exclude"], nargs='+', help='.gitignore style patterns of the files and folders to leave out when attaching the current folder, e.g. .git/ *.log build/')
 
     with self.argument_context('aks command result') as c:
         c.argument('command_id', type=str, options_list=["--command-id", "-i"], help='the command ID from "aks command invoke"')
+        c.argument('wait', options_list=["--wait"], action='store_true', help='wait for the command to complete, polling its result with backoff')
 
     for scope in ['aks nodepool add']:
         with self.argument_context(scope) as c:
@@ -224,6 +226,15 @@ def load_arguments(self, _):
     with self.argument_context('aks nodepool upgrade') as c:
         c.argument('max_surge', type=str, validator=validate_max_surge)
 
+    for scope in ['aks nodepool batch upgrade', 'aks nodepool batch scale']:
+        with self.argument_context(scope) as c:
+            c.argument('ids', options_list=['--ids'], nargs='+', help='Resource IDs of the node pools, or of managed clusters to target all their node pools.')
+            c.argument('targets_file', options_list=['--targets-file'], completer=FilesCompleter(), help='File with the resource IDs of the node pools or managed clusters, one per line, or as the "id" properties of the JSON output of \'az graph query\'.')
+            c.argument('max_parallel', options_list=['--max-parallel'], type=int, help='The maximum number of node pools to run the operation on at the same time.')
+
+    with self.argument_context('aks nodepool batch upgrade') as c:
+        c.argument('max_surge', type=str, validator=validate_max_surge)
+
     with self.argument_context('aks nodepool update') as c:
         c.argument('enable_cluster_autoscaler', options_list=["--enable-cluster-autoscaler", "-e"], action='store_true')
         c.argument('disable_cluster_autoscaler', options_list=["--disable-cluster-autoscaler", "-d"], action='store_true')
@@ -256,6 +267,14 @@ def load_arguments(self, _):
         c.argument('path', options_list=['--file', '-f'], type=file_type, completer=FilesCompleter(),
                    default=os.path.join(os.path.expanduser('~'), '.kube', 'config'))
 
+    with self.argument_context('aks get-credentials-bulk') as c:
+        c.argument('ids', options_list=['--ids'], nargs='+',
+                   help='Resource IDs of the managed clusters. By default all managed clusters of the resource group, or of the subscription, are used.')
+        c.argument('admin', options_list=['--admin', '-a'], default=False)
+        c.argument('user', options_list=['--user', '-u'], default='clusterUser', validator=validate_user)
+        c.argument('path', options_list=['--file', '-f'], type=file_type, completer=FilesCompleter(),
+                   default=os.path.join(os.path.expanduser('~'), '.kube', 'config'))
+
     with self.argument_context('aks pod-identity') as c:
         c.argument('cluster_name', type=str, help='The cluster name.')
 
@@ -58,6 +58,7 @@ def load_command_table(self, _):
         g.custom_command('enable-addons', 'aks_enable_addons',
                          supports_no_wait=True)
         g.custom_command('get-credentials', 'aks_get_credentials')
+        g.custom_command('get-credentials-bulk', 'aks_get_credentials_bulk', is_preview=True)
         g.custom_show_command('show', 'aks_show',
                               table_transformer=aks_show_table_format)
         g.custom_command('upgrade', 'aks_upgrade', supports_no_wait=True)
@@ -105,6 +106,11 @@ def load_command_table(self, _):
                          supports_no_wait=True)
         g.custom_command('get-upgrades', 'aks_agentpool_get_upgrade_profile')
 
+    with self.command_group('aks nodepool batch', agent_pools_sdk, client_factory=cf_agent_pools,
+                            is_preview=True) as g:
+        g.custom_command('upgrade', 'aks_agentpool_batch_upgrade')
+        g.custom_command('scale', 'aks_agentpool_batch_scale')
+
     # AKS pod identity commands
     with self.command_group('aks pod-identity', managed_clusters_sdk, client_factory=cf_managed_clusters) as g:
         g.custom_command('add', 'aks_pod_identity_add')
@@ -9,11 +9,13 @@ from __future__ import print_function
 import binascii
 import datetime
 import errno
+import fnmatch
 import io
 import json
 import os
 import os.path
 import platform
+import queue
 import re
 import ssl
 import stat
@@ -26,10 +28,12 @@ import uuid
 import base64
 import webbrowser
 import zipfile
+from collections import OrderedDict
 from distutils.version import StrictVersion
 from math import isnan
 from six.moves.urllib.request import urlopen  # pylint: disable=import-error
 from six.moves.urllib.error import URLError  # pylint: disable=import-error
+from six.moves.urllib.parse import urlparse  # pylint: disable=import-error
 import requests
 from knack.log import get_logger
 from knack.util import CLIError
@@ -39,6 +43,7 @@ import yaml  # pylint: disable=import-error
 from dateutil.relativedelta import relativedelta  # pylint: disable=import-error
 from dateutil.parser import parse  # pylint: disable=import-error
 from msrestazure.azure_exceptions import CloudError
+from msrest.exceptions import ClientRequestError
 
 import colorama  # pylint: disable=import-error
 from tabulate import tabulate  # pylint: disable=import-error
@@ -115,6 +120,11 @@ from ._consts import CONST_AZURE_KEYVAULT_SECRETS_PROVIDER_ADDON_NAME, CONST_SEC
 from ._consts import ADDONS
 from .maintenanceconfiguration import aks_maintenanceconfiguration_update_internal
 from ._consts import CONST_PRIVATE_DNS_ZONE_SYSTEM, CONST_PRIVATE_DNS_ZONE_NONE
+from ._consts import CONST_PERISCOPE_DIAGNOSTICS_TIMEOUT, CONST_GET_CREDENTIALS_MAX_PARALLELISM
+from ._consts import CONST_RUN_COMMAND_MAX_REQUEST_SIZE, CONST_RUN_COMMAND_POLL_INTERVAL, \
+    CONST_RUN_COMMAND_MAX_POLL_INTERVAL
+from ._consts import CONST_NODEPOOL_BATCH_MAX_PARALLEL, CONST_NODEPOOL_BATCH_POLL_INTERVAL, \
+    CONST_NODEPOOL_BATCH_MAX_POLL_ERRORS
 logger = get_logger(__name__)
 
 
@@ -1819,6 +1829,54 @@ def aks_get_credentials(cmd,    # pylint: disable=unused-argument
                             '~'), '.kube', 'config'),
                         overwrite_existing=False,
                         context_name=None):
+    kubeconfig = _get_kubeconfig(client, resource_group_name, name, admin, user)
+    _print_or_merge_credentials(
+        path, kubeconfig, overwrite_existing, context_name)
+
+
+def aks_get_credentials_bulk(cmd,    # pylint: disable=unused-argument
+                             client,
+                             resource_group_name=None,
+                             ids=None,
+                             admin=False,
+                             user='clusterUser',
+                             path=os.path.join(os.path.expanduser(
+                                 '~'), '.kube', 'config'),
+                             overwrite_existing=False):
+    from concurrent.futures import ThreadPoolExecutor
+    from msrestazure.tools import is_valid_resource_id, parse_resource_id
+
+    if ids:
+        clusters = []
+        for cluster_id in ids:
+            if not is_valid_resource_id(cluster_id):
+                raise CLIError("{} is not a valid managed cluster resource ID.".format(cluster_id))
+            parsed_id = parse_resource_id(cluster_id)
+            clusters.append((parsed_id['resource_group'], parsed_id['name']))
+    else:
+        managed_clusters = client.list_by_resource_group(resource_group_name) \
+            if resource_group_name else client.list()
+        clusters = [(parse_resource_id(mc.id)['resource_group'], mc.name) for mc in managed_clusters]
+    if not clusters:
+        raise CLIError("No managed clusters found.")
+
+    with ThreadPoolExecutor(max_workers=min(CONST_GET_CREDENTIALS_MAX_PARALLELISM, len(clusters))) as executor:
+        kubeconfigs = list(executor.map(
+            lambda cluster: _get_kubeconfig(client, cluster[0], cluster[1], admin, user), clusters))
+
+    if path == "-":
+        for kubeconfig in kubeconfigs:
+            print(kubeconfig)
+        return
+    _ensure_kubernetes_configuration_file(path)
+    try:
+        merge_kubernetes_configurations(path, kubeconfigs, overwrite_existing)
+    except yaml.YAMLError as ex:
+        logger.warning(
+            'Failed to merge credentials to kube config file: %s', ex)
+
+
+def _get_kubeconfig(client, resource_group_name, name, admin, user):
     credentialResults = None
     if admin:
         credentialResults = client.list_cluster_admin_credentials(
@@ -1836,10 +1894,8 @@ def aks_get_credentials(cmd,    # pylint: disable=unused-argument
         raise CLIError("No Kubernetes credentials found.")
 
     try:
-        kubeconfig = credentialResults.kubeconfigs[0].value.decode(
+        return credentialResults.kubeconfigs[0].value.decode(
             encoding='UTF-8')
-        _print_or_merge_credentials(
-            path, kubeconfig, overwrite_existing, context_name)
     except (IndexError, ValueError):
         raise CLIError("Fail to find kubeconfig file.")
 
@@ -2162,7 +2218,8 @@ def aks_upgrade(cmd,    # pylint: disable=unused-argument, too-many-return-state
     return sdk_no_wait(no_wait, client.create_or_update, resource_group_name, name, instance, custom_headers=headers)
 
 
-def aks_runcommand(cmd, client, resource_group_name, name, command_string="", command_files=None):
+def aks_runcommand(cmd, client, resource_group_name, name, command_string="", command_files=None,
+                   exclude=None, no_wait=False):
     colorama.init()
 
     mc = client.get(resource_group_name, name)
@@ -2172,22 +2229,55 @@ def aks_runcommand(cmd, client, resource_group_name, name, command_string="", co
 
     request_payload = RunCommandRequest()
     request_payload.command = command_string
-    request_payload.context = _get_command_context(command_files)
+    request_payload.context = _get_command_context(
+        command_files, exclude, CONST_RUN_COMMAND_MAX_REQUEST_SIZE - len(command_string))
     if mc.aad_profile is not None and mc.aad_profile.managed:
         request_payload.cluster_token = _get_dataplane_aad_token(
             cmd.cli_ctx, "6dae42f8-4368-4678-94ff-3960e28e3630")
 
+    if no_wait:
+        # only start the command, its result is fetched with 'az aks command result'
+        response = client._run_command_initial(  # pylint: disable=protected-access
+            resource_group_name, name, request_payload, raw=True, retry_total=0)
+        if response.output is not None:
+            command_id = response.output.id
+        else:
+            # the command result is at the location returned for the accepted command
+            location = response.response.headers.get('Location')
+            if not location:
+                raise CLIError('Failed to get the ID of the started command.')
+            command_id = urlparse(location).path.rstrip('/').split('/')[-1]
+        # the output of a command run with --no-wait is discarded, so the ID is reported as a warning
+        logger.warning('Command "%s" started, to get its result run: az aks command result -g %s -n %s -i %s',
+                       command_id, resource_group_name, name, command_id)
+        return None
+
     commandResultFuture = client.run_command(
         resource_group_name, name, request_payload, long_running_operation_timeout=5, retry_total=0)
     return commandResultFuture.result(300)
 
 
-def aks_command_result(cmd, client, resource_group_name, name, command_id=""):
+def aks_command_result(cmd, client, resource_group_name, name, command_id="", wait=False):
     if not command_id:
         raise CLIError('CommandID cannot be empty.')
 
     commandResult = client.get_command_result(
         resource_group_name, name, command_id)
+    if not wait:
+        return commandResult
+
+    # poll until the command completed, backing off while it runs
+    interval = CONST_RUN_COMMAND_POLL_INTERVAL
+    state = None
+    while commandResult is None or commandResult.provisioning_state not in ("Succeeded", "Failed", "Canceled"):
+        current_state = commandResult.provisioning_state if commandResult is not None else "Accepted"
+        if current_state != state:
+            state = current_state
+            logger.warning("command %s is in %s state", command_id, state)
+        time.sleep(interval)
+        interval = min(interval * 2, CONST_RUN_COMMAND_MAX_POLL_INTERVAL)
+        commandResult = client.get_command_result(
+            resource_group_name, name, command_id)
     return commandResult
 
 
@@ -2205,7 +2295,7 @@ def _print_command_result(commandResult):
     print(f"{colorama.Fore.BLUE}command is in : {commandResult.provisioning_state} state{colorama.Style.RESET_ALL}")
 
 
-def _get_command_context(command_files):
+def _get_command_context(command_files, exclude=None, max_size=CONST_RUN_COMMAND_MAX_REQUEST_SIZE):
     if not command_files:
         return ""
 
@@ -2214,12 +2304,16 @@ def _get_command_context(command_files):
     if len(command_files) == 1 and command_files[0] == ".":
         # current folder
         cwd = os.getcwd()
-        for filefolder, _, files in os.walk(cwd):
+        for filefolder, folders, files in os.walk(cwd):
+            # retain folder structure
+            rel = os.path.relpath(filefolder, cwd)
+            # skip the excluded folders without walking them
+            folders[:] = [folder for folder in folders
+                          if not _is_excluded(os.path.join(rel, folder), True, exclude)]
             for file in files:
-                # retain folder structure
-                rel = os.path.relpath(filefolder, cwd)
-                filesToAttach[os.path.join(
-                    filefolder, file)] = os.path.join(rel, file)
+                if not _is_excluded(os.path.join(rel, file), False, exclude):
+                    filesToAttach[os.path.join(
+                        filefolder, file)] = os.path.join(rel, file)
     else:
         for file in command_files:
             if file == ".":
@@ -2235,14 +2329,74 @@ def _get_command_context(command_files):
         logger.debug("no files to attach!")
         return ""
 
-    zipStream = io.BytesIO()
-    zipFile = zipfile.ZipFile(zipStream, "w")
-    for _, (osfile, zipEntry) in enumerate(filesToAttach.items()):
-        zipFile.write(osfile, zipEntry)
-    # zipFile.printdir() // use this to debug
-    zipFile.close()
+    # the zip file is encoded while it is written, so that neither is held in memory in full
+    encoder = _Base64Writer(max_size)
+    with zipfile.ZipFile(encoder, "w", zipfile.ZIP_DEFLATED) as zipFile:
+        for osfile, zipEntry in filesToAttach.items():
+            zipFile.write(osfile, zipEntry)
+    return encoder.getvalue()
 
-    return str(base64.encodebytes(zipStream.getbuffer()), "utf-8")
+
+def _is_excluded(path, is_folder, patterns):
+    """Whether a path relative to the attached folder matches one of the .gitignore style patterns.
+    Patterns without a slash match a file or folder name at any depth, patterns with a slash match the path
+    from the attached folder, and patterns with a trailing slash only match folders.
+    """
+    if not patterns:
+        return False
+    path = os.path.normpath(path).replace(os.sep, '/')
+    for pattern in patterns:
+        if pattern.endswith('/'):
+            if not is_folder:
+                continue
+            pattern = pattern.rstrip('/')
+        if '/' in pattern:
+            if fnmatch.fnmatch(path, pattern.lstrip('/')):
+                return True
+        elif fnmatch.fnmatch(path.rsplit('/', 1)[-1], pattern):
+            return True
+    return False
+
+
+class _Base64Writer(io.RawIOBase):
+    """A file object that base64 encodes what is written to it, in the same lines as base64.encodebytes,
+    failing as soon as the encoded text grows larger than max_size.
+    """
+    # base64.encodebytes encodes 57 bytes per line
+    _line_size = 57
+
+    def __init__(self, max_size):
+        super(_Base64Writer, self).__init__()
+        self.max_size = max_size
+        self._pending = bytearray()
+        self._encoded = []
+        self._encoded_size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._pending += b
+        complete = len(self._pending) - len(self._pending) % self._line_size
+        if complete:
+            self._encode(bytes(self._pending[:complete]))
+            del self._pending[:complete]
+        return len(b)
+
+    def _encode(self, data):
+        encoded = base64.encodebytes(data).decode('ascii')
+        self._encoded_size += len(encoded)
+        if self._encoded_size > self.max_size:
+            raise CLIError("The attached files are larger than the {} MB limit of the request, after they were zipped "
+                           "and encoded. Attach fewer files, or use --exclude to leave out the files the command "
+                           "does not need.".format(CONST_RUN_COMMAND_MAX_REQUEST_SIZE // (1024 * 1024)))
+        self._encoded.append(encoded)
+
+    def getvalue(self):
+        if self._pending:
+            self._encode(bytes(self._pending))
+            self._pending = bytearray()
+        return ''.join(self._encoded)
 
 
 def _get_dataplane_aad_token(cli_ctx, serverAppId):
@@ -3025,6 +3179,211 @@ def aks_agentpool_upgrade(cmd,  # pylint: disable=unused-argument
     return sdk_no_wait(no_wait, client.create_or_update, resource_group_name, cluster_name, nodepool_name, instance)
 
 
+def aks_agentpool_batch_upgrade(cmd,  # pylint: disable=unused-argument
+                                client,
+                                ids=None,
+                                targets_file=None,
+                                kubernetes_version='',
+                                node_image_only=False,
+                                max_surge=None,
+                                max_parallel=CONST_NODEPOOL_BATCH_MAX_PARALLEL):
+    if kubernetes_version != '' and node_image_only:
+        raise CLIError('Conflicting flags. Upgrading the Kubernetes version will also upgrade node image version.'
+                       'If you only want to upgrade the node version please use the "--node-image-only" option only.')
+    if kubernetes_version == '' and not node_image_only:
+        raise CLIError('Either "--kubernetes-version" or "--node-image-only" is required.')
+
+    def _upgrade(resource_group_name, cluster_name, nodepool_name):
+        if node_image_only:
+            return client.upgrade_node_image_version(resource_group_name, cluster_name, nodepool_name, polling=False)
+
+        instance = client.get(resource_group_name, cluster_name, nodepool_name)
+        instance.orchestrator_version = kubernetes_version
+        if not instance.upgrade_settings:
+            instance.upgrade_settings = AgentPoolUpgradeSettings()
+        if max_surge:
+            instance.upgrade_settings.max_surge = max_surge
+        return client.create_or_update(resource_group_name, cluster_name, nodepool_name, instance, polling=False)
+
+    targets = _get_agentpool_batch_targets(client, ids, targets_file)
+    return _run_agentpool_batch(client, targets, _upgrade, max_parallel)
+
+
+def aks_agentpool_batch_scale(cmd,  # pylint: disable=unused-argument
+                              client,
+                              ids=None,
+                              targets_file=None,
+                              node_count=3,
+                              max_parallel=CONST_NODEPOOL_BATCH_MAX_PARALLEL):
+    new_node_count = int(node_count)
+
+    def _scale(resource_group_name, cluster_name, nodepool_name):
+        instance = client.get(resource_group_name, cluster_name, nodepool_name)
+        if instance.enable_auto_scaling:
+            raise CLIError("Cannot scale cluster autoscaler enabled node pool.")
+        if new_node_count == instance.count:
+            return None
+        instance.count = new_node_count  # pylint: disable=no-member
+        return client.create_or_update(resource_group_name, cluster_name, nodepool_name, instance, polling=False)
+
+    targets = _get_agentpool_batch_targets(client, ids, targets_file)
+    return _run_agentpool_batch(client, targets, _scale, max_parallel)
+
+
+def _get_agentpool_batch_targets(client, ids, targets_file):
+    """Resolves node pool and managed cluster resource IDs to (resource group, cluster, node pool) targets,
+    where a managed cluster stands for all its node pools. The IDs of the targets file are one per line, or the
+    "id" properties of a JSON array or of newline-delimited JSON objects, as written by 'az graph query'.
+    """
+    from msrestazure.tools import is_valid_resource_id, parse_resource_id
+
+    resource_ids = list(ids or [])
+    if targets_file:
+        resource_ids += _read_resource_ids(targets_file)
+    if not resource_ids:
+        raise CLIError('Either "--ids" or "--targets-file" is required.')
+
+    targets = []
+    for resource_id in resource_ids:
+        if not is_valid_resource_id(resource_id):
+            raise CLIError("{} is not a valid resource ID.".format(resource_id))
+        parsed_id = parse_resource_id(resource_id)
+        if parsed_id.get('type', '').lower() != 'managedclusters':
+            raise CLIError("{} is not the ID of a managed cluster or of one of its node pools.".format(resource_id))
+        if parsed_id.get('child_name_1'):
+            targets.append((parsed_id['resource_group'], parsed_id['name'], parsed_id['child_name_1']))
+        else:
+            targets += [(parsed_id['resource_group'], parsed_id['name'], agentpool.name)
+                        for agentpool in client.list(parsed_id['resource_group'], parsed_id['name'])]
+
+    # a node pool can't run two operations at once, so it is only targeted once
+    unique_targets = OrderedDict()
+    for target in targets:
+        unique_targets.setdefault(tuple(part.lower() for part in target), target)
+    return list(unique_targets.values())
+
+
+def _read_resource_ids(path):
+    try:
+        with open(os.path.expanduser(path)) as f:
+            content = f.read()
+    except (IOError, OSError) as ex:
+        raise CLIError("Failed to read {}: {}".format(path, ex))
+
+    try:
+        rows = json.loads(content)
+        if not isinstance(rows, list):
+            rows = [rows]
+    except ValueError:
+        rows = [json.loads(line) if line.startswith('{') else line
+                for line in (line.strip() for line in content.splitlines()) if line]
+    return [row['id'] if isinstance(row, dict) else row for row in rows]
+
+
+def _run_agentpool_batch(client, targets, start_operation, max_parallel):
+    """Runs an operation on many node pools, starting at most max_parallel of them at a time, and polls the
+    provisioning state of all the running operations in one loop, showing how many are in each state.
+    start_operation starts the operation on a node pool without waiting for it, or returns None if there is
+    nothing to do.
+    """
+    if max_parallel < 1:
+        raise CLIError('Value of "--max-parallel" has to be positive.')
+
+    results = OrderedDict()
+    for target in targets:
+        results[target] = OrderedDict([('resourceGroup', target[0]), ('cluster', target[1]),
+                                       ('nodepool', target[2]), ('status', 'Pending')])
+    pending = list(targets)
+    # node pool to the operation started on it
+    running = OrderedDict()
+    # node pool to the number of times in a row its state could not be read
+    poll_errors = {}
+    status_line = None
+    while pending or running:
+        while pending and len(running) < max_parallel:
+            target = pending.pop(0)
+            try:
+                operation = start_operation(*target)
+                if operation is None:
+                    results[target]['status'] = 'Skipped'
+                else:
+                    results[target]['status'] = 'InProgress'
+                    running[target] = operation
+            except (CLIError, CloudError) as ex:
+                results[target]['status'] = 'Failed'
+                results[target]['error'] = str(ex)
+
+        status_line = _print_agentpool_batch_status(results, status_line)
+        if not running:
+            continue
+
+        time.sleep(CONST_NODEPOOL_BATCH_POLL_INTERVAL)
+        for target, operation in list(running.items()):
+            try:
+                provisioning_state = client.get(*target).provisioning_state
+                poll_errors.pop(target, None)
+            except (CloudError, ClientRequestError) as ex:
+                # the operation keeps running on the service, read its state again on the next poll
+                poll_errors[target] = poll_errors.get(target, 0) + 1
+                if _is_transient_agentpool_error(ex) and \
+                        poll_errors[target] < CONST_NODEPOOL_BATCH_MAX_POLL_ERRORS:
+                    logger.debug('Failed to get the state of node pool %s: %s', '/'.join(target), ex)
+                    continue
+                provisioning_state = 'Failed'
+                results[target]['error'] = str(ex)
+            if provisioning_state in ('Succeeded', 'Failed', 'Canceled'):
+                results[target]['status'] = provisioning_state
+                if provisioning_state != 'Succeeded' and 'error' not in results[target]:
+                    error = _get_agentpool_operation_error(operation)
+                    if error:
+                        results[target]['error'] = error
+                del running[target]
+
+    _print_agentpool_batch_status(results, status_line)
+    if sys.stderr.isatty():
+        sys.stderr.write('\n')
+    return list(results.values())
+
+
+def _is_transient_agentpool_error(ex):
+    if isinstance(ex, ClientRequestError):
+        return True
+    return getattr(ex, 'status_code', None) in (408, 429, 500, 502, 503, 504)
+
+
+def _get_agentpool_operation_error(operation):
+    """Returns the error of a failed node pool operation, read from the Azure-AsyncOperation status of the
+    operation started without polling, if it can be read."""
+    # pylint: disable=protected-access
+    response = getattr(operation, '_response', None)
+    service_client = getattr(operation, '_client', None)
+    status_url = response.headers.get('Azure-AsyncOperation') if response is not None else None
+    if not status_url or service_client is None:
+        return None
+    try:
+        status = service_client.send(service_client.get(status_url)).json()
+    except (ClientRequestError, ValueError) as ex:
+        logger.debug('Failed to get the status of the operation: %s', ex)
+        return None
+    error = (status or {}).get('error') or {}
+    if not error.get('message'):
+        return None
+    return '{}: {}'.format(error['code'], error['message']) if error.get('code') else error['message']
+
+
+def _print_agentpool_batch_status(results, previous_line):
+    counts = OrderedDict()
+    for result in results.values():
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    line = ', '.join('{}: {}'.format(status, count) for status, count in counts.items())
+    if sys.stderr.isatty():
+        sys.stderr.write('\r\033[K' + line)
+        sys.stderr.flush()
+    elif line != previous_line:
+        logger.warning(line)
+    return line
+
+
 def aks_agentpool_get_upgrade_profile(cmd,   # pylint: disable=unused-argument
                                       client,
                                       resource_group_name,
@@ -3364,6 +3723,18 @@ def _print_or_merge_credentials(path, kubeconfig, overwrite_existing, context_na
         print(kubeconfig)
         return
 
+    _ensure_kubernetes_configuration_file(path)
+
+    # merge the new kubeconfig into the existing one
+    try:
+        merge_kubernetes_configurations(
+            path, [kubeconfig], overwrite_existing, context_name)
+    except yaml.YAMLError as ex:
+        logger.warning(
+            'Failed to merge credentials to kube config file: %s', ex)
+
+
+def _ensure_kubernetes_configuration_file(path):
     # ensure that at least an empty ~/.kube/config exists
     directory = os.path.dirname(path)
     if directory and not os.path.exists(directory):
@@ -3376,54 +3747,53 @@ def _print_or_merge_credentials(path, kubeconfig, overwrite_existing, context_na
         with os.fdopen(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600), 'wt'):
             pass
 
-    # merge the new kubeconfig into the existing one
-    fd, temp_path = tempfile.mkstemp()
-    additional_file = os.fdopen(fd, 'w+t')
-    try:
-        additional_file.write(kubeconfig)
-        additional_file.flush()
-        merge_kubernetes_configurations(
-            path, temp_path, overwrite_existing, context_name)
-    except yaml.YAMLError as ex:
-        logger.warning(
-            'Failed to merge credentials to kube config file: %s', ex)
-    finally:
-        additional_file.close()
-        os.remove(temp_path)
-
 
 def _handle_merge(existing, addition, key, replace):
-    if not addition[key]:
+    if not addition.get(key):
         return
-    if existing[key] is None:
+    if not existing.get(key):
         existing[key] = addition[key]
         return
 
+    # the positions of the existing objects by name, so that each addition is merged without a scan
+    positions = {}
+    for position, obj in enumerate(existing[key]):
+        positions.setdefault(obj.get('name'), []).append(position)
+
+    merged = list(existing[key])
     for i in addition[key]:
-        for j in existing[key]:
-            if i['name'] == j['name']:
-                if replace or i == j:
-                    existing[key].remove(j)
-                else:
-                    from knack.prompting import prompt_y_n
-                    msg = 'A different object named {} already exists in your kubeconfig file.\nOverwrite?'
-                    overwrite = False
-                    try:
-                        overwrite = prompt_y_n(msg.format(i['name']))
-                    except NoTTYException:
-                        pass
-                    if overwrite:
-                        existing[key].remove(j)
-                    else:
-                        msg = 'A different object named {} already exists in {} in your kubeconfig file.'
-                        raise CLIError(msg.format(i['name'], key))
-        existing[key].append(i)
+        for position in positions.get(i['name'], []):
+            j = merged[position]
+            if not replace and i != j:
+                from knack.prompting import prompt_y_n
+                msg = 'A different object named {} already exists in your kubeconfig file.\nOverwrite?'
+                overwrite = False
+                try:
+                    overwrite = prompt_y_n(msg.format(i['name']))
+                except NoTTYException:
+                    pass
+                if not overwrite:
+                    msg = 'A different object named {} already exists in {} in your kubeconfig file.'
+                    raise CLIError(msg.format(i['name'], key))
+            merged[position] = None
+        positions[i['name']] = [len(merged)]
+        merged.append(i)
+    existing[key] = [obj for obj in merged if obj is not None]
+
+
+def _get_yaml_loader():
+    # the libyaml based loader and dumper are much faster on large kubeconfig files, when PyYAML was built with them
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def _get_yaml_dumper():
+    return getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
 
 
 def load_kubernetes_configuration(filename):
     try:
         with open(filename) as stream:
-            return yaml.safe_load(stream)
+            return yaml.load(stream, Loader=_get_yaml_loader())
     except (IOError, OSError) as ex:
         if getattr(ex, 'errno', 0) == errno.ENOENT:
             raise CLIError('{} does not exist'.format(filename))
@@ -3431,10 +3801,7 @@ def load_kubernetes_configuration(filename):
         raise CLIError('Error parsing {} ({})'.format(filename, str(ex)))
 
 
-def merge_kubernetes_configurations(existing_file, addition_file, replace, context_name=None):
-    existing = load_kubernetes_configuration(existing_file)
-    addition = load_kubernetes_configuration(addition_file)
-
+def _prepare_kubernetes_configuration(addition, context_name=None):
     if context_name is not None:
         addition['contexts'][0]['name'] = context_name
         addition['contexts'][0]['context']['cluster'] = context_name
@@ -3451,17 +3818,28 @@ def merge_kubernetes_configurations(existing_file, addition_file, replace, conte
         except (KeyError, TypeError):
             continue
 
-    if addition is None:
-        raise CLIError(
-            'failed to load additional configuration from {}'.format(addition_file))
 
-    if existing is None:
-        existing = addition
-    else:
-        _handle_merge(existing, addition, 'clusters', replace)
-        _handle_merge(existing, addition, 'users', replace)
-        _handle_merge(existing, addition, 'contexts', replace)
-        existing['current-context'] = addition['current-context']
+def merge_kubernetes_configurations(existing_file, additions, replace, context_name=None):
+    """Merge kubeconfigs, given as YAML strings, into the file at the specified path with a single write.
+    The current context of the last kubeconfig becomes the current context.
+    """
+    existing = load_kubernetes_configuration(existing_file)
+
+    merged_contexts = []
+    for kubeconfig in additions:
+        addition = yaml.load(kubeconfig, Loader=_get_yaml_loader())
+        if addition is None:
+            raise CLIError('failed to load additional configuration')
+        _prepare_kubernetes_configuration(addition, context_name)
+        merged_contexts.append(addition.get('current-context', 'UNKNOWN'))
+
+        if existing is None:
+            existing = addition
+        else:
+            _handle_merge(existing, addition, 'clusters', replace)
+            _handle_merge(existing, addition, 'users', replace)
+            _handle_merge(existing, addition, 'contexts', replace)
+            existing['current-context'] = addition['current-context']
 
     # check that ~/.kube/config is only read- and writable by its owner
     if platform.system() != 'Windows':
@@ -3471,15 +3849,33 @@ def merge_kubernetes_configurations(existing_file, addition_file, replace, conte
             logger.warning('%s has permissions "%s".\nIt should be readable and writable only by its owner.',
                            existing_file, existing_file_perms)
 
-    with open(existing_file, 'w+') as stream:
-        yaml.safe_dump(existing, stream, default_flow_style=False)
+    _write_kubernetes_configuration(existing_file, existing)
 
-    current_context = addition.get('current-context', 'UNKNOWN')
+    for merged_context in merged_contexts[:-1]:
+        print('Merged "{}" in {}'.format(merged_context, existing_file))
     msg = 'Merged "{}" as current context in {}'.format(
-        current_context, existing_file)
+        merged_contexts[-1], existing_file)
     print(msg)
 
 
+def _write_kubernetes_configuration(filename, config):
+    # write to a file next to the kubeconfig and rename it, so that the kubeconfig is never left partly written
+    # a symlinked kubeconfig is kept a symlink by replacing the file it links to
+    filename = os.path.realpath(filename)
+    directory = os.path.dirname(filename)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(filename) + '.')
+    try:
+        with os.fdopen(fd, 'w') as stream:
+            yaml.dump(config, stream, Dumper=_get_yaml_dumper(), default_flow_style=False)
+        if platform.system() != 'Windows':
+            os.chmod(temp_path, stat.S_IMODE(os.stat(filename).st_mode))
+        os.replace(temp_path, filename)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
 def cloud_storage_account_service_factory(cli_ctx, kwargs):
     from azure.cli.core.profiles import ResourceType, get_sdk
     t_cloud_storage_account = get_sdk(
@@ -3507,7 +3903,7 @@ def get_storage_account_from_diag_settings(cli_ctx, resource_group_name, name):
     return None
 
 
-def display_diagnostics_report(temp_kubeconfig_path):   # pylint: disable=too-many-statements
+def display_diagnostics_report(temp_kubeconfig_path):
     if not which('kubectl'):
         raise CLIError('Can not find kubectl executable in PATH')
 
@@ -3517,7 +3913,7 @@ def display_diagnostics_report(temp_kubeconfig_path):   # pylint: disable=too-ma
         universal_newlines=True)
     logger.debug(nodes)
     node_lines = nodes.splitlines()
-    ready_nodes = {}
+    ready_nodes = set()
     for node_line in node_lines:
         columns = node_line.split()
         logger.debug(node_line)
@@ -3525,7 +3921,7 @@ def display_diagnostics_report(temp_kubeconfig_path):   # pylint: disable=too-ma
             logger.warning(
                 "Node %s is not Ready. Current state is: %s.", columns[0], columns[1])
         else:
-            ready_nodes[columns[0]] = False
+            ready_nodes.add(columns[0])
 
     logger.debug('There are %s ready nodes in the cluster',
                  str(len(ready_nodes)))
@@ -3534,65 +3930,16 @@ def display_diagnostics_report(temp_kubeconfig_path):   # pylint: disable=too-ma
         logger.warning(
             'No nodes are ready in the current cluster. Diagnostics info might not be available.')
 
+    diagnostics = _collect_diagnostics(temp_kubeconfig_path, ready_nodes, CONST_PERISCOPE_DIAGNOSTICS_TIMEOUT)
+    for node_name in sorted(ready_nodes - set(diagnostics)):
+        logger.warning("The diagnostics information for node %s is not ready yet.", node_name)
+
     network_config_array = []
     network_status_array = []
-    apds_created = False
-
-    max_retry = 10
-    for retry in range(0, max_retry):
-        if not apds_created:
-            apd = subprocess.check_output(
-                ["kubectl", "--kubeconfig", temp_kubeconfig_path, "get",
-                    "apd", "-n", "aks-periscope", "--no-headers"],
-                universal_newlines=True
-            )
-            apd_lines = apd.splitlines()
-            if apd_lines and 'No resources found' in apd_lines[0]:
-                apd_lines.pop(0)
-
-            print("Got {} diagnostic results for {} ready nodes{}\r".format(len(apd_lines),
-                                                                            len(ready_nodes),
-                                                                            '.' * retry), end='')
-            if len(apd_lines) < len(ready_nodes):
-                time.sleep(3)
-            else:
-                apds_created = True
-                print()
-        else:
-            for node_name in ready_nodes:
-                if ready_nodes[node_name]:
-                    continue
-                apdName = "aks-periscope-diagnostic-" + node_name
-                try:
-                    network_config = subprocess.check_output(
-                        ["kubectl", "--kubeconfig", temp_kubeconfig_path,
-                         "get", "apd", apdName, "-n",
-                         "aks-periscope", "-o=jsonpath={.spec.networkconfig}"],
-                        universal_newlines=True)
-                    logger.debug('Dns status for node %s is %s',
-                                 node_name, network_config)
-                    network_status = subprocess.check_output(
-                        ["kubectl", "--kubeconfig", temp_kubeconfig_path,
-                         "get", "apd", apdName, "-n",
-                         "aks-periscope", "-o=jsonpath={.spec.networkoutbound}"],
-                        universal_newlines=True)
-                    logger.debug('Network status for node %s is %s',
-                                 node_name, network_status)
-
-                    if not network_config or not network_status:
-                        print("The diagnostics information for node {} is not ready yet. "
-                              "Will try again in 10 seconds.".format(node_name))
-                        time.sleep(10)
-                        break
-
-                    network_config_array += json.loads(
-                        '[' + network_config + ']')
-                    network_status_object = json.loads(network_status)
-                    network_status_array += format_diag_status(
-                        network_status_object)
-                    ready_nodes[node_name] = True
-                except subprocess.CalledProcessError as err:
-                    raise CLIError(err.output)
+    for node_name in sorted(diagnostics):
+        network_config, network_status = diagnostics[node_name]
+        network_config_array += network_config
+        network_status_array += format_diag_status(network_status)
 
     print()
     if network_config_array:
@@ -3613,6 +3960,95 @@ def display_diagnostics_report(temp_kubeconfig_path):   # pylint: disable=too-ma
                        "Please run 'az aks kanalyze' command later to get the analysis results.")
 
 
+def _collect_diagnostics(temp_kubeconfig_path, node_names, timeout):
+    """
+    Collects the network configuration and connectivity results that aks-periscope reports for each node, from
+    one watch of all its diagnostics objects. Nodes are added to the results as soon as their diagnostics are
+    complete, until there are results for all the nodes or the timeout expires.
+    """
+    diagnostics = {}
+    if not node_names:
+        return diagnostics
+
+    deadline = time.time() + timeout
+    for apd in _watch_diagnostics(temp_kubeconfig_path, deadline):
+        node_name = apd.get('metadata', {}).get('name', '')[len("aks-periscope-diagnostic-"):]
+        if node_name not in node_names or node_name in diagnostics:
+            continue
+        spec = apd.get('spec') or {}
+        network_config = _load_diagnostic(spec.get('networkconfig'))
+        network_status = _load_diagnostic(spec.get('networkoutbound'))
+        logger.debug('Dns status for node %s is %s', node_name, network_config)
+        logger.debug('Network status for node %s is %s', node_name, network_status)
+        if not network_config or not network_status:
+            continue
+
+        diagnostics[node_name] = (network_config if isinstance(network_config, list) else [network_config],
+                                  network_status)
+        print("Got {} diagnostic results for {} ready nodes\r".format(len(diagnostics), len(node_names)), end='')
+        if len(diagnostics) == len(node_names):
+            break
+    print()
+    return diagnostics
+
+
+def _load_diagnostic(value):
+    # aks-periscope stores its results as JSON strings
+    if isinstance(value, str):
+        return json.loads(value) if value else None
+    return value
+
+
+def _watch_diagnostics(temp_kubeconfig_path, deadline):
+    """
+    Yields the aks-periscope diagnostics objects, first the existing ones and then every one that is added or
+    updated, from a single kubectl watch that is stopped at the deadline. Its output is parsed on a separate
+    thread, so that waiting for the next object never takes longer than the deadline.
+    """
+    # the warnings of a long watch could fill a pipe that is only read once kubectl exits, and block it
+    errors = tempfile.TemporaryFile(mode='w+')
+    process = subprocess.Popen(
+        ["kubectl", "--kubeconfig", temp_kubeconfig_path, "get", "apd", "-n", "aks-periscope",
+         "--watch", "-o", "json"],
+        stdout=subprocess.PIPE, stderr=errors, universal_newlines=True)
+    objects = queue.Queue()
+
+    def _read_objects():
+        # kubectl writes every object as an indented JSON document, which ends with a closing brace on its own line
+        lines = []
+        for line in process.stdout:
+            lines.append(line)
+            if line.startswith('}'):
+                try:
+                    objects.put(json.loads(''.join(lines)))
+                    lines = []
+                except ValueError:
+                    pass
+        objects.put(None)
+
+    reader = threading.Thread(target=_read_objects)
+    reader.daemon = True
+    reader.start()
+    try:
+        while True:
+            try:
+                apd = objects.get(timeout=max(deadline - time.time(), 0))
+            except queue.Empty:
+                return
+            if apd is None:
+                break
+            yield apd
+
+        if process.wait() != 0:
+            errors.seek(0)
+            raise CLIError(errors.read())
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        errors.close()
+
+
 def format_diag_status(diag_status):
     for diag in diag_status:
         if diag["Status"]:
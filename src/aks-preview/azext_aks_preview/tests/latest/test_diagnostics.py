@@ -0,0 +1,112 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import io
+import json
+import threading
+import unittest
+from unittest import mock
+
+from knack.util import CLIError
+
+from azext_aks_preview.custom import _collect_diagnostics
+
+
+def _apd(node_name, ready=True):
+    spec = {}
+    if ready:
+        spec = {
+            'networkconfig': json.dumps({'HostName': node_name, 'NetworkPlugin': 'kubenet'}),
+            'networkoutbound': json.dumps([{'Type': 'DNS', 'Status': 'Connected'}])
+        }
+    return json.dumps({'apiVersion': 'aks-periscope.azure.github.com/v1', 'kind': 'Diagnostic',
+                       'metadata': {'name': 'aks-periscope-diagnostic-' + node_name, 'namespace': 'aks-periscope'},
+                       'spec': spec}, indent=4) + '\n'
+
+
+class FakeWatchProcess(object):
+    """A kubectl watch that writes the given objects, and then keeps running until it is killed."""
+
+    def __init__(self, output, returncode=None, stderr=''):
+        self.stdout = io.StringIO(output)
+        self.errors = stderr
+        self.returncode = returncode
+        self.killed = threading.Event()
+        if returncode is None:
+            self.stdout = _BlockingLines(output, self.killed)
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        if self.returncode is None:
+            self.killed.wait()
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+        self.killed.set()
+
+
+class _BlockingLines(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, output, closed):
+        self.lines = output.splitlines(True)
+        self.closed = closed
+
+    def __iter__(self):
+        for line in self.lines:
+            yield line
+        self.closed.wait()
+
+
+class TestCollectDiagnostics(unittest.TestCase):
+
+    def _collect(self, process, node_names, timeout=5):
+        def _popen(args, stderr, **kwargs):  # pylint: disable=unused-argument
+            stderr.write(process.errors)
+            return process
+
+        with mock.patch('azext_aks_preview.custom.subprocess.Popen', side_effect=_popen) as popen:
+            diagnostics = _collect_diagnostics('kubeconfig', node_names, timeout)
+        popen.assert_called_once()
+        self.assertIn('--watch', popen.call_args[0][0])
+        return diagnostics
+
+    def test_collect_diagnostics_of_all_nodes(self):
+        node_names = {'node-{}'.format(i) for i in range(300)}
+        output = _apd('node-0', ready=False) + ''.join(_apd(name) for name in sorted(node_names))
+        process = FakeWatchProcess(output)
+
+        diagnostics = self._collect(process, node_names)
+
+        self.assertEqual(node_names, set(diagnostics))
+        network_config, network_status = diagnostics['node-0']
+        self.assertEqual([{'HostName': 'node-0', 'NetworkPlugin': 'kubenet'}], network_config)
+        self.assertEqual([{'Type': 'DNS', 'Status': 'Connected'}], network_status)
+        self.assertTrue(process.killed.is_set())
+
+    def test_collect_diagnostics_times_out(self):
+        process = FakeWatchProcess(_apd('node-0') + _apd('node-1', ready=False))
+
+        diagnostics = self._collect(process, {'node-0', 'node-1'}, timeout=0.2)
+
+        self.assertEqual({'node-0'}, set(diagnostics))
+        self.assertTrue(process.killed.is_set())
+
+    def test_collect_diagnostics_watch_fails(self):
+        process = FakeWatchProcess('', returncode=1, stderr='error: the server doesn\'t have a resource type "apd"')
+
+        with self.assertRaises(CLIError) as context:
+            self._collect(process, {'node-0'})
+        self.assertEqual('error: the server doesn\'t have a resource type "apd"', str(context.exception))
+
+    def test_collect_diagnostics_without_nodes(self):
+        with mock.patch('azext_aks_preview.custom.subprocess.Popen') as popen:
+            self.assertEqual({}, _collect_diagnostics('kubeconfig', set(), 5))
+        popen.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import os
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import yaml
+from knack.util import CLIError
+
+from azext_aks_preview.custom import (aks_get_credentials_bulk, load_kubernetes_configuration,
+                                      merge_kubernetes_configurations)
+
+
+def _kubeconfig(name, server=None, user='clusterUser'):
+    user_name = '{}_rg_{}'.format(user, name)
+    return {
+        'apiVersion': 'v1',
+        'kind': 'Config',
+        'clusters': [{'name': name, 'cluster': {'server': server or 'https://{}.hcp.westus2.azmk8s.io:443'.format(name)}}],
+        'users': [{'name': user_name, 'user': {'token': 'token-' + name}}],
+        'contexts': [{'name': name, 'context': {'cluster': name, 'user': user_name}}],
+        'current-context': name
+    }
+
+
+def _combine(*kubeconfigs):
+    combined = {'apiVersion': 'v1', 'kind': 'Config', 'clusters': [], 'users': [], 'contexts': []}
+    for kubeconfig in kubeconfigs:
+        for key in ['clusters', 'users', 'contexts']:
+            combined[key] += kubeconfig[key]
+        combined['current-context'] = kubeconfig['current-context']
+    return combined
+
+
+class TestMergeKubernetesConfigurations(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.path = os.path.join(self.temp_dir, 'config')
+
+    def _write(self, kubeconfig):
+        with os.fdopen(os.open(self.path, os.O_CREAT | os.O_WRONLY, 0o600), 'w') as f:
+            yaml.safe_dump(kubeconfig, f)
+
+    def _merge(self, *kubeconfigs, **kwargs):
+        with mock.patch('builtins.print'):
+            merge_kubernetes_configurations(self.path, [yaml.safe_dump(k) for k in kubeconfigs],
+                                            kwargs.get('replace', False), kwargs.get('context_name'))
+        return load_kubernetes_configuration(self.path)
+
+    def test_merge_into_empty_file(self):
+        open(self.path, 'w').close()
+        merged = self._merge(_kubeconfig('aks1'))
+        self.assertEqual(_kubeconfig('aks1'), merged)
+
+    def test_merge_replaces_identical_and_keeps_others(self):
+        self._write(_combine(_kubeconfig('aks1'), _kubeconfig('aks2'), _kubeconfig('aks3')))
+        merged = self._merge(_kubeconfig('aks2'))
+
+        self.assertEqual(['aks1', 'aks3', 'aks2'], [c['name'] for c in merged['contexts']])
+        self.assertEqual(['aks1', 'aks3', 'aks2'], [c['name'] for c in merged['clusters']])
+        self.assertEqual(3, len(merged['users']))
+        self.assertEqual('aks2', merged['current-context'])
+
+    def test_merge_removes_all_duplicates(self):
+        self._write(_combine(_kubeconfig('aks1'), _kubeconfig('aks1'), _kubeconfig('aks1'), _kubeconfig('aks2')))
+        merged = self._merge(_kubeconfig('aks1', server='https://new:443'), replace=True)
+
+        self.assertEqual(['aks2', 'aks1'], [c['name'] for c in merged['clusters']])
+        self.assertEqual('https://new:443', merged['clusters'][1]['cluster']['server'])
+
+    def test_merge_different_object_without_overwrite(self):
+        self._write(_kubeconfig('aks1'))
+        with mock.patch('knack.prompting.prompt_y_n', return_value=False):
+            with self.assertRaises(CLIError):
+                self._merge(_kubeconfig('aks1', server='https://new:443'))
+        self.assertEqual(_kubeconfig('aks1'), load_kubernetes_configuration(self.path))
+
+    def test_merge_renames_admin_context(self):
+        self._write(_kubeconfig('aks1'))
+        merged = self._merge(_kubeconfig('aks1', user='clusterAdmin'))
+
+        self.assertEqual(['aks1', 'aks1-admin'], [c['name'] for c in merged['contexts']])
+        self.assertEqual('aks1-admin', merged['current-context'])
+
+    def test_merge_many_kubeconfigs_in_one_write(self):
+        self._write(_combine(*[_kubeconfig('aks{}'.format(i)) for i in range(1500)]))
+        additions = [_kubeconfig('aks{}'.format(i)) for i in range(1400, 1600)]
+
+        start = time.time()
+        merged = self._merge(*additions)
+        self.assertLess(time.time() - start, 10)
+
+        self.assertEqual(1600, len(merged['contexts']))
+        self.assertEqual(1600, len({c['name'] for c in merged['contexts']}))
+        self.assertEqual('aks1599', merged['current-context'])
+        self.assertEqual(['config'], os.listdir(self.temp_dir))
+
+    @unittest.skipIf(os.name == 'nt', 'file modes are not supported on Windows')
+    def test_merge_keeps_file_mode(self):
+        self._write(_kubeconfig('aks1'))
+        self._merge(_kubeconfig('aks2'))
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.path).st_mode))
+
+    @unittest.skipIf(os.name == 'nt', 'symlinks need extra privileges on Windows')
+    def test_merge_keeps_symlink(self):
+        os.mkdir(os.path.join(self.temp_dir, 'dotfiles'))
+        target = os.path.join(self.temp_dir, 'dotfiles', 'kubeconfig')
+        open(target, 'w').close()
+        os.symlink(target, self.path)
+
+        merged = self._merge(_kubeconfig('aks1'))
+
+        self.assertTrue(os.path.islink(self.path))
+        self.assertEqual(_kubeconfig('aks1'), merged)
+        self.assertEqual(['kubeconfig'], os.listdir(os.path.dirname(target)))
+
+    def test_failed_write_keeps_kubeconfig(self):
+        self._write(_kubeconfig('aks1'))
+        with mock.patch('azext_aks_preview.custom.yaml.dump', side_effect=yaml.YAMLError('failed')):
+            with self.assertRaises(yaml.YAMLError):
+                self._merge(_kubeconfig('aks2'))
+
+        self.assertEqual(_kubeconfig('aks1'), load_kubernetes_configuration(self.path))
+        self.assertEqual(['config'], os.listdir(self.temp_dir))
+
+
+class TestGetCredentialsBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.path = os.path.join(self.temp_dir, '.kube', 'config')
+
+    @staticmethod
+    def _client(names):
+        client = mock.Mock()
+        client.list_by_resource_group.return_value = [
+            mock.Mock(id='/subscriptions/sub/resourceGroups/rg/providers/Microsoft.ContainerService/managedClusters/' + n)
+            for n in names]
+        for managed_cluster, name in zip(client.list_by_resource_group.return_value, names):
+            managed_cluster.name = name
+
+        def _credentials(resource_group_name, name):
+            kubeconfig = mock.Mock(value=yaml.safe_dump(_kubeconfig(name)).encode('utf-8'))
+            return mock.Mock(kubeconfigs=[kubeconfig])
+        client.list_cluster_user_credentials.side_effect = _credentials
+        return client
+
+    def test_get_credentials_of_resource_group(self):
+        client = self._client(['aks{}'.format(i) for i in range(20)])
+        with mock.patch('builtins.print'):
+            aks_get_credentials_bulk(None, client, resource_group_name='rg', path=self.path)
+
+        merged = load_kubernetes_configuration(self.path)
+        self.assertEqual({'aks{}'.format(i) for i in range(20)}, {c['name'] for c in merged['contexts']})
+        self.assertEqual(20, client.list_cluster_user_credentials.call_count)
+
+    def test_get_credentials_of_ids(self):
+        client = self._client(['aks1', 'aks2'])
+        ids = ['/subscriptions/sub/resourceGroups/rg2/providers/Microsoft.ContainerService/managedClusters/aks2']
+        with mock.patch('builtins.print'):
+            aks_get_credentials_bulk(None, client, ids=ids, path=self.path)
+
+        client.list_by_resource_group.assert_not_called()
+        client.list_cluster_user_credentials.assert_called_once_with('rg2', 'aks2')
+        self.assertEqual('aks2', load_kubernetes_configuration(self.path)['current-context'])
+
+    def test_get_credentials_of_invalid_id(self):
+        with self.assertRaises(CLIError):
+            aks_get_credentials_bulk(None, mock.Mock(), ids=['aks1'], path=self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from knack.util import CLIError
+from msrest.exceptions import ClientRequestError
+from msrestazure.azure_exceptions import CloudError
+from requests import Response
+
+from azext_aks_preview.custom import aks_agentpool_batch_scale, aks_agentpool_batch_upgrade
+
+AgentPool = namedtuple('AgentPool', ['name'])
+CLUSTER_ID = '/subscriptions/sub/resourceGroups/{}/providers/Microsoft.ContainerService/managedClusters/{}'
+
+
+def _cloud_error(status_code, code, message):
+    response = Response()
+    response.status_code = status_code
+    response.reason = code
+    response._content = json.dumps({'error': {'code': code, 'message': message}}).encode('utf-8')
+    return CloudError(response)
+
+
+def _nodepool_id(resource_group, cluster, nodepool):
+    return CLUSTER_ID.format(resource_group, cluster) + '/agentPools/' + nodepool
+
+
+class FakeAgentPoolsClient(object):
+    """Agent pools whose operations take the given number of polls to complete, and which count the
+    operations running on them at the same time."""
+
+    def __init__(self, nodepools_per_cluster=2, polls=2, failing=(), get_errors=None):
+        self.nodepools_per_cluster = nodepools_per_cluster
+        self.polls = polls
+        self.failing = failing
+        # node pool name to the errors raised by its next reads
+        self.get_errors = get_errors or {}
+        self.operations = {}
+        self.started = []
+        self.max_running = 0
+
+    def list(self, resource_group_name, resource_name):
+        return [AgentPool('nodepool{}'.format(i)) for i in range(self.nodepools_per_cluster)]
+
+    def get(self, resource_group_name, resource_name, agent_pool_name):
+        target = (resource_group_name, resource_name, agent_pool_name)
+        if target in self.operations and self.get_errors.get(agent_pool_name):
+            raise self.get_errors[agent_pool_name].pop(0)
+        state = 'Succeeded'
+        if target in self.operations:
+            self.operations[target] -= 1
+            if self.operations[target] > 0:
+                state = 'Upgrading'
+            else:
+                del self.operations[target]
+                state = 'Failed' if agent_pool_name in self.failing else 'Succeeded'
+        return mock.Mock(provisioning_state=state, count=3, enable_auto_scaling=False, upgrade_settings=None)
+
+    def _start(self, target):
+        self.started.append(target)
+        self.operations[target] = self.polls
+        self.max_running = max(self.max_running, len(self.operations))
+        # a poller started with polling=False, its initial response links to the status of the operation
+        operation = mock.Mock()
+        operation._response.headers = {'Azure-AsyncOperation': 'https://management.azure.com/operations/{}'.format(
+            target[2])}
+        operation._client.get.side_effect = lambda url: url
+        operation._client.send.side_effect = lambda url: mock.Mock(json=mock.Mock(return_value={
+            'status': 'Failed', 'error': {'code': 'UpgradeFailed', 'message': 'drain of {} failed'.format(
+                url.rsplit('/', 1)[-1])}}))
+        return operation
+
+    def create_or_update(self, resource_group_name, resource_name, agent_pool_name, parameters, polling=True):
+        assert polling is False
+        return self._start((resource_group_name, resource_name, agent_pool_name))
+
+    def upgrade_node_image_version(self, resource_group_name, resource_name, agent_pool_name, polling=True):
+        assert polling is False
+        return self._start((resource_group_name, resource_name, agent_pool_name))
+
+
+@mock.patch('azext_aks_preview.custom.time.sleep')
+class TestNodepoolBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def test_upgrade_node_images_of_clusters(self, sleep):
+        client = FakeAgentPoolsClient(nodepools_per_cluster=2, polls=3)
+        ids = [CLUSTER_ID.format('rg', 'aks{}'.format(i)) for i in range(40)]
+
+        results = aks_agentpool_batch_upgrade(None, client, ids=ids, node_image_only=True, max_parallel=10)
+
+        self.assertEqual(80, len(results))
+        self.assertEqual({'Succeeded'}, {r['status'] for r in results})
+        self.assertEqual(80, len(client.started))
+        self.assertEqual(10, client.max_running)
+        # all running operations are polled together, instead of one after the other
+        self.assertLess(sleep.call_count, 80)
+
+    def test_upgrade_targets_file(self, sleep):
+        client = FakeAgentPoolsClient()
+        targets_file = os.path.join(self.temp_dir, 'targets.json')
+        with open(targets_file, 'w') as f:
+            f.write(json.dumps({'id': _nodepool_id('rg1', 'aks1', 'np1')}) + '\n')
+            f.write(json.dumps({'id': _nodepool_id('RG1', 'AKS1', 'NP1')}) + '\n')
+            f.write(json.dumps({'id': _nodepool_id('rg2', 'aks2', 'np2')}) + '\n')
+
+        results = aks_agentpool_batch_upgrade(None, client, targets_file=targets_file, kubernetes_version='1.20.7')
+
+        self.assertEqual([('rg1', 'aks1', 'np1'), ('rg2', 'aks2', 'np2')], client.started)
+        self.assertEqual(['Succeeded', 'Succeeded'], [r['status'] for r in results])
+
+    def test_upgrade_failures(self, sleep):
+        client = FakeAgentPoolsClient(failing=('nodepool1',))
+
+        results = aks_agentpool_batch_upgrade(None, client, ids=[CLUSTER_ID.format('rg', 'aks')], node_image_only=True)
+
+        self.assertEqual(['Succeeded', 'Failed'], [r['status'] for r in results])
+        self.assertNotIn('error', results[0])
+        self.assertEqual('UpgradeFailed: drain of nodepool1 failed', results[1]['error'])
+
+    def test_upgrade_retries_transient_read_errors(self, sleep):
+        client = FakeAgentPoolsClient(get_errors={
+            'nodepool0': [_cloud_error(429, 'TooManyRequests', 'throttled'), ClientRequestError('connection reset'),
+                          _cloud_error(503, 'ServiceUnavailable', 'unavailable')],
+            'nodepool1': [_cloud_error(429, 'TooManyRequests', 'throttled')] * 10
+        })
+
+        results = aks_agentpool_batch_upgrade(None, client, ids=[CLUSTER_ID.format('rg', 'aks')], node_image_only=True)
+
+        self.assertEqual(['Succeeded', 'Failed'], [r['status'] for r in results])
+        # node pools are only given up on after their state could not be read several times in a row
+        self.assertEqual(5, 10 - len(client.get_errors['nodepool1']))
+        self.assertIn('throttled', results[1]['error'])
+
+    def test_upgrade_fails_on_non_transient_read_errors(self, sleep):
+        client = FakeAgentPoolsClient(get_errors={'nodepool1': [_cloud_error(403, 'AuthorizationFailed', 'denied')]})
+
+        results = aks_agentpool_batch_upgrade(None, client, ids=[CLUSTER_ID.format('rg', 'aks')], node_image_only=True)
+
+        self.assertEqual(['Succeeded', 'Failed'], [r['status'] for r in results])
+        self.assertIn('denied', results[1]['error'])
+
+    def test_upgrade_requires_version_or_node_image(self, sleep):
+        with self.assertRaises(CLIError):
+            aks_agentpool_batch_upgrade(None, FakeAgentPoolsClient(), ids=[CLUSTER_ID.format('rg', 'aks')])
+
+    def test_invalid_target(self, sleep):
+        vm_id = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Compute/virtualMachines/vm'
+        with self.assertRaises(CLIError):
+            aks_agentpool_batch_upgrade(None, FakeAgentPoolsClient(), node_image_only=True, ids=[vm_id])
+
+    def test_scale_skips_node_pools_with_node_count(self, sleep):
+        client = FakeAgentPoolsClient()
+        ids = [CLUSTER_ID.format('rg', 'aks')]
+
+        results = aks_agentpool_batch_scale(None, client, ids=ids, node_count=3)
+        self.assertEqual(['Skipped', 'Skipped'], [r['status'] for r in results])
+        results = aks_agentpool_batch_scale(None, client, ids=ids, node_count=5)
+        self.assertEqual(['Succeeded', 'Succeeded'], [r['status'] for r in results])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,14 +2,21 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
+import base64
+import io
+import os
+import shutil
+import tempfile
 import unittest
+import zipfile
+from unittest import mock
 
 from azure.mgmt.containerservice.v2019_11_01.models import ManagedClusterLoadBalancerProfile
 from azure.mgmt.containerservice.v2019_11_01.models import ManagedClusterLoadBalancerProfileManagedOutboundIPs
 from azure.mgmt.containerservice.v2019_11_01.models import ManagedClusterLoadBalancerProfileOutboundIPPrefixes
 from azure.mgmt.containerservice.v2019_11_01.models import ManagedClusterLoadBalancerProfileOutboundIPs
 from azure.cli.core.util import CLIError
-from azext_aks_preview.custom import _get_command_context
+from azext_aks_preview.custom import _get_command_context, aks_command_result, aks_runcommand
 from .recording_processors import KeyReplacer
 from azure.cli.testsdk import (
     ResourceGroupPreparer, RoleBasedServicePrincipalPreparer, ScenarioTest, live_only)
@@ -47,6 +54,84 @@ class TestRunCommand(ScenarioTest):
             [_get_test_data_file("kubeletconfig.json"), _get_test_data_file("linuxosconfig.json")])
         self.assertNotEqual(context, '')
 
+    def test_get_command_context_folder_excludes(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder, ignore_errors=True)
+        for path in ['deploy.yaml', 'charts/app/values.yaml', 'charts/app/debug.log', '.git/HEAD', 'build/out.bin',
+                     'src/build/keep.txt']:
+            os.makedirs(os.path.join(folder, os.path.dirname(path)), exist_ok=True)
+            with open(os.path.join(folder, path), 'w') as f:
+                f.write(path * 100)
+
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            context = _get_command_context(["."], exclude=[".git/", "*.log", "/build/"])
+        finally:
+            os.chdir(cwd)
+
+        zipped = base64.b64decode(context)
+        with zipfile.ZipFile(io.BytesIO(zipped)) as zipFile:
+            names = sorted(os.path.normpath(name) for name in zipFile.namelist())
+            self.assertEqual(zipFile.read('deploy.yaml'), b'deploy.yaml' * 100)
+        self.assertEqual([os.path.normpath(p) for p in ['charts/app/values.yaml', 'deploy.yaml', 'src/build/keep.txt']],
+                         names)
+        self.assertEqual(base64.encodebytes(zipped).decode('ascii'), context)
+
+    def test_get_command_context_too_large(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder, ignore_errors=True)
+        large_file = os.path.join(folder, 'large.bin')
+        with open(large_file, 'wb') as f:
+            f.write(os.urandom(64 * 1024))
+
+        with self.assertRaises(CLIError) as cm:
+            _get_command_context([large_file], max_size=32 * 1024)
+        self.assertIn('MB limit of the request', str(cm.exception))
+
+    def test_aks_run_command_no_wait(self):
+        client = mock.Mock()
+        client.get.return_value.aad_profile = None
+        response = client._run_command_initial.return_value
+        response.output = None
+        response.response.headers = {
+            'Location': 'https://management.azure.com/subscriptions/sub/resourceGroups/rg/providers/'
+                        'Microsoft.ContainerService/managedClusters/aks/commandResults/1234abcd?api-version=2021-02-01'}
+
+        with mock.patch('azext_aks_preview.custom.logger') as logger:
+            result = aks_runcommand(mock.Mock(), client, 'rg', 'aks', command_string='kubectl get pods',
+                                    no_wait=True)
+
+        # --no-wait discards the returned value, the command ID is only visible in the warning
+        self.assertIsNone(result)
+        message = logger.warning.call_args[0][0] % logger.warning.call_args[0][1:]
+        self.assertIn('az aks command result -g rg -n aks -i 1234abcd', message)
+        client.get_command_result.assert_not_called()
+        client.run_command.assert_not_called()
+
+    def test_aks_run_command_no_wait_completed(self):
+        client = mock.Mock()
+        client.get.return_value.aad_profile = None
+        client._run_command_initial.return_value.output = mock.Mock(id='5678ef')
+
+        with mock.patch('azext_aks_preview.custom.logger') as logger:
+            aks_runcommand(mock.Mock(), client, 'rg', 'aks', command_string='kubectl get pods', no_wait=True)
+
+        message = logger.warning.call_args[0][0] % logger.warning.call_args[0][1:]
+        self.assertIn('az aks command result -g rg -n aks -i 5678ef', message)
+
+    @mock.patch('azext_aks_preview.custom.time.sleep')
+    def test_aks_command_result_wait(self, sleep):
+        client = mock.Mock()
+        running = mock.Mock(provisioning_state='Running')
+        succeeded = mock.Mock(provisioning_state='Succeeded')
+        client.get_command_result.side_effect = [None] + [running] * 6 + [succeeded]
+
+        result = aks_command_result(mock.Mock(), client, 'rg', 'aks', command_id='1234abcd', wait=True)
+
+        self.assertIs(succeeded, result)
+        self.assertEqual([1, 2, 4, 8, 16, 30, 30], [c[0][0] for c in sleep.call_args_list])
+
     @AllowLargeResponse()
     @ResourceGroupPreparer(random_name_length=17, name_prefix='clitest', location='westus2')
     def test_aks_run_command(self, resource_group, resource_group_location):
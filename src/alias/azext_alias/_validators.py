@@ -16,6 +16,7 @@ from azext_alias.util import (
     is_url,
     reduce_alias_table,
     filter_alias_create_namespace,
+    get_reserved_command_index,
     retrieve_file_from_url
 )
 from azext_alias._const import (
@@ -117,9 +118,8 @@ def _validate_alias_command(alias_command):
 
     # Extract possible CLI commands and validate
     command_to_validate = ' '.join(split_command[:boundary_index]).lower()
-    for command in azext_alias.cached_reserved_commands:
-        if re.match(r'([a-z\-]*\s)*{}($|\s)'.format(command_to_validate), command):
-            return
+    if get_reserved_command_index().get_parent_commands(command_to_validate):
+        return
 
     _validate_positional_arguments(shlex.split(alias_command))
 
@@ -4,7 +4,6 @@
 # --------------------------------------------------------------------------------------------
 
 import os
-import re
 import json
 import shlex
 import hashlib
@@ -12,7 +11,6 @@ from collections import defaultdict
 
 from knack.log import get_logger
 
-import azext_alias
 from azext_alias import telemetry
 from azext_alias._const import (
     GLOBAL_CONFIG_DIR,
@@ -29,6 +27,7 @@ from azext_alias.util import (
     is_alias_command,
     cache_reserved_commands,
     get_config_parser,
+    get_reserved_command_index,
     build_tab_completion_table
 )
 
@@ -184,11 +183,12 @@ class AliasManager(object):
 
     def load_full_command_table(self):
         """
-        Perform a full load of the command table to get all the reserved command words.
+        Perform a full load of the command table to get all the reserved command words,
+        unless they have been saved by a previous run of the same CLI and extension versions.
         """
         load_cmd_tbl_func = self.kwargs.get('load_cmd_tbl_func', lambda _: {})
-        cache_reserved_commands(load_cmd_tbl_func)
-        telemetry.set_full_command_table_loaded()
+        if cache_reserved_commands(load_cmd_tbl_func):
+            telemetry.set_full_command_table_loaded()
 
     def post_transform(self, args):
         """
@@ -245,15 +245,14 @@ class AliasManager(object):
         Args:
             levels: the amount of levels we tranverse through the command table tree.
         """
+        reserved_command_index = get_reserved_command_index()
         collided_alias = defaultdict(list)
         for alias in aliases:
             # Only care about the first word in the alias because alias
             # cannot have spaces (unless they have positional arguments)
             word = alias.split()[0]
-            for level in range(1, levels + 1):
-                collision_regex = r'^{}{}($|\s)'.format(r'([a-z\-]*\s)' * (level - 1), word.lower())
-                if list(filter(re.compile(collision_regex).match, azext_alias.cached_reserved_commands)) \
-                        and level not in collided_alias[word]:
+            for level in reserved_command_index.get_collision_levels(word, levels):
+                if level not in collided_alias[word]:
                     collided_alias[word].append(level)
 
         telemetry.set_collided_aliases(list(collided_alias.keys()))
@@ -36,7 +36,9 @@ def alias_event_handler(_, **kwargs):
         # [:] will keep the reference of the original args
         args[:] = alias_manager.transform(args)
 
-        if is_alias_command(['create', 'import'], args):
+        # Commands that rebuild the collision table need the reserved commands, which are usually
+        # read from the snapshot saved by a previous run rather than from the entire command table
+        if is_alias_command(['create', 'import', 'remove'], args):
             load_cmd_tbl_func = kwargs.get('load_cmd_tbl_func', lambda _: {})
             cache_reserved_commands(load_cmd_tbl_func)
 
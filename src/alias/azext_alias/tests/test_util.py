@@ -6,13 +6,16 @@
 # pylint: disable=line-too-long
 
 import os
+import time
 import shutil
 import tempfile
 import unittest
 import mock
 
-from azext_alias.util import remove_pos_arg_placeholders, build_tab_completion_table, get_config_parser
-from azext_alias._const import ALIAS_TAB_COMP_TABLE_FILE_NAME
+import azext_alias
+from azext_alias.util import (remove_pos_arg_placeholders, build_tab_completion_table, get_config_parser,
+                               cache_reserved_commands, ReservedCommandIndex)
+from azext_alias._const import ALIAS_TAB_COMP_TABLE_FILE_NAME, RESERVED_COMMANDS_FILE_NAME
 from azext_alias.tests._const import TEST_RESERVED_COMMANDS
 
 
@@ -22,6 +25,7 @@ class TestUtil(unittest.TestCase):
         self.mock_config_dir = tempfile.mkdtemp()
         self.patchers = []
         self.patchers.append(mock.patch('azext_alias.util.GLOBAL_ALIAS_TAB_COMP_TABLE_PATH', os.path.join(self.mock_config_dir, ALIAS_TAB_COMP_TABLE_FILE_NAME)))
+        self.patchers.append(mock.patch('azext_alias.util.GLOBAL_RESERVED_COMMANDS_PATH', os.path.join(self.mock_config_dir, RESERVED_COMMANDS_FILE_NAME)))
         self.patchers.append(mock.patch('azext_alias.cached_reserved_commands', TEST_RESERVED_COMMANDS))
         for patcher in self.patchers:
             patcher.start()
@@ -61,6 +65,75 @@ class TestUtil(unittest.TestCase):
             'account list-locations': ['']
         }, tab_completion_table)
 
+    def test_reserved_command_index_collision_levels(self):
+        index = ReservedCommandIndex(TEST_RESERVED_COMMANDS)
+        self.assertEqual([1, 2], index.get_collision_levels('account'))
+        self.assertEqual([1, 2], index.get_collision_levels('Account'))
+        self.assertEqual([1], index.get_collision_levels('account', levels=1))
+        self.assertEqual([3], index.get_collision_levels('create'))
+        self.assertEqual([], index.get_collision_levels('acc'))
+
+    def test_reserved_command_index_parent_commands(self):
+        index = ReservedCommandIndex(TEST_RESERVED_COMMANDS + ['network vnet dns'])
+        self.assertEqual(['', 'storage'], index.get_parent_commands('account'))
+        self.assertEqual(['network', 'network vnet'], index.get_parent_commands('dns'))
+        self.assertEqual(['storage'], index.get_parent_commands('account create'))
+        self.assertEqual([], index.get_parent_commands('account delete'))
+        self.assertEqual([], index.get_parent_commands('dn'))
+        self.assertEqual([], index.get_parent_commands(''))
+
+    def test_cache_reserved_commands_from_disk(self):
+        load_cmd_tbl_func = mock.Mock(return_value={command: None for command in TEST_RESERVED_COMMANDS})
+        with mock.patch('azext_alias.cached_reserved_commands', []), \
+                mock.patch('azext_alias.util.get_command_table_version', return_value='v1'):
+            self.assertTrue(cache_reserved_commands(load_cmd_tbl_func))
+        with mock.patch('azext_alias.cached_reserved_commands', []), \
+                mock.patch('azext_alias.util.get_command_table_version', return_value='v1'):
+            self.assertFalse(cache_reserved_commands(load_cmd_tbl_func))
+            self.assertEqual(sorted(TEST_RESERVED_COMMANDS), sorted(azext_alias.cached_reserved_commands))
+        self.assertEqual(1, load_cmd_tbl_func.call_count)
+
+    def test_cache_reserved_commands_version_change(self):
+        load_cmd_tbl_func = mock.Mock(return_value={command: None for command in TEST_RESERVED_COMMANDS})
+        for version in ['v1', 'v2']:
+            with mock.patch('azext_alias.cached_reserved_commands', []), \
+                    mock.patch('azext_alias.util.get_command_table_version', return_value=version):
+                self.assertTrue(cache_reserved_commands(load_cmd_tbl_func))
+        self.assertEqual(2, load_cmd_tbl_func.call_count)
+
+    def test_cache_reserved_commands_ignores_invalid_snapshot(self):
+        with open(os.path.join(self.mock_config_dir, RESERVED_COMMANDS_FILE_NAME), 'w') as f:
+            f.write('{"version": "v1", "commands": ["group delete"]}')
+        load_cmd_tbl_func = mock.Mock(return_value={command: None for command in TEST_RESERVED_COMMANDS})
+        with mock.patch('azext_alias.cached_reserved_commands', []), \
+                mock.patch('azext_alias.util.get_command_table_version', return_value='v1'):
+            self.assertTrue(cache_reserved_commands(load_cmd_tbl_func))
+            self.assertEqual(TEST_RESERVED_COMMANDS, azext_alias.cached_reserved_commands)
+
+    def test_reserved_commands_snapshot_benchmark(self):
+        # Simulate a full command table load that imports 100 command modules of 100 commands each
+        def load_cmd_tbl_func(_):
+            command_table = {}
+            for module_index in range(100):
+                time.sleep(0.002)
+                for command_index in range(100):
+                    command_table['module{} group{} command{}'.format(module_index, command_index % 10, command_index)] = None
+            return command_table
+
+        elapsed = {}
+        for run in ['cold', 'snapshot']:
+            with mock.patch('azext_alias.cached_reserved_commands', []), \
+                    mock.patch('azext_alias.util.get_command_table_version', return_value='v1'):
+                start = time.time()
+                full_load = cache_reserved_commands(load_cmd_tbl_func)
+                elapsed[run] = time.time() - start
+                self.assertEqual(run == 'cold', full_load)
+                self.assertEqual(10000, len(azext_alias.cached_reserved_commands))
+
+        print('\nReserved commands load: {:.1f}ms cold, {:.1f}ms from snapshot'.format(
+            elapsed['cold'] * 1000, elapsed['snapshot'] * 1000))
+        self.assertLess(elapsed['snapshot'] * 5, elapsed['cold'])
+
 
 if __name__ == '__main__':
     unittest.main()
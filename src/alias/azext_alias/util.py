@@ -5,10 +5,12 @@
 
 # pylint: disable=wrong-import-order,import-error,relative-import
 
+import os
 import re
 import sys
 import json
 import shlex
+import hashlib
 from collections import defaultdict
 from six.moves import configparser
 from six.moves.urllib.parse import urlparse
@@ -17,7 +19,72 @@ from six.moves.urllib.request import urlretrieve
 from knack.util import CLIError
 
 import azext_alias
-from azext_alias._const import COLLISION_CHECK_LEVEL_DEPTH, GLOBAL_ALIAS_TAB_COMP_TABLE_PATH, ALIAS_FILE_URL_ERROR
+from azext_alias._const import (
+    COLLISION_CHECK_LEVEL_DEPTH,
+    GLOBAL_ALIAS_TAB_COMP_TABLE_PATH,
+    GLOBAL_RESERVED_COMMANDS_PATH,
+    ALIAS_FILE_URL_ERROR
+)
+
+
+class ReservedCommandIndex(object):
+    """
+    An index of the reserved command words by the level at which they appear in the command tree.
+
+    It answers collision and parent command queries by looking up the words of the query
+    instead of scanning the entire list of reserved commands.
+    """
+
+    def __init__(self, reserved_commands):
+        self.reserved_commands = reserved_commands
+        self.split_commands = [command.split() for command in reserved_commands]
+        # word -> the levels (1-based) at which the word is a reserved command
+        self.word_levels = defaultdict(set)
+        # word -> (index of the reserved command, position of the word in the command), in command order
+        self.word_positions = defaultdict(list)
+        for command_index, words in enumerate(self.split_commands):
+            for position, word in enumerate(words):
+                self.word_levels[word].add(position + 1)
+                self.word_positions[word].append((command_index, position))
+
+    def get_collision_levels(self, word, levels=COLLISION_CHECK_LEVEL_DEPTH):
+        """
+        Get the levels of the command tree at which a word is a reserved command.
+
+        Args:
+            word: The word to look up.
+            levels: The amount of levels to check.
+
+        Returns:
+            A sorted list of the levels at which the word collides with a reserved command.
+        """
+        return sorted(level for level in self.word_levels.get(word.lower(), ()) if level <= levels)
+
+    def get_parent_commands(self, command):
+        """
+        Get the parent commands of a command, i.e. the words preceding it in every reserved command that contains it.
+
+        Args:
+            command: The space-delimited command to look up.
+
+        Returns:
+            A list of parent commands in the order of the reserved commands, '' meaning the command is at the root.
+        """
+        words = command.split()
+        parent_commands = []
+        if not words:
+            return parent_commands
+
+        for command_index, position in self.word_positions.get(words[0], ()):
+            reserved_words = self.split_commands[command_index]
+            if reserved_words[position:position + len(words)] == words:
+                parent_command = ' '.join(reserved_words[:position])
+                if parent_command not in parent_commands:
+                    parent_commands.append(parent_command)
+        return parent_commands
+
+
+_reserved_command_index = ReservedCommandIndex([])
 
 
 def get_config_parser():
@@ -72,11 +139,108 @@ def cache_reserved_commands(load_cmd_tbl_func):
     This cache saves the entire command table globally so custom.py can have access to it.
     Alter this cache through cache_reserved_commands(load_cmd_tbl_func) in util.py.
 
+    The reserved commands are also saved to disk, keyed by the versions of the CLI and the installed extensions,
+    so that the entire command table only needs to be loaded again after one of them changes.
+
     Args:
         load_cmd_tbl_func: The function to load the entire command table.
+
+    Returns:
+        True if the entire command table was loaded.
+    """
+    if azext_alias.cached_reserved_commands:
+        return False
+
+    command_table_version = get_command_table_version()
+    reserved_commands = load_reserved_commands(command_table_version)
+    if reserved_commands:
+        azext_alias.cached_reserved_commands = reserved_commands
+        return False
+
+    azext_alias.cached_reserved_commands = list(load_cmd_tbl_func([]).keys())
+    save_reserved_commands(command_table_version, azext_alias.cached_reserved_commands)
+    return True
+
+
+def get_reserved_command_index():
+    """
+    Get the index of the currently cached reserved commands, rebuilding it if the cache has been replaced.
+
+    Returns:
+        An instance of ReservedCommandIndex.
+    """
+    global _reserved_command_index  # pylint: disable=global-statement
+    if _reserved_command_index.reserved_commands is not azext_alias.cached_reserved_commands:
+        _reserved_command_index = ReservedCommandIndex(azext_alias.cached_reserved_commands)
+    return _reserved_command_index
+
+
+def get_command_table_version():
     """
-    if not azext_alias.cached_reserved_commands:
-        azext_alias.cached_reserved_commands = list(load_cmd_tbl_func([]).keys())
+    Get a key that changes whenever the CLI or any of the installed extensions is upgraded.
+
+    Returns:
+        The SHA1 hash of the CLI and extension versions, or None if they cannot be determined.
+    """
+    try:
+        from azure.cli.core import __version__ as core_version
+        from azure.cli.core.extension import get_extensions
+        versions = [core_version] + sorted('{}=={}'.format(ext.name, ext.version) for ext in get_extensions())
+    except Exception:  # pylint: disable=broad-except
+        return None
+    return hashlib.sha1(json.dumps(versions).encode('utf-8')).hexdigest()
+
+
+def load_reserved_commands(command_table_version):
+    """
+    Load the reserved commands snapshot saved by a previous run.
+
+    The snapshot is a plain text file with the version key on the first line and one reserved command per line
+    after it, which is both smaller and faster to read than the serialized command table.
+
+    Args:
+        command_table_version: The version key that the snapshot must match.
+
+    Returns:
+        The list of reserved commands, or None if there is no valid snapshot for this version.
+    """
+    if not command_table_version or not os.path.exists(GLOBAL_RESERVED_COMMANDS_PATH):
+        return None
+
+    try:
+        with open(GLOBAL_RESERVED_COMMANDS_PATH, 'r') as f:
+            snapshot_version = f.readline().rstrip('\n')
+            if snapshot_version != command_table_version:
+                return None
+            reserved_commands = f.read().splitlines()
+    except (IOError, OSError, UnicodeDecodeError):
+        return None
+
+    return reserved_commands or None
+
+
+def save_reserved_commands(command_table_version, reserved_commands):
+    """
+    Save a snapshot of the reserved commands so later runs can skip loading the entire command table.
+    The snapshot is written to a temporary file first so that concurrent runs never read a partial snapshot.
+
+    Args:
+        command_table_version: The version key of the reserved commands.
+        reserved_commands: The list of reserved commands.
+    """
+    if not command_table_version or not reserved_commands:
+        return
+
+    temp_path = '{}.{}.tmp'.format(GLOBAL_RESERVED_COMMANDS_PATH, os.getpid())
+    try:
+        with open(temp_path, 'w') as f:
+            f.write(command_table_version + '\n')
+            f.write('\n'.join(reserved_commands))
+        # os.replace is not available in Python 2
+        getattr(os, 'replace', os.rename)(temp_path, GLOBAL_RESERVED_COMMANDS_PATH)
+    except (IOError, OSError):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 
 def remove_pos_arg_placeholders(alias_command):
@@ -134,20 +298,12 @@ def build_tab_completion_table(alias_table):
     Returns:
         The tab completion table.
     """
-    alias_commands = [t[1] for t in filter_aliases(alias_table)]
+    reserved_command_index = get_reserved_command_index()
     tab_completion_table = defaultdict(list)
-    for alias_command in alias_commands:
-        for reserved_command in azext_alias.cached_reserved_commands:
-            # Check if alias_command has no parent command
-            if reserved_command == alias_command or reserved_command.startswith(alias_command + ' ') \
-                    and '' not in tab_completion_table[alias_command]:
-                tab_completion_table[alias_command].append('')
-            elif ' {} '.format(alias_command) in reserved_command or reserved_command.endswith(' ' + alias_command):
-                # Extract parent commands
-                index = reserved_command.index(alias_command)
-                parent_command = reserved_command[:index - 1]
-                if parent_command not in tab_completion_table[alias_command]:
-                    tab_completion_table[alias_command].append(parent_command)
+    for _, alias_command in filter_aliases(alias_table):
+        for parent_command in reserved_command_index.get_parent_commands(alias_command):
+            if parent_command not in tab_completion_table[alias_command]:
+                tab_completion_table[alias_command].append(parent_command)
 
     with open(GLOBAL_ALIAS_TAB_COMP_TABLE_PATH, 'w') as f:
         f.write(json.dumps(tab_completion_table))
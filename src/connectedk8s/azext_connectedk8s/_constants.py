@@ -107,8 +107,14 @@ CLIENT_PROXY_PORT = 47010
 CLIENTPROXY_CLIENT_ID = '04b07795-8ddb-461a-bbee-02f9e1bf7b46'
 API_CALL_RETRIES = 200
 DEFAULT_REQUEST_TIMEOUT = 10  # seconds
+NODE_LIST_PAGE_SIZE = 100
+HELM_CHART_CACHE_MAX_CHARTS = 5
+HELM_CHART_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # seconds
+NAMESPACE_CLEANUP_TIMEOUT = 180  # seconds
+KUBERNETES_POLL_INTERVAL = 5  # seconds
 RELEASE_DATE_WINDOWS = 'release12-03-21'
 RELEASE_DATE_LINUX = 'release12-03-21'
 CSP_REFRESH_TIME = 300
+CSP_MIN_REFRESH_INTERVAL = 60  # seconds
 # URL constants
 CSP_Storage_Url = "https://k8sconnectcsp.blob.core.windows.net"
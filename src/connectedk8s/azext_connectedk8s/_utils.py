@@ -10,6 +10,8 @@ from subprocess import Popen, PIPE
 import time
 import requests
 import json
+import hashlib
+import tempfile
 
 from knack.util import CLIError
 from knack.log import get_logger
@@ -22,7 +24,7 @@ from msrestazure.azure_exceptions import CloudError
 from kubernetes.client.rest import ApiException
 from azext_connectedk8s._client_factory import _resource_client_factory
 import azext_connectedk8s._constants as consts
-from kubernetes import client as kube_client
+from kubernetes import client as kube_client, watch
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
@@ -70,23 +72,144 @@ def validate_location(cmd, location):
 
 
 def get_chart_path(registry_path, kube_config, kube_context):
-    # Pulling helm chart from registry
-    os.environ['HELM_EXPERIMENTAL_OCI'] = '1'
-    pull_helm_chart(registry_path, kube_config, kube_context)
-
-    # Exporting helm chart after cleanup
-    chart_export_path = os.path.join(os.path.expanduser('~'), '.azure', 'AzureArcCharts')
+    chart_path = os.getenv('HELMCHART')
+    if chart_path:
+        return chart_path
+
+    # Reusing the chart exported earlier from the same registry path, which includes the chart version
+    chart_cache = HelmChartCache(os.path.join(os.path.expanduser('~'), '.azure', 'AzureArcCharts'))
+    chart_export_path = chart_cache.get(registry_path)
+    if chart_export_path is None:
+        # Pulling helm chart from registry
+        os.environ['HELM_EXPERIMENTAL_OCI'] = '1'
+        pull_helm_chart(registry_path, kube_config, kube_context)
+
+        # Exporting helm chart into the cache
+        chart_export_path = chart_cache.add(registry_path, lambda destination: export_helm_chart(registry_path, destination, kube_config, kube_context))
     try:
-        if os.path.isdir(chart_export_path):
-            shutil.rmtree(chart_export_path)
+        chart_cache.evict()
     except:
-        logger.warning("Unable to cleanup the azure-arc helm charts already present on the machine. In case of failure, please cleanup the directory '%s' and try again.", chart_export_path)
-    export_helm_chart(registry_path, chart_export_path, kube_config, kube_context)
+        logger.warning("Unable to cleanup the azure-arc helm charts already present on the machine. In case of failure, please cleanup the directory '%s' and try again.", chart_cache.cache_dir)
 
     # Returning helm chart path
-    helm_chart_path = os.path.join(chart_export_path, 'azure-arc-k8sagents')
-    chart_path = os.getenv('HELMCHART') if os.getenv('HELMCHART') else helm_chart_path
-    return chart_path
+    return os.path.join(chart_export_path, 'azure-arc-k8sagents')
+
+
+class HelmChartCache:
+    """
+    Helm charts exported from the registry, stored under a hash of their registry path. A cached chart is reused
+    as long as its files still match the digest recorded when it was exported.
+    """
+
+    manifest_name = 'manifest.json'
+    export_name = 'chart'
+    temp_prefix = '.tmp-'
+    temp_max_age = 60 * 60  # seconds
+
+    def __init__(self, cache_dir, max_charts=consts.HELM_CHART_CACHE_MAX_CHARTS, max_age=consts.HELM_CHART_CACHE_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_charts = max_charts
+        self.max_age = max_age
+
+    def _get_entry_dir(self, registry_path):
+        return os.path.join(self.cache_dir, hashlib.sha256(registry_path.encode('utf-8')).hexdigest())
+
+    def _read_manifest(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, self.manifest_name), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, registry_path):
+        """Returns the path the cached chart was exported to, or None if it is not cached or was modified."""
+        entry_dir = self._get_entry_dir(registry_path)
+        manifest = self._read_manifest(entry_dir)
+        if not manifest or manifest.get('registryPath') != registry_path:
+            return None
+        export_path = os.path.join(entry_dir, self.export_name)
+        if get_directory_digest(export_path) != manifest.get('digest'):
+            logger.debug("The cached helm chart '%s' does not match its digest and will be pulled again.", registry_path)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        try:
+            # The modification time of the manifest records when the chart was last used
+            os.utime(os.path.join(entry_dir, self.manifest_name), None)
+        except OSError:
+            pass
+        return export_path
+
+    def add(self, registry_path, export):
+        """Exports a chart into the cache with the export function, and returns the path it was exported to."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(prefix=self.temp_prefix, dir=self.cache_dir)
+        try:
+            export(os.path.join(temp_dir, self.export_name))
+            manifest = {
+                'registryPath': registry_path,
+                'digest': get_directory_digest(os.path.join(temp_dir, self.export_name))
+            }
+            with open(os.path.join(temp_dir, self.manifest_name), 'w') as f:
+                json.dump(manifest, f)
+
+            # Another command may have cached the same chart in the meantime
+            export_path = self.get(registry_path)
+            if export_path is not None:
+                return export_path
+            entry_dir = self._get_entry_dir(registry_path)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.rename(temp_dir, entry_dir)
+            except OSError:
+                export_path = self.get(registry_path)
+                if export_path is None:
+                    raise
+                return export_path
+            return os.path.join(entry_dir, self.export_name)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def evict(self):
+        """Removes the charts not used for the longest, beyond the maximum number of charts or age."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(self.temp_prefix):
+                # Exports still in progress are left alone
+                if now - os.path.getmtime(path) > self.temp_max_age:
+                    shutil.rmtree(path, ignore_errors=True)
+                continue
+            manifest_path = os.path.join(path, self.manifest_name)
+            if os.path.isfile(manifest_path):
+                entries.append((os.path.getmtime(manifest_path), path))
+            elif os.path.isdir(path):
+                # Charts exported by earlier versions
+                shutil.rmtree(path)
+
+        entries.sort(reverse=True)
+        for index, (last_used, path) in enumerate(entries):
+            if index >= self.max_charts or now - last_used > self.max_age:
+                shutil.rmtree(path)
+
+
+def get_directory_digest(path):
+    """Returns the SHA-256 digest of the names and contents of the files in a directory, or None if there is none."""
+    if not os.path.isdir(path):
+        return None
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).replace(os.sep, '/').encode('utf-8') + b'\0')
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):  # pylint: disable=cell-var-from-loop
+                    digest.update(chunk)
+            digest.update(b'\0')
+    return digest.hexdigest()
 
 
 def pull_helm_chart(registry_path, kube_config, kube_context):
@@ -221,6 +344,74 @@ def kubernetes_exception_handler(ex, fault_type, summary, error_message='Error o
             raise CLIError(error_message + "\nError: " + str(ex))
 
 
+class ClusterFacts:
+    """
+    Facts about the kubernetes cluster read through one API client and at most once per command. The nodes are
+    listed in pages, and only until a linux/amd64 node is found since the other facts come from the first node.
+    """
+
+    def __init__(self, configuration, node_page_size=consts.NODE_LIST_PAGE_SIZE):
+        self.api_client = kube_client.ApiClient(configuration)
+        self.node_page_size = node_page_size
+        self._nodes_listed = False
+        self._node_error = None
+        self._first_node = None
+        self._has_linux_amd64_node = False
+        self._server_version = None
+        self._server_version_error = None
+
+    def _list_nodes(self):
+        if self._nodes_listed:
+            return
+        self._nodes_listed = True
+        api_instance = kube_client.CoreV1Api(self.api_client)
+        try:
+            continue_token = None
+            while True:
+                if continue_token:
+                    api_response = api_instance.list_node(limit=self.node_page_size, _continue=continue_token)
+                else:
+                    api_response = api_instance.list_node(limit=self.node_page_size)
+                if self._first_node is None and api_response.items:
+                    self._first_node = api_response.items[0]
+                if any(is_linux_amd64_node(node) for node in api_response.items):
+                    self._has_linux_amd64_node = True
+                    return
+                continue_token = api_response.metadata._continue  # pylint: disable=protected-access
+                if not continue_token:
+                    return
+        except Exception as e:  # pylint: disable=broad-except
+            self._node_error = e
+
+    def get_first_node(self):
+        """Returns the first node of the cluster, or None if it has no nodes."""
+        self._list_nodes()
+        if self._first_node is None and self._node_error is not None:
+            raise self._node_error
+        return self._first_node
+
+    def has_linux_amd64_node(self):
+        self._list_nodes()
+        if not self._has_linux_amd64_node and self._node_error is not None:
+            raise self._node_error
+        return self._has_linux_amd64_node
+
+    def get_server_version(self):
+        if self._server_version is None and self._server_version_error is None:
+            try:
+                self._server_version = kube_client.VersionApi(self.api_client).get_code().git_version
+            except Exception as e:  # pylint: disable=broad-except
+                self._server_version_error = e
+        if self._server_version_error is not None:
+            raise self._server_version_error
+        return self._server_version
+
+
+def is_linux_amd64_node(node):
+    labels = node.metadata.labels or {}
+    return labels.get("kubernetes.io/arch") == "amd64" and labels.get("kubernetes.io/os") == "linux"
+
+
 def validate_infrastructure_type(infra):
     for s in consts.Infrastructure_Enum_Values[1:]:  # First value is "auto"
         if s.lower() == infra.lower():
@@ -245,21 +436,64 @@ def get_values_file():
 
 def ensure_namespace_cleanup(configuration):
     api_instance = kube_client.CoreV1Api(kube_client.ApiClient(configuration))
-    timeout = time.time() + 180
-    while True:
-        if time.time() > timeout:
-            telemetry.set_user_fault()
-            logger.warning("Namespace 'azure-arc' still in terminating state. Please ensure that you delete the 'azure-arc' namespace before onboarding the cluster again.")
-            return
+    deadline = time.time() + consts.NAMESPACE_CLEANUP_TIMEOUT
+    while time.time() < deadline:
         try:
-            api_response = api_instance.list_namespace(field_selector='metadata.name=azure-arc')
-            if not api_response.items:
+            if wait_for_kubernetes_objects(api_instance.list_namespace, lambda namespaces: not namespaces, deadline - time.time(),
+                                           field_selector='metadata.name=azure-arc'):
                 return
-            time.sleep(5)
         except Exception as e:  # pylint: disable=broad-except
             logger.warning("Error while retrieving namespace information.")
             kubernetes_exception_handler(e, consts.Get_Kubernetes_Namespace_Fault_Type, 'Unable to fetch kubernetes namespace',
                                          raise_error=False)
+            time.sleep(min(consts.KUBERNETES_POLL_INTERVAL, max(0, deadline - time.time())))
+    telemetry.set_user_fault()
+    logger.warning("Namespace 'azure-arc' still in terminating state. Please ensure that you delete the 'azure-arc' namespace before onboarding the cluster again.")
+
+
+def wait_for_kubernetes_objects(list_func, condition, timeout, poll_interval=consts.KUBERNETES_POLL_INTERVAL, **list_kwargs):
+    """
+    Waits until the condition holds for the objects listed by list_func, and returns whether it did before the timeout.
+    The changes to the objects are watched from the resourceVersion they were listed at, and they are listed again
+    every poll_interval when the watch is not available.
+    """
+    deadline = time.time() + timeout
+    use_watch = True
+    while True:
+        api_response = list_func(**list_kwargs)
+        objects = {item.metadata.uid: item for item in api_response.items}
+        if condition(list(objects.values())):
+            return True
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+
+        if use_watch:
+            try:
+                watcher = watch.Watch()
+                for event in watcher.stream(list_func, resource_version=api_response.metadata.resource_version,
+                                            timeout_seconds=max(1, int(remaining)), **list_kwargs):
+                    if event['type'] == 'ERROR':
+                        # The resourceVersion is too old to watch from, so the objects are listed again
+                        break
+                    if event['type'] == 'DELETED':
+                        objects.pop(event['object'].metadata.uid, None)
+                    else:
+                        objects[event['object'].metadata.uid] = event['object']
+                    if condition(list(objects.values())):
+                        watcher.stop()
+                        return True
+                    if time.time() >= deadline:
+                        break
+                watcher.stop()
+                continue
+            except Exception as e:  # pylint: disable=broad-except
+                logger.debug("Unable to watch the kubernetes objects, listing them periodically instead: %s", str(e))
+                use_watch = False
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+        time.sleep(min(poll_interval, remaining))
 
 
 def delete_arc_agents(release_namespace, kube_config, kube_context, configuration):
@@ -9,7 +9,7 @@ import os
 import json
 import tempfile
 import time
-from subprocess import Popen, PIPE, run, STDOUT, call, DEVNULL
+from subprocess import Popen, PIPE, run, STDOUT, call, DEVNULL, TimeoutExpired
 from base64 import b64encode, b64decode
 import stat
 import platform
@@ -110,7 +110,9 @@ def create_connectedk8s(cmd, client, resource_group_name, cluster_name, https_pr
     # if the user had not logged in.
     check_kube_connection(configuration)
 
-    required_node_exists = check_linux_amd64_node(configuration)
+    cluster_facts = utils.ClusterFacts(configuration)
+
+    required_node_exists = check_linux_amd64_node(cluster_facts)
     if not required_node_exists:
         telemetry.set_user_fault()
         telemetry.set_exception(exception="Couldn't find any node on the kubernetes cluster with the architecture type 'amd64' and OS 'linux'", fault_type=consts.Linux_Amd64_Node_Not_Exists,
@@ -118,14 +120,14 @@ def create_connectedk8s(cmd, client, resource_group_name, cluster_name, https_pr
         logger.warning("Please ensure that this Kubernetes cluster have any nodes with OS 'linux' and architecture 'amd64', for scheduling the Arc-Agents onto and connecting to Azure. Learn more at {}".format("https://aka.ms/ArcK8sSupportedOSArchitecture"))
 
     # Get kubernetes cluster info
-    kubernetes_version = get_server_version(configuration)
+    kubernetes_version = get_server_version(cluster_facts)
 
     if distribution == 'auto':
-        kubernetes_distro = get_kubernetes_distro(configuration)  # (cluster heuristics)
+        kubernetes_distro = get_kubernetes_distro(cluster_facts)  # (cluster heuristics)
     else:
         kubernetes_distro = distribution
     if infrastructure == 'auto':
-        kubernetes_infra = get_kubernetes_infra(configuration)  # (cluster heuristics)
+        kubernetes_infra = get_kubernetes_infra(cluster_facts)  # (cluster heuristics)
     else:
         kubernetes_infra = infrastructure
 
@@ -161,7 +163,7 @@ def create_connectedk8s(cmd, client, resource_group_name, cluster_name, https_pr
     release_namespace = get_release_namespace(kube_config, kube_context)
     if release_namespace:
         # Loading config map
-        api_instance = kube_client.CoreV1Api(kube_client.ApiClient(configuration))
+        api_instance = kube_client.CoreV1Api(cluster_facts.api_client)
         try:
             configmap = api_instance.read_namespaced_config_map('azure-clusterconfig', 'azure-arc')
         except Exception as e:  # pylint: disable=broad-except
@@ -434,25 +436,22 @@ def get_private_key(key_pair):
     return PEM.encode(privKey_DER, "RSA PRIVATE KEY")
 
 
-def get_server_version(configuration):
-    api_instance = kube_client.VersionApi(kube_client.ApiClient(configuration))
+def get_server_version(cluster_facts):
     try:
-        api_response = api_instance.get_code()
-        return api_response.git_version
+        return cluster_facts.get_server_version()
     except Exception as e:  # pylint: disable=broad-except
         logger.warning("Unable to fetch kubernetes version.")
         utils.kubernetes_exception_handler(e, consts.Get_Kubernetes_Version_Fault_Type, 'Unable to fetch kubernetes version',
                                            raise_error=False)
 
 
-def get_kubernetes_distro(configuration):  # Heuristic
-    api_instance = kube_client.CoreV1Api(kube_client.ApiClient(configuration))
+def get_kubernetes_distro(cluster_facts):  # Heuristic
     try:
-        api_response = api_instance.list_node()
-        if api_response.items:
-            labels = api_response.items[0].metadata.labels
-            provider_id = str(api_response.items[0].spec.provider_id)
-            annotations = list(api_response.items)[0].metadata.annotations
+        node = cluster_facts.get_first_node()
+        if node:
+            labels = node.metadata.labels
+            provider_id = str(node.spec.provider_id)
+            annotations = node.metadata.annotations
             if labels.get("node.openshift.io/os_id"):
                 return "openshift"
             if labels.get("kubernetes.azure.com/node-image-version"):
@@ -479,12 +478,11 @@ def get_kubernetes_distro(configuration):  # Heuristic
         return "generic"
 
 
-def get_kubernetes_infra(configuration):  # Heuristic
-    api_instance = kube_client.CoreV1Api(kube_client.ApiClient(configuration))
+def get_kubernetes_infra(cluster_facts):  # Heuristic
     try:
-        api_response = api_instance.list_node()
-        if api_response.items:
-            provider_id = str(api_response.items[0].spec.provider_id)
+        node = cluster_facts.get_first_node()
+        if node:
+            provider_id = str(node.spec.provider_id)
             infra = provider_id.split(':')[0]
             if infra == "k3s" or infra == "kind":
                 return "generic"
@@ -505,15 +503,9 @@ def get_kubernetes_infra(configuration):  # Heuristic
         return "generic"
 
 
-def check_linux_amd64_node(configuration):
-    api_instance = kube_client.CoreV1Api(kube_client.ApiClient(configuration))
+def check_linux_amd64_node(cluster_facts):
     try:
-        api_response = api_instance.list_node()
-        for item in api_response.items:
-            node_arch = item.metadata.labels.get("kubernetes.io/arch")
-            node_os = item.metadata.labels.get("kubernetes.io/os")
-            if node_arch == "amd64" and node_os == "linux":
-                return True
+        return cluster_facts.has_linux_amd64_node()
     except Exception as e:  # pylint: disable=broad-except
         logger.warning("Error occured while trying to find a linux/amd64 node.")
         utils.kubernetes_exception_handler(e, consts.Kubernetes_Node_Type_Fetch_Fault, 'Unable to find a linux/amd64 node',
@@ -787,8 +779,10 @@ def update_agents(cmd, client, resource_group_name, cluster_name, https_proxy=""
     # if the user had not logged in.
     check_kube_connection(configuration)
 
+    cluster_facts = utils.ClusterFacts(configuration)
+
     # Get kubernetes cluster info for telemetry
-    kubernetes_version = get_server_version(configuration)
+    kubernetes_version = get_server_version(cluster_facts)
 
     # Checking helm installation
     check_helm_install(kube_config, kube_context)
@@ -817,12 +811,12 @@ def update_agents(cmd, client, resource_group_name, cluster_name, https_proxy=""
     if hasattr(connected_cluster, 'distribution') and (connected_cluster.distribution is not None):
         kubernetes_distro = connected_cluster.distribution
     else:
-        kubernetes_distro = get_kubernetes_distro(configuration)
+        kubernetes_distro = get_kubernetes_distro(cluster_facts)
 
     if hasattr(connected_cluster, 'infrastructure') and (connected_cluster.infrastructure is not None):
         kubernetes_infra = connected_cluster.infrastructure
     else:
-        kubernetes_infra = get_kubernetes_infra(configuration)
+        kubernetes_infra = get_kubernetes_infra(cluster_facts)
 
     kubernetes_properties = {
         'Context.Default.AzureCLI.KubernetesVersion': kubernetes_version,
@@ -917,8 +911,10 @@ def upgrade_agents(cmd, client, resource_group_name, cluster_name, kube_config=N
     # if the user had not logged in.
     check_kube_connection(configuration)
 
+    cluster_facts = utils.ClusterFacts(configuration)
+
     # Get kubernetes cluster info for telemetry
-    kubernetes_version = get_server_version(configuration)
+    kubernetes_version = get_server_version(cluster_facts)
 
     # Checking helm installation
     check_helm_install(kube_config, kube_context)
@@ -936,7 +932,7 @@ def upgrade_agents(cmd, client, resource_group_name, cluster_name, kube_config=N
     release_namespace = get_release_namespace(kube_config, kube_context)
     if release_namespace:
         # Loading config map
-        api_instance = kube_client.CoreV1Api(kube_client.ApiClient(configuration))
+        api_instance = kube_client.CoreV1Api(cluster_facts.api_client)
         try:
             configmap = api_instance.read_namespaced_config_map('azure-clusterconfig', 'azure-arc')
         except Exception as e:  # pylint: disable=broad-except
@@ -982,12 +978,12 @@ def upgrade_agents(cmd, client, resource_group_name, cluster_name, kube_config=N
     if hasattr(connected_cluster, 'distribution') and (connected_cluster.distribution is not None):
         kubernetes_distro = connected_cluster.distribution
     else:
-        kubernetes_distro = get_kubernetes_distro(configuration)
+        kubernetes_distro = get_kubernetes_distro(cluster_facts)
 
     if hasattr(connected_cluster, 'infrastructure') and (connected_cluster.infrastructure is not None):
         kubernetes_infra = connected_cluster.infrastructure
     else:
-        kubernetes_infra = get_kubernetes_infra(configuration)
+        kubernetes_infra = get_kubernetes_infra(cluster_facts)
 
     kubernetes_properties = {
         'Context.Default.AzureCLI.KubernetesVersion': kubernetes_version,
@@ -1205,8 +1201,10 @@ def enable_features(cmd, client, resource_group_name, cluster_name, features, ku
     # if the user had not logged in.
     check_kube_connection(configuration)
 
+    cluster_facts = utils.ClusterFacts(configuration)
+
     # Get kubernetes cluster info for telemetry
-    kubernetes_version = get_server_version(configuration)
+    kubernetes_version = get_server_version(cluster_facts)
 
     # Checking helm installation
     check_helm_install(kube_config, kube_context)
@@ -1228,12 +1226,12 @@ def enable_features(cmd, client, resource_group_name, cluster_name, features, ku
     if hasattr(connected_cluster, 'distribution') and (connected_cluster.distribution is not None):
         kubernetes_distro = connected_cluster.distribution
     else:
-        kubernetes_distro = get_kubernetes_distro(configuration)
+        kubernetes_distro = get_kubernetes_distro(cluster_facts)
 
     if hasattr(connected_cluster, 'infrastructure') and (connected_cluster.infrastructure is not None):
         kubernetes_infra = connected_cluster.infrastructure
     else:
-        kubernetes_infra = get_kubernetes_infra(configuration)
+        kubernetes_infra = get_kubernetes_infra(cluster_facts)
 
     kubernetes_properties = {
         'Context.Default.AzureCLI.KubernetesVersion': kubernetes_version,
@@ -1332,8 +1330,10 @@ def disable_features(cmd, client, resource_group_name, cluster_name, features, k
     # if the user had not logged in.
     check_kube_connection(configuration)
 
+    cluster_facts = utils.ClusterFacts(configuration)
+
     # Get kubernetes cluster info for telemetry
-    kubernetes_version = get_server_version(configuration)
+    kubernetes_version = get_server_version(cluster_facts)
 
     # Checking helm installation
     check_helm_install(kube_config, kube_context)
@@ -1355,12 +1355,12 @@ def disable_features(cmd, client, resource_group_name, cluster_name, features, k
     if hasattr(connected_cluster, 'distribution') and (connected_cluster.distribution is not None):
         kubernetes_distro = connected_cluster.distribution
     else:
-        kubernetes_distro = get_kubernetes_distro(configuration)
+        kubernetes_distro = get_kubernetes_distro(cluster_facts)
 
     if hasattr(connected_cluster, 'infrastructure') and (connected_cluster.infrastructure is not None):
         kubernetes_infra = connected_cluster.infrastructure
     else:
-        kubernetes_infra = get_kubernetes_infra(configuration)
+        kubernetes_infra = get_kubernetes_infra(cluster_facts)
 
     kubernetes_properties = {
         'Context.Default.AzureCLI.KubernetesVersion': kubernetes_version,
@@ -1827,19 +1827,25 @@ def client_side_proxy_main(cmd,
                            context_name=None,
                            clientproxy_process=None):
     expiry, clientproxy_process = client_side_proxy(cmd, client, resource_group_name, cluster_name, 0, args, client_proxy_port, api_server_port, operating_system, creds, user_type, debug_mode, token=token, path=path, context_name=context_name, clientproxy_process=None)
-    next_refresh_time = expiry - consts.CSP_REFRESH_TIME
+    next_refresh_time = get_next_refresh_time(expiry)
 
     while(True):
-        time.sleep(60)
-        if(check_if_csp_is_running(clientproxy_process)):
-            if time.time() >= next_refresh_time:
-                expiry, clientproxy_process = client_side_proxy(cmd, client, resource_group_name, cluster_name, 1, args, client_proxy_port, api_server_port, operating_system, creds, user_type, debug_mode, token=token, path=path, context_name=context_name, clientproxy_process=clientproxy_process)
-                next_refresh_time = expiry - consts.CSP_REFRESH_TIME
-        else:
-            telemetry.set_user_fault()
-            telemetry.set_exception(exception='Process closed externally.', fault_type=consts.Proxy_Closed_Externally_Fault_Type,
-                                    summary='Process closed externally.')
-            raise CLIError('Proxy closed externally.')
+        # Waking up as soon as the proxy exits, or when its credentials have to be refreshed
+        try:
+            clientproxy_process.wait(timeout=max(0, next_refresh_time - time.time()))
+        except TimeoutExpired:
+            expiry, clientproxy_process = client_side_proxy(cmd, client, resource_group_name, cluster_name, 1, args, client_proxy_port, api_server_port, operating_system, creds, user_type, debug_mode, token=token, path=path, context_name=context_name, clientproxy_process=clientproxy_process)
+            next_refresh_time = get_next_refresh_time(expiry)
+            continue
+        telemetry.set_user_fault()
+        telemetry.set_exception(exception='Process closed externally.', fault_type=consts.Proxy_Closed_Externally_Fault_Type,
+                                summary='Process closed externally.')
+        raise CLIError('Proxy closed externally.')
+
+
+def get_next_refresh_time(expiry):
+    # Refreshing shortly before the credentials expire, but not more often than every CSP_MIN_REFRESH_INTERVAL seconds
+    return max(expiry - consts.CSP_REFRESH_TIME, time.time() + consts.CSP_MIN_REFRESH_INTERVAL)
 
 
 def client_side_proxy(cmd,
@@ -2045,10 +2051,3 @@ def check_if_port_is_open(port):
 def close_subprocess_and_raise_cli_error(proc_subprocess, msg):
     proc_subprocess.terminate()
     raise CLIError(msg)
-
-
-def check_if_csp_is_running(clientproxy_process):
-    if clientproxy_process.poll() is None:
-        return True
-    else:
-        return False
@@ -0,0 +1,149 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import threading
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from kubernetes import client as kube_client
+from kubernetes.client.rest import ApiException
+
+from azext_connectedk8s._utils import ClusterFacts
+
+VERSION_INFO = {
+    'major': '1', 'minor': '20', 'gitVersion': 'v1.20.2', 'gitCommit': 'faecb196815e248d3ecfb03c680a4507229c2a56',
+    'gitTreeState': 'clean', 'buildDate': '2021-01-13T13:20:00Z', 'goVersion': 'go1.15.5', 'compiler': 'gc',
+    'platform': 'linux/amd64'
+}
+
+
+def _node(index, arch='amd64'):
+    return {
+        'metadata': {
+            'name': 'node-{}'.format(index),
+            'labels': {
+                'kubernetes.io/arch': arch,
+                'kubernetes.io/os': 'linux',
+                'kubernetes.azure.com/node-image-version': 'AKSUbuntu-1804gen2containerd-2021.05.19'
+            },
+            'annotations': {}
+        },
+        'spec': {'providerID': 'azure:///subscriptions/sub/resourceGroups/rg/virtualMachines/node-{}'.format(index)}
+    }
+
+
+class FakeApiServer(HTTPServer):
+    """A kubernetes API server serving a node list in pages, which counts the requests it receives."""
+
+    def __init__(self, nodes, node_status=200):
+        super().__init__(('127.0.0.1', 0), FakeApiRequestHandler)
+        self.nodes = nodes
+        self.node_status = node_status
+        self.requests = Counter()
+        self.page_sizes = []
+
+    @property
+    def host(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+
+class FakeApiRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        url = urlparse(self.path)
+        path = url.path.rstrip('/')
+        query = parse_qs(url.query)
+        self.server.requests[path] += 1
+        if path == '/version':
+            self._reply(200, VERSION_INFO)
+        elif path == '/api/v1/nodes' and self.server.node_status != 200:
+            self._reply(self.server.node_status, {'kind': 'Status', 'code': self.server.node_status})
+        elif path == '/api/v1/nodes':
+            limit = int(query['limit'][0]) if 'limit' in query else len(self.server.nodes)
+            start = int(query['continue'][0]) if 'continue' in query else 0
+            self.server.page_sizes.append(limit)
+            end = start + limit
+            metadata = {'continue': str(end)} if end < len(self.server.nodes) else {}
+            self._reply(200, {'kind': 'NodeList', 'metadata': metadata, 'items': self.server.nodes[start:end]})
+        else:
+            self._reply(404, {'kind': 'Status', 'code': 404})
+
+    def _reply(self, status, body):
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class ClusterFactsTest(unittest.TestCase):
+
+    def _serve(self, nodes, node_status=200):
+        server = FakeApiServer(nodes, node_status)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        configuration = kube_client.Configuration()
+        configuration.host = server.host
+        return server, ClusterFacts(configuration)
+
+    def test_cluster_facts_from_one_node_page(self):
+        server, cluster_facts = self._serve([_node(i) for i in range(2000)])
+
+        self.assertTrue(cluster_facts.has_linux_amd64_node())
+        self.assertEqual('node-0', cluster_facts.get_first_node().metadata.name)
+        self.assertEqual('node-0', cluster_facts.get_first_node().metadata.name)
+        self.assertEqual('v1.20.2', cluster_facts.get_server_version())
+        self.assertEqual('v1.20.2', cluster_facts.get_server_version())
+
+        self.assertEqual({'/api/v1/nodes': 1, '/version': 1}, server.requests)
+        self.assertEqual([100], server.page_sizes)
+
+    def test_cluster_facts_pages_until_linux_amd64_node(self):
+        nodes = [_node(i, arch='arm64') for i in range(250)] + [_node(250)] + [_node(i) for i in range(251, 2000)]
+        server, cluster_facts = self._serve(nodes)
+
+        self.assertTrue(cluster_facts.has_linux_amd64_node())
+        self.assertEqual('node-0', cluster_facts.get_first_node().metadata.name)
+        self.assertEqual(3, server.requests['/api/v1/nodes'])
+
+    def test_cluster_facts_without_linux_amd64_node(self):
+        server, cluster_facts = self._serve([_node(i, arch='arm64') for i in range(2000)])
+
+        self.assertFalse(cluster_facts.has_linux_amd64_node())
+        self.assertFalse(cluster_facts.has_linux_amd64_node())
+        self.assertEqual('node-0', cluster_facts.get_first_node().metadata.name)
+        self.assertEqual(20, server.requests['/api/v1/nodes'])
+
+    def test_cluster_facts_without_nodes(self):
+        server, cluster_facts = self._serve([])
+
+        self.assertFalse(cluster_facts.has_linux_amd64_node())
+        self.assertIsNone(cluster_facts.get_first_node())
+        self.assertEqual(1, server.requests['/api/v1/nodes'])
+
+    def test_cluster_facts_node_list_error(self):
+        server, cluster_facts = self._serve([_node(0)], node_status=403)
+
+        with self.assertRaises(ApiException) as context:
+            cluster_facts.has_linux_amd64_node()
+        self.assertEqual(403, context.exception.status)
+        with self.assertRaises(ApiException):
+            cluster_facts.get_first_node()
+        self.assertEqual(1, server.requests['/api/v1/nodes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from azext_connectedk8s._utils import HelmChartCache, get_chart_path
+
+REGISTRY_PATH = 'mcr.microsoft.com/azurearck8s/batch1/stable/azure-arc-k8sagents:1.1.0'
+
+
+def _export_chart(destination, version='1.1.0'):
+    chart_dir = os.path.join(destination, 'azure-arc-k8sagents')
+    os.makedirs(os.path.join(chart_dir, 'templates'))
+    with open(os.path.join(chart_dir, 'Chart.yaml'), 'w') as f:
+        f.write('name: azure-arc-k8sagents\nversion: {}\n'.format(version))
+    with open(os.path.join(chart_dir, 'templates', 'deployment.yaml'), 'w') as f:
+        f.write('kind: Deployment\n')
+
+
+class HelmChartCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+
+    def test_chart_is_reused(self):
+        chart_cache = HelmChartCache(self.cache_dir)
+        self.assertIsNone(chart_cache.get(REGISTRY_PATH))
+
+        export_path = chart_cache.add(REGISTRY_PATH, _export_chart)
+        self.assertTrue(os.path.isfile(os.path.join(export_path, 'azure-arc-k8sagents', 'Chart.yaml')))
+        self.assertEqual(export_path, HelmChartCache(self.cache_dir).get(REGISTRY_PATH))
+        self.assertIsNone(chart_cache.get(REGISTRY_PATH.replace('1.1.0', '1.2.0')))
+
+    def test_modified_chart_is_not_reused(self):
+        chart_cache = HelmChartCache(self.cache_dir)
+        export_path = chart_cache.add(REGISTRY_PATH, _export_chart)
+        with open(os.path.join(export_path, 'azure-arc-k8sagents', 'templates', 'deployment.yaml'), 'a') as f:
+            f.write('replicas: 2\n')
+
+        self.assertIsNone(chart_cache.get(REGISTRY_PATH))
+        self.assertFalse(os.path.exists(export_path))
+
+    def test_failed_export_is_not_cached(self):
+        chart_cache = HelmChartCache(self.cache_dir)
+
+        def _fail(destination):
+            os.makedirs(destination)
+            raise RuntimeError('export failed')
+
+        with self.assertRaises(RuntimeError):
+            chart_cache.add(REGISTRY_PATH, _fail)
+        self.assertIsNone(chart_cache.get(REGISTRY_PATH))
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_least_recently_used_charts_are_evicted(self):
+        chart_cache = HelmChartCache(self.cache_dir, max_charts=2)
+        registry_paths = [REGISTRY_PATH.replace('1.1.0', version) for version in ['1.0.0', '1.1.0', '1.2.0']]
+        for index, registry_path in enumerate(registry_paths):
+            chart_cache.add(registry_path, _export_chart)
+            manifest_path = os.path.join(chart_cache._get_entry_dir(registry_path), HelmChartCache.manifest_name)  # pylint: disable=protected-access
+            os.utime(manifest_path, (time.time() - 100 + index, time.time() - 100 + index))
+        # using the oldest chart keeps it in the cache
+        chart_cache.get(registry_paths[0])
+        os.makedirs(os.path.join(self.cache_dir, 'azure-arc-k8sagents'))
+
+        chart_cache.evict()
+        self.assertIsNotNone(chart_cache.get(registry_paths[0]))
+        self.assertIsNone(chart_cache.get(registry_paths[1]))
+        self.assertIsNotNone(chart_cache.get(registry_paths[2]))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, 'azure-arc-k8sagents')))
+
+    def test_expired_charts_are_evicted(self):
+        chart_cache = HelmChartCache(self.cache_dir, max_age=60)
+        chart_cache.add(REGISTRY_PATH, _export_chart)
+        manifest_path = os.path.join(chart_cache._get_entry_dir(REGISTRY_PATH), HelmChartCache.manifest_name)  # pylint: disable=protected-access
+        os.utime(manifest_path, (time.time() - 120, time.time() - 120))
+
+        chart_cache.evict()
+        self.assertIsNone(chart_cache.get(REGISTRY_PATH))
+
+    @mock.patch('azext_connectedk8s._utils.export_helm_chart')
+    @mock.patch('azext_connectedk8s._utils.pull_helm_chart')
+    def test_get_chart_path_pulls_chart_once(self, pull_helm_chart, export_helm_chart):
+        export_helm_chart.side_effect = lambda registry_path, destination, kube_config, kube_context: _export_chart(destination)
+        with mock.patch('os.path.expanduser', return_value=self.cache_dir), mock.patch.dict(os.environ):
+            os.environ.pop('HELMCHART', None)
+            chart_path = get_chart_path(REGISTRY_PATH, None, None)
+            self.assertEqual(chart_path, get_chart_path(REGISTRY_PATH, None, None))
+
+        self.assertTrue(os.path.isfile(os.path.join(chart_path, 'Chart.yaml')))
+        self.assertEqual(1, pull_helm_chart.call_count)
+        self.assertEqual(1, export_helm_chart.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+from unittest import mock
+
+from kubernetes import client as kube_client
+from kubernetes.client.rest import ApiException
+
+from azext_connectedk8s._utils import wait_for_kubernetes_objects
+
+FIELD_SELECTOR = 'metadata.name=azure-arc'
+
+
+def _namespace(phase='Active'):
+    return kube_client.V1Namespace(metadata=kube_client.V1ObjectMeta(name='azure-arc', uid='1234'),
+                                   status=kube_client.V1NamespaceStatus(phase=phase))
+
+
+def _namespace_list(*namespaces):
+    return kube_client.V1NamespaceList(items=list(namespaces), metadata=kube_client.V1ListMeta(resource_version='42'))
+
+
+def _no_namespaces(namespaces):
+    return not namespaces
+
+
+@mock.patch('azext_connectedk8s._utils.time.sleep')
+@mock.patch('azext_connectedk8s._utils.watch.Watch')
+class WaitForKubernetesObjectsTest(unittest.TestCase):
+
+    def test_wait_returns_when_objects_are_deleted(self, watch_cls, sleep):
+        list_func = mock.Mock(return_value=_namespace_list(_namespace()))
+        watch_cls.return_value.stream.return_value = iter([
+            {'type': 'MODIFIED', 'object': _namespace('Terminating')},
+            {'type': 'DELETED', 'object': _namespace('Terminating')}
+        ])
+
+        self.assertTrue(wait_for_kubernetes_objects(list_func, _no_namespaces, 180, field_selector=FIELD_SELECTOR))
+
+        list_func.assert_called_once_with(field_selector=FIELD_SELECTOR)
+        watch_cls.return_value.stream.assert_called_once_with(list_func, resource_version='42', timeout_seconds=mock.ANY,
+                                                              field_selector=FIELD_SELECTOR)
+        sleep.assert_not_called()
+
+    def test_wait_lists_again_when_watch_expires(self, watch_cls, sleep):
+        list_func = mock.Mock(side_effect=[_namespace_list(_namespace()), _namespace_list()])
+        watch_cls.return_value.stream.return_value = iter([{'type': 'ERROR', 'object': None}])
+
+        self.assertTrue(wait_for_kubernetes_objects(list_func, _no_namespaces, 180, field_selector=FIELD_SELECTOR))
+        self.assertEqual(2, list_func.call_count)
+        sleep.assert_not_called()
+
+    def test_wait_polls_when_watch_fails(self, watch_cls, sleep):
+        list_func = mock.Mock(side_effect=[_namespace_list(_namespace()), _namespace_list(_namespace()), _namespace_list()])
+        watch_cls.return_value.stream.side_effect = ApiException(status=403)
+
+        self.assertTrue(wait_for_kubernetes_objects(list_func, _no_namespaces, 180, poll_interval=5,
+                                                    field_selector=FIELD_SELECTOR))
+        self.assertEqual(3, list_func.call_count)
+        self.assertEqual(1, watch_cls.return_value.stream.call_count)
+        self.assertEqual([mock.call(5), mock.call(5)], sleep.call_args_list)
+
+    def test_wait_times_out(self, watch_cls, sleep):
+        list_func = mock.Mock(return_value=_namespace_list(_namespace()))
+
+        self.assertFalse(wait_for_kubernetes_objects(list_func, _no_namespaces, 0, field_selector=FIELD_SELECTOR))
+        watch_cls.return_value.stream.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
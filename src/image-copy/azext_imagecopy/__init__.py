@@ -54,6 +54,9 @@ class ImageCopyCommandsLoader(AzCommandsLoader):
                             '--temporary_resource_group_name will be deprecated in 0.2.7.')
             c.argument('export_as_snapshot', options_list=['--export-as-snapshot'], action='store_true', default=False,
                        help='Include this switch to export the copies as snapshots instead of images.')
+            c.argument('progress', options_list=['--progress'], action='store_true', default=False,
+                       help='Include this switch to show a table with the copy status of every target location '
+                            'while the copies are running.')
             c.argument('tags', tags_type)
             c.ignore('_subscription')
 
@@ -18,4 +18,8 @@ helps['image copy'] = """
           text: >
             az image copy --source-resource-group mySources-rg --source-object-name myVm \\
                 --source-type vm --target-location uksouth northeurope --target-resource-group "images-repo-rg"
+        - name: Copy an image to several regions and show the copy status of every region while waiting.
+          text: >
+            az image copy --source-resource-group mySources-rg --source-object-name myImage \\
+                --target-location uksouth northeurope westus2 --target-resource-group "images-repo-rg" --progress
 """
@@ -5,6 +5,8 @@
 
 import sys
 import json
+import logging
+import threading
 
 from subprocess import check_output, STDOUT, CalledProcessError
 from knack.util import CLIError
@@ -13,12 +15,17 @@ from knack.log import get_logger
 logger = get_logger(__name__)
 
 EXTENSION_TAG_STRING = 'created_by=image-copy-extension'
+CLI_COMMAND_PREFIX = [sys.executable, '-m', 'azure.cli']
+
+_in_process_cli = None
+_in_process_cli_lock = threading.Lock()
+_in_process_cli_disabled = False
 
 
 # pylint: disable=inconsistent-return-statements
 def run_cli_command(cmd, return_as_json=False):
     try:
-        cmd_output = check_output(cmd, stderr=STDOUT, universal_newlines=True)
+        cmd_output = _execute_cli_command(cmd)
         logger.debug('command: %s ended with output: %s', cmd, cmd_output)
 
         if return_as_json:
@@ -48,8 +55,87 @@ def run_cli_command(cmd, return_as_json=False):
         raise
 
 
+def _execute_cli_command(cmd):
+    """
+    Run a command built by prepare_cli_command and return its output. The command is executed by an Azure CLI
+    instance living in this process, which saves the interpreter startup, module imports and token acquisition
+    a new `az` process pays for every step. If the in-process CLI cannot be used, fall back to a subprocess.
+
+    The in-process CLI runs one command at a time, and holds its lock until the command returns, including
+    the wait for a long-running operation. Calling this from several threads serializes the commands, so work
+    meant to run concurrently must use management clients or subprocesses instead.
+    """
+    global _in_process_cli_disabled  # pylint: disable=global-statement
+    if not _in_process_cli_disabled and cmd[:len(CLI_COMMAND_PREFIX)] == CLI_COMMAND_PREFIX:
+        try:
+            exit_code, cmd_output, cmd_errors = _invoke_cli_in_process(cmd[len(CLI_COMMAND_PREFIX):])
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.debug('unable to run commands in process, falling back to subprocesses: %s', ex)
+            _in_process_cli_disabled = True
+        else:
+            if exit_code:
+                # like the subprocess, whose stderr is merged into its output, report what went wrong
+                raise CalledProcessError(exit_code, cmd, output=cmd_output + cmd_errors)
+            return cmd_output
+
+    return check_output(cmd, stderr=STDOUT, universal_newlines=True)
+
+
+def _invoke_cli_in_process(args):
+    global _in_process_cli  # pylint: disable=global-statement
+    from io import StringIO
+    from azure.cli.core import get_default_cli
+
+    # keep the verbosity the user asked for, a subprocess would have inherited it from the command line
+    loggers = [logging.getLogger(), logging.getLogger('cli')]
+    console_log_level = min([h.level for h in loggers[1].handlers] or [logging.WARNING])
+    if console_log_level <= logging.DEBUG:
+        args = args + ['--debug']
+    elif console_log_level <= logging.INFO:
+        args = args + ['--verbose']
+    else:
+        args = args + ['--only-show-errors']
+
+    out_file = StringIO()
+    # a CLI instance is not thread safe, so one command runs at a time
+    with _in_process_cli_lock:
+        if _in_process_cli is None:
+            _in_process_cli = get_default_cli()
+        # the invocation reconfigures the logging handlers, restore ours once it is done
+        saved_logging = [(log, list(log.handlers), log.level, log.propagate) for log in loggers]
+        # errors are logged rather than written to out_file, collect them for the caller
+        error_handler = _ErrorCapturingHandler()
+        loggers[1].addHandler(error_handler)
+        try:
+            exit_code = _in_process_cli.invoke(args, out_file=out_file)
+        except SystemExit as ex:
+            exit_code = ex.code
+        finally:
+            for log, handlers, level, propagate in saved_logging:
+                log.handlers = handlers
+                log.setLevel(level)
+                log.propagate = propagate
+    return exit_code, out_file.getvalue(), error_handler.getvalue()
+
+
+class _ErrorCapturingHandler(logging.Handler):
+    """Collects the errors logged by the thread that created it."""
+
+    def __init__(self):
+        super(_ErrorCapturingHandler, self).__init__(logging.ERROR)
+        self.thread = threading.current_thread().ident
+        self.messages = []
+
+    def emit(self, record):
+        if record.thread == self.thread:
+            self.messages.append(self.format(record))
+
+    def getvalue(self):
+        return ''.join(message + '\n' for message in self.messages)
+
+
 def prepare_cli_command(cmd, output_as_json=True, tags=None, subscription=None):
-    full_cmd = [sys.executable, '-m', 'azure.cli'] + cmd
+    full_cmd = CLI_COMMAND_PREFIX + cmd
 
     if output_as_json:
         full_cmd += ['--output', 'json']
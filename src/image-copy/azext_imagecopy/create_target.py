@@ -4,193 +4,366 @@
 # --------------------------------------------------------------------------------------------
 
 import datetime
+import sys
+import threading
 import time
 
 from knack.util import CLIError
 from knack.log import get_logger
 
-from azext_imagecopy.cli_utils import run_cli_command, prepare_cli_command, get_storage_account_id_from_blob_path
+from azext_imagecopy.cli_utils import get_storage_account_id_from_blob_path, EXTENSION_TAG_STRING
 
 logger = get_logger(__name__)
 
 STORAGE_ACCOUNT_NAME_LENGTH = 24
-
-
-# pylint: disable=too-many-statements
-# pylint: disable=too-many-locals
-def create_target_image(cmd, location, transient_resource_group_name, source_type, source_object_name,
-                        source_os_disk_snapshot_name, source_os_disk_snapshot_url, source_os_type,
-                        target_resource_group_name, azure_pool_frequency, tags, target_name, target_subscription,
-                        export_as_snapshot, timeout):
-
+TARGET_CONTAINER_NAME = 'snapshots'
+MIN_POLL_INTERVAL = 5
+MAX_POLL_INTERVAL = 60
+MAX_POLL_ERRORS = 5
+
+
+class TargetCopy(object):  # pylint: disable=too-few-public-methods, too-many-instance-attributes
+    """The copy of the source snapshot blob to the storage account of one target location."""
+
+    def __init__(self, location, storage_account_name, blob_endpoint, blob_service, blob_name):
+        self.location = location
+        self.storage_account_name = storage_account_name
+        self.blob_endpoint = blob_endpoint
+        self.blob_service = blob_service
+        self.blob_name = blob_name
+        self.status = 'pending'
+        self.progress = 0
+        self.start_time = datetime.datetime.now()
+        self.end_time = None
+
+    @property
+    def elapsed(self):
+        return (self.end_time or datetime.datetime.now()) - self.start_time
+
+
+class TargetOperation(object):  # pylint: disable=too-few-public-methods
+    """The creation of the snapshot or image of one target location, polled by reading the resource."""
+
+    def __init__(self, location, kind, get_resource):
+        self.location = location
+        self.kind = kind
+        self.get_resource = get_resource
+        self.provisioning_state = None
+        self.resource = None
+        self.poll_errors = 0
+
+    @property
+    def done(self):
+        return self.provisioning_state in ('Succeeded', 'Failed', 'Canceled')
+
+
+class TargetClients(object):
+    """Authenticated clients shared by the copies to all target locations."""
+
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self._lock = threading.Lock()
+        self._storage_clients = {}
+        self._compute_clients = {}
+
+    def storage_management(self, subscription_id):
+        from azure.cli.core.commands.client_factory import get_mgmt_service_client
+        from azure.cli.core.profiles import ResourceType
+        with self._lock:
+            if subscription_id not in self._storage_clients:
+                self._storage_clients[subscription_id] = get_mgmt_service_client(
+                    self.cmd.cli_ctx, ResourceType.MGMT_STORAGE, subscription_id=subscription_id)
+            return self._storage_clients[subscription_id]
+
+    def compute_management(self, subscription_id):
+        from azure.cli.core.commands.client_factory import get_mgmt_service_client
+        from azure.cli.core.profiles import ResourceType
+        with self._lock:
+            if subscription_id not in self._compute_clients:
+                self._compute_clients[subscription_id] = get_mgmt_service_client(
+                    self.cmd.cli_ctx, ResourceType.MGMT_COMPUTE, subscription_id=subscription_id)
+            return self._compute_clients[subscription_id]
+
+    def blob_service(self, account_name, account_key):
+        from azure.cli.core.profiles import get_sdk, ResourceType
+        t_block_blob_service = get_sdk(self.cmd.cli_ctx, ResourceType.DATA_STORAGE, 'blob#BlockBlobService')
+        return t_block_blob_service(account_name=account_name, account_key=account_key)
+
+
+# pylint: disable=too-many-locals, too-many-statements, too-many-branches
+def copy_to_target_locations(cmd, locations, parallel_degree, transient_resource_group_name, source_type,
+                             source_object_name, source_os_disk_snapshot_name, source_os_disk_snapshot_url,
+                             source_os_type, target_resource_group_name, tags, target_name, target_subscription,
+                             export_as_snapshot, show_progress=False):
+    """
+    Copy the source snapshot to every target location from this process. The storage accounts are prepared
+    and the blob copies started on a pool of parallel_degree threads. The pending copies, and the target
+    snapshots and images started as soon as their copy completes, are all polled in one loop.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    clients = TargetClients(cmd)
+    subscription_id = _get_subscription_id(cmd, target_subscription)
+    max_workers = len(locations) if parallel_degree == -1 else max(1, min(parallel_degree, len(locations)))
+
+    def _start_next_operation(target_copy, operation=None):
+        if operation is None:
+            return start_target_snapshot(clients, target_copy, transient_resource_group_name,
+                                         source_os_disk_snapshot_name, target_resource_group_name, subscription_id,
+                                         export_as_snapshot)
+        if export_as_snapshot:
+            logger.warning("%s - Skipping image creation", target_copy.location)
+            return None
+        if operation.kind == 'snapshot':
+            return start_target_image(clients, target_copy, operation.resource.id, source_type, source_object_name,
+                                      source_os_type, target_resource_group_name, tags, target_name,
+                                      subscription_id)
+        return None
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    start_futures = {}
+    try:
+        start_futures = {executor.submit(start_target_copy, clients, location, transient_resource_group_name,
+                                         source_os_disk_snapshot_name, source_os_disk_snapshot_url,
+                                         subscription_id): location for location in locations}
+        target_copies = []
+        operations = {}
+        failures = {}
+        poll_interval = MIN_POLL_INTERVAL
+
+        def _in_progress():
+            return start_futures or operations or any(c.status == 'pending' for c in target_copies)
+
+        while _in_progress():
+            for future in [f for f in start_futures if f.done()]:
+                location = start_futures.pop(future)
+                try:
+                    target_copies.append(future.result())
+                except Exception as ex:  # pylint: disable=broad-except
+                    logger.error('%s - Failed to start the copy: %s', location, ex)
+                    failures[location] = ex
+
+            progressed = False
+            for target_copy in [c for c in target_copies if c.status == 'pending']:
+                progressed = poll_blob_copy(target_copy, show_progress) or progressed
+                if target_copy.status != 'pending':
+                    try:
+                        operations[target_copy.location] = (target_copy, _start_next_operation(target_copy))
+                    except Exception as ex:  # pylint: disable=broad-except
+                        logger.error('%s - Failed to create the target: %s', target_copy.location, ex)
+                        failures[target_copy.location] = ex
+
+            for location, (target_copy, operation) in list(operations.items()):
+                try:
+                    progressed = poll_target_operation(operation) or progressed
+                    if operation.done:
+                        del operations[location]
+                        if operation.provisioning_state != 'Succeeded':
+                            raise CLIError('{} - Creating the target {} ended in state {}'.format(
+                                location, operation.kind, operation.provisioning_state))
+                        next_operation = _start_next_operation(target_copy, operation)
+                        if next_operation:
+                            operations[location] = (target_copy, next_operation)
+                except Exception as ex:  # pylint: disable=broad-except
+                    operations.pop(location, None)
+                    logger.error('%s - Failed to create the target: %s', location, ex)
+                    failures[location] = ex
+
+            if show_progress and target_copies:
+                print_copy_progress(target_copies)
+
+            if _in_progress():
+                # poll less often while nothing moves, but wake up as soon as another copy starts
+                poll_interval = MIN_POLL_INTERVAL if progressed else min(poll_interval * 2, MAX_POLL_INTERVAL)
+                if start_futures:
+                    wait(list(start_futures), timeout=poll_interval, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        for future in start_futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        raise
+
+    executor.shutdown()
+    if failures:
+        raise CLIError('Copy failed for location(s): {}'.format(', '.join(sorted(failures))))
+
+
+def start_target_copy(clients, location, transient_resource_group_name, source_os_disk_snapshot_name,
+                      source_os_disk_snapshot_url, subscription_id):
     random_string = get_random_string(
         STORAGE_ACCOUNT_NAME_LENGTH - len(location))
 
     # create the target storage account. storage account name must be lowercase.
     logger.warning(
         "%s - Creating target storage account (can be slow sometimes)", location)
+    from azure.cli.core.profiles import ResourceType
     target_storage_account_name = location.lower() + random_string
-    cli_cmd = prepare_cli_command(['storage', 'account', 'create',
-                                   '--name', target_storage_account_name,
-                                   '--resource-group', transient_resource_group_name,
-                                   '--location', location,
-                                   '--sku', 'Standard_LRS'],
-                                  subscription=target_subscription)
-
-    json_output = run_cli_command(cli_cmd, return_as_json=True)
-    target_blob_endpoint = json_output['primaryEndpoints']['blob']
-
-    # Setup the target storage account
-    cli_cmd = prepare_cli_command(['storage', 'account', 'keys', 'list',
-                                   '--account-name', target_storage_account_name,
-                                   '--resource-group', transient_resource_group_name],
-                                  subscription=target_subscription)
-
-    json_output = run_cli_command(cli_cmd, return_as_json=True)
-
-    target_storage_account_key = json_output[0]['value']
-    logger.debug("storage account key: %s", target_storage_account_key)
-
-    expiry_format = "%Y-%m-%dT%H:%MZ"
-    expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=timeout)
-    logger.debug(
-        "create target storage sas using timeout seconds: %d", timeout)
-
-    cli_cmd = prepare_cli_command(['storage', 'account', 'generate-sas',
-                                   '--account-name', target_storage_account_name,
-                                   '--account-key', target_storage_account_key,
-                                   '--expiry', expiry.strftime(expiry_format),
-                                   '--permissions', 'aclrpuw', '--resource-types',
-                                   'sco', '--services', 'b', '--https-only'],
-                                  output_as_json=False,
-                                  subscription=target_subscription)
-
-    sas_token = run_cli_command(cli_cmd)
-    sas_token = sas_token.rstrip("\n\r")  # STRANGE
-    logger.debug("sas token: %s", sas_token)
+    storage_client = clients.storage_management(subscription_id)
+    t_create_parameters, t_sku = clients.cmd.get_models('StorageAccountCreateParameters', 'Sku',
+                                                        resource_type=ResourceType.MGMT_STORAGE)
+    tag_name, tag_value = EXTENSION_TAG_STRING.split('=')
+    parameters = t_create_parameters(sku=t_sku(name='Standard_LRS'), kind='StorageV2', location=location,
+                                     tags={tag_name: tag_value})
+    create_account = getattr(storage_client.storage_accounts, 'begin_create', None) or \
+        storage_client.storage_accounts.create
+    storage_account = create_account(transient_resource_group_name, target_storage_account_name,
+                                     parameters).result()
+
+    target_storage_account_key = storage_client.storage_accounts.list_keys(
+        transient_resource_group_name, target_storage_account_name).keys[0].value
+    blob_service = clients.blob_service(target_storage_account_name, target_storage_account_key)
 
     # create a container in the target blob storage account
     logger.warning(
         "%s - Creating container in the target storage account", location)
-    target_container_name = 'snapshots'
-    cli_cmd = prepare_cli_command(['storage', 'container', 'create',
-                                   '--name', target_container_name,
-                                   '--account-name', target_storage_account_name],
-                                  subscription=target_subscription)
-
-    run_cli_command(cli_cmd)
+    blob_service.create_container(TARGET_CONTAINER_NAME)
 
     # Copy the snapshot to the target region using the SAS URL
     blob_name = source_os_disk_snapshot_name + '.vhd'
     logger.warning(
         "%s - Copying blob to target storage account", location)
-    cli_cmd = prepare_cli_command(['storage', 'blob', 'copy', 'start',
-                                   '--source-uri', source_os_disk_snapshot_url,
-                                   '--destination-blob', blob_name,
-                                   '--destination-container', target_container_name,
-                                   '--account-name', target_storage_account_name,
-                                   '--sas-token', sas_token],
-                                  subscription=target_subscription)
-
-    run_cli_command(cli_cmd)
-
-    # Wait for the copy to complete
-    start_datetime = datetime.datetime.now()
-    wait_for_blob_copy_operation(blob_name, target_container_name, target_storage_account_name,
-                                 azure_pool_frequency, location, target_subscription)
-    msg = "{0} - Copy time: {1}".format(
-        location, datetime.datetime.now() - start_datetime)
+    blob_service.copy_blob(TARGET_CONTAINER_NAME, blob_name, source_os_disk_snapshot_url)
+
+    return TargetCopy(location, target_storage_account_name, storage_account.primary_endpoints.blob,
+                      blob_service, blob_name)
+
+
+def poll_blob_copy(target_copy, show_progress=False):
+    """Refresh the status of a blob copy. Returns whether the copy made progress since the last poll."""
+    from azure.common import AzureException
+    try:
+        copy = target_copy.blob_service.get_blob_properties(
+            TARGET_CONTAINER_NAME, target_copy.blob_name).properties.copy
+    except AzureException as ex:
+        logger.debug('%s - Failed to get the copy status: %s', target_copy.location, ex)
+        return False
+
+    copied, total = copy.progress.split('/') if copy.progress else (0, 1)
+    current_progress = int(int(copied) / int(total) * 100)
+    progressed = current_progress != target_copy.progress or copy.status != target_copy.status
+
+    if current_progress != target_copy.progress and not show_progress:
+        logger.warning("%s - Copy progress: %d%%", target_copy.location, current_progress)
+
+    target_copy.progress = current_progress
+    target_copy.status = copy.status
+    if copy.status != 'pending':
+        target_copy.end_time = datetime.datetime.now()
+        if copy.status != 'success':
+            logger.error("%s - The copy operation didn't succeed. Last status: %s (%s)",
+                         target_copy.location, copy.status, copy.status_description)
+    return progressed
+
+
+def print_copy_progress(target_copies):
+    row_format = '{:<24} {:<10} {:>8} {:>16}'
+    rows = [row_format.format('Location', 'Status', 'Progress', 'Elapsed')]
+    for target_copy in target_copies:
+        rows.append(row_format.format(target_copy.location, target_copy.status, '{}%'.format(target_copy.progress),
+                                      str(target_copy.elapsed).split('.')[0]))
+    print('\n'.join(rows) + '\n', file=sys.stderr)
+
+
+def start_target_snapshot(clients, target_copy, transient_resource_group_name, source_os_disk_snapshot_name,
+                          target_resource_group_name, subscription_id, export_as_snapshot):
+    """Start creating the snapshot of the target location from its copied blob, without waiting for it."""
+    from azure.cli.core.profiles import ResourceType
+    location = target_copy.location
+    if target_copy.status != 'success':
+        raise CLIError('{} - Blob copy failed. Last status: {}'.format(location, target_copy.status))
+
+    msg = "{0} - Copy time: {1}".format(location, target_copy.elapsed)
     logger.warning(msg)
 
     # Create the snapshot in the target region from the copied blob
     logger.warning(
         "%s - Creating snapshot in target region from the copied blob", location)
-    target_blob_path = target_blob_endpoint + \
-        target_container_name + '/' + blob_name
+    target_blob_path = target_copy.blob_endpoint + \
+        TARGET_CONTAINER_NAME + '/' + target_copy.blob_name
     target_snapshot_name = source_os_disk_snapshot_name + '-' + location
     if export_as_snapshot:
         snapshot_resource_group_name = target_resource_group_name
     else:
         snapshot_resource_group_name = transient_resource_group_name
 
-    source_storage_account_id = get_storage_account_id_from_blob_path(cmd,
+    source_storage_account_id = get_storage_account_id_from_blob_path(clients.cmd,
                                                                       target_blob_path,
                                                                       transient_resource_group_name,
-                                                                      target_subscription)
-
-    cli_cmd = prepare_cli_command(['snapshot', 'create',
-                                   '--resource-group', snapshot_resource_group_name,
-                                   '--name', target_snapshot_name,
-                                   '--location', location,
-                                   '--source', target_blob_path,
-                                   '--source-storage-account-id', source_storage_account_id],
-                                  subscription=target_subscription)
-
-    json_output = run_cli_command(cli_cmd, return_as_json=True)
-    target_snapshot_id = json_output['id']
-
-    # Optionally create the final image
-    if export_as_snapshot:
-        logger.warning("%s - Skipping image creation", location)
+                                                                      subscription_id)
+
+    t_snapshot, t_creation_data = clients.cmd.get_models('Snapshot', 'CreationData',
+                                                         resource_type=ResourceType.MGMT_COMPUTE,
+                                                         operation_group='snapshots')
+    tag_name, tag_value = EXTENSION_TAG_STRING.split('=')
+    snapshot = t_snapshot(location=location,
+                          creation_data=t_creation_data(create_option='Import', source_uri=target_blob_path,
+                                                        storage_account_id=source_storage_account_id),
+                          tags={tag_name: tag_value})
+    snapshots = clients.compute_management(subscription_id).snapshots
+    create_snapshot = getattr(snapshots, 'begin_create_or_update', None) or snapshots.create_or_update
+    create_snapshot(snapshot_resource_group_name, target_snapshot_name, snapshot, polling=False)
+    return TargetOperation(location, 'snapshot',
+                           lambda: snapshots.get(snapshot_resource_group_name, target_snapshot_name))
+
+
+def start_target_image(clients, target_copy, target_snapshot_id, source_type, source_object_name, source_os_type,
+                       target_resource_group_name, tags, target_name, subscription_id):
+    """Start creating the final image of the target location from its snapshot, without waiting for it."""
+    from azure.cli.core.profiles import ResourceType
+    location = target_copy.location
+    logger.warning("%s - Creating final image", location)
+    if target_name is None:
+        target_image_name = source_object_name
+        if source_type != 'image':
+            target_image_name += '-image'
+        target_image_name += '-' + location
     else:
-        logger.warning("%s - Creating final image", location)
-        if target_name is None:
-            target_image_name = source_object_name
-            if source_type != 'image':
-                target_image_name += '-image'
-            target_image_name += '-' + location
-        else:
-            target_image_name = target_name
-
-        cli_cmd = prepare_cli_command(['image', 'create',
-                                       '--resource-group', target_resource_group_name,
-                                       '--name', target_image_name,
-                                       '--location', location,
-                                       '--os-type', source_os_type,
-                                       '--source', target_snapshot_id],
-                                      tags=tags,
-                                      subscription=target_subscription)
-
-        run_cli_command(cli_cmd)
-
-
-def wait_for_blob_copy_operation(blob_name, target_container_name, target_storage_account_name,
-                                 azure_pool_frequency, location, subscription):
-    copy_status = "pending"
-    prev_progress = -1
-    while copy_status == "pending":
-        cli_cmd = prepare_cli_command(['storage', 'blob', 'show',
-                                       '--name', blob_name,
-                                       '--container-name', target_container_name,
-                                       '--account-name', target_storage_account_name],
-                                      subscription=subscription)
-
-        json_output = run_cli_command(cli_cmd, return_as_json=True)
-        copy_status = json_output["properties"]["copy"]["status"]
-        copy_progress_1, copy_progress_2 = json_output["properties"]["copy"]["progress"].split(
-            "/")
-        current_progress = int(
-            int(copy_progress_1) / int(copy_progress_2) * 100)
-
-        if current_progress != prev_progress:
-            msg = "{0} - Copy progress: {1}%"\
-                .format(location, str(current_progress))
-            logger.warning(msg)
-
-        prev_progress = current_progress
-
-        try:
-            time.sleep(azure_pool_frequency)
-        except KeyboardInterrupt:
-            return
-
-    if copy_status != 'success':
-        logger.error(
-            "The copy operation didn't succeed. Last status: %s", copy_status)
-        logger.error("Command run: %s", cli_cmd)
-        logger.error("Command output: %s", json_output)
-
-        raise CLIError('Blob copy failed')
+        target_image_name = target_name
+
+    t_image, t_storage_profile, t_os_disk, t_sub_resource = clients.cmd.get_models(
+        'Image', 'ImageStorageProfile', 'ImageOSDisk', 'SubResource', resource_type=ResourceType.MGMT_COMPUTE,
+        operation_group='images')
+    tag_name, tag_value = EXTENSION_TAG_STRING.split('=')
+    image_tags = {tag_name: tag_value}
+    image_tags.update(tags or {})
+    os_disk = t_os_disk(os_type=source_os_type, os_state='Generalized',
+                        snapshot=t_sub_resource(id=target_snapshot_id))
+    image = t_image(location=location, storage_profile=t_storage_profile(os_disk=os_disk), tags=image_tags)
+    images = clients.compute_management(subscription_id).images
+    create_image = getattr(images, 'begin_create_or_update', None) or images.create_or_update
+    create_image(target_resource_group_name, target_image_name, image, polling=False)
+    return TargetOperation(location, 'image', lambda: images.get(target_resource_group_name, target_image_name))
+
+
+def poll_target_operation(operation):
+    """Refresh the provisioning state of a target snapshot or image. Returns whether it changed."""
+    try:
+        operation.resource = operation.get_resource()
+    except Exception as ex:  # pylint: disable=broad-except
+        # a failed read is retried on the next poll, unless reads keep failing
+        operation.poll_errors += 1
+        if operation.poll_errors >= MAX_POLL_ERRORS:
+            raise
+        logger.debug('%s - Failed to get the %s: %s', operation.location, operation.kind, ex)
+        return False
+
+    operation.poll_errors = 0
+    provisioning_state = operation.resource.provisioning_state
+    progressed = provisioning_state != operation.provisioning_state
+    operation.provisioning_state = provisioning_state
+    if operation.done and provisioning_state == 'Succeeded':
+        logger.warning("%s - Created the target %s", operation.location, operation.kind)
+    return progressed
+
+
+def _get_subscription_id(cmd, subscription=None):
+    from azure.cli.core.commands.client_factory import get_subscription_id
+    if not subscription:
+        return get_subscription_id(cmd.cli_ctx)
+    from azure.cli.core._profile import Profile
+    return Profile(cli_ctx=cmd.cli_ctx).get_subscription(subscription)['id']
 
 
 def get_random_string(length):
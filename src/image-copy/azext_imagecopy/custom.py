@@ -3,13 +3,11 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from multiprocessing import Pool
-
 from knack.util import CLIError
 from knack.log import get_logger
 
 from azext_imagecopy.cli_utils import run_cli_command, prepare_cli_command, get_storage_account_id_from_blob_path
-from azext_imagecopy.create_target import create_target_image
+from azext_imagecopy.create_target import copy_to_target_locations
 
 logger = get_logger(__name__)
 
@@ -20,7 +18,7 @@ logger = get_logger(__name__)
 def imagecopy(cmd, source_resource_group_name, source_object_name, target_location,
               target_resource_group_name, temporary_resource_group_name='image-copy-rg',
               source_type='image', cleanup=False, parallel_degree=-1, tags=None, target_name=None,
-              target_subscription=None, export_as_snapshot='false', timeout=3600):
+              target_subscription=None, export_as_snapshot='false', timeout=3600, progress=False):
     if cleanup:
         # If --cleanup is set, forbid using an existing temporary resource group name.
         # It is dangerous to clean up an existing resource group.
@@ -138,76 +136,50 @@ def imagecopy(cmd, source_resource_group_name, source_object_name, target_locati
                           target_location[0].strip(),
                           target_subscription)
 
+    cancelled = False
     try:
-
-        # try to get a handle on arm's 409s
-        azure_pool_frequency = 5
-        if target_locations_count >= 5:
-            azure_pool_frequency = 15
-        elif target_locations_count >= 3:
-            azure_pool_frequency = 10
-
-        if (target_locations_count == 1) or (parallel_degree == 1):
-            # Going to copy to targets one-by-one
-            logger.debug("Starting sync process for all locations")
-            for location in target_location:
-                location = location.strip()
-                create_target_image(cmd, location, transient_resource_group_name, source_type,
-                                    source_object_name, source_os_disk_snapshot_name, source_os_disk_snapshot_url,
-                                    source_os_type, target_resource_group_name, azure_pool_frequency,
-                                    tags, target_name, target_subscription, export_as_snapshot, timeout)
-        else:
-            if parallel_degree == -1:
-                pool = Pool(target_locations_count)
-            else:
-                pool = Pool(min(parallel_degree, target_locations_count))
-
-            tasks = []
-            for location in target_location:
-                location = location.strip()
-                tasks.append((location, transient_resource_group_name, source_type,
-                              source_object_name, source_os_disk_snapshot_name, source_os_disk_snapshot_url,
-                              source_os_type, target_resource_group_name, azure_pool_frequency,
-                              tags, target_name, target_subscription, export_as_snapshot, timeout))
-
-            logger.warning("Starting async process for all locations")
-
-            for task in tasks:
-                pool.apply_async(create_target_image, task)
-
-            pool.close()
-            pool.join()
-
+        logger.warning("Starting copy process for all locations")
+        copy_to_target_locations(cmd, [location.strip() for location in target_location], parallel_degree,
+                                 transient_resource_group_name, source_type, source_object_name,
+                                 source_os_disk_snapshot_name, source_os_disk_snapshot_url, source_os_type,
+                                 target_resource_group_name, tags, target_name, target_subscription,
+                                 export_as_snapshot, show_progress=progress)
     except KeyboardInterrupt:
+        cancelled = True
         logger.warning('User cancelled the operation')
         if cleanup:
             logger.warning('To cleanup temporary resources look for ones tagged with "image-copy-extension". \n'
                            'You can use the following command: az resource list --tag created_by=image-copy-extension')
-        pool.terminate()
         return
+    finally:
+        # the transient resources are deleted even when some of the target locations failed
+        if cleanup and not cancelled:
+            cleanup_transient_resources(transient_resource_group_name, source_os_disk_snapshot_name,
+                                        source_resource_group_name, target_subscription)
 
-    # Cleanup
-    if cleanup:
-        logger.warning('Deleting transient resources')
 
-        # Delete resource group
-        cli_cmd = prepare_cli_command(['group', 'delete', '--no-wait', '--yes',
-                                       '--name', transient_resource_group_name],
-                                      subscription=target_subscription)
-        run_cli_command(cli_cmd)
+def cleanup_transient_resources(transient_resource_group_name, source_os_disk_snapshot_name,
+                                source_resource_group_name, target_subscription):
+    logger.warning('Deleting transient resources')
 
-        # Revoke sas for source snapshot
-        cli_cmd = prepare_cli_command(['snapshot', 'revoke-access',
-                                       '--name', source_os_disk_snapshot_name,
-                                       '--resource-group', source_resource_group_name])
-        run_cli_command(cli_cmd)
+    # Delete resource group
+    cli_cmd = prepare_cli_command(['group', 'delete', '--no-wait', '--yes',
+                                   '--name', transient_resource_group_name],
+                                  subscription=target_subscription)
+    run_cli_command(cli_cmd)
 
-        # Delete source snapshot
-        # TODO: skip this if source is snapshot and not creating a new one
-        cli_cmd = prepare_cli_command(['snapshot', 'delete',
-                                       '--name', source_os_disk_snapshot_name,
-                                       '--resource-group', source_resource_group_name])
-        run_cli_command(cli_cmd)
+    # Revoke sas for source snapshot
+    cli_cmd = prepare_cli_command(['snapshot', 'revoke-access',
+                                   '--name', source_os_disk_snapshot_name,
+                                   '--resource-group', source_resource_group_name])
+    run_cli_command(cli_cmd)
+
+    # Delete source snapshot
+    # TODO: skip this if source is snapshot and not creating a new one
+    cli_cmd = prepare_cli_command(['snapshot', 'delete',
+                                   '--name', source_os_disk_snapshot_name,
+                                   '--resource-group', source_resource_group_name])
+    run_cli_command(cli_cmd)
 
 
 def create_resource_group(resource_group_name, location, subscription=None):
@@ -0,0 +1,84 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import logging
+import unittest
+from subprocess import CalledProcessError
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from azext_imagecopy import cli_utils
+from azext_imagecopy.cli_utils import run_cli_command, prepare_cli_command
+
+
+class FakeCli(object):
+    def __init__(self, output, exit_code=0, error=None):
+        self.output = output
+        self.exit_code = exit_code
+        self.error = error
+        self.invocations = []
+
+    def invoke(self, args, out_file=None):
+        self.invocations.append(args)
+        out_file.write(self.output)
+        if self.error:
+            # the CLI logs the errors of a command, as azure.cli.core.util.handle_exception does
+            logging.getLogger('cli.azure.cli.core.util').error(self.error)
+        return self.exit_code
+
+
+class ImageCopyCliUtilsTest(unittest.TestCase):
+    def setUp(self):
+        cli_utils._in_process_cli = None
+        cli_utils._in_process_cli_disabled = False
+
+    def tearDown(self):
+        cli_utils._in_process_cli = None
+        cli_utils._in_process_cli_disabled = False
+
+    @mock.patch('azext_imagecopy.cli_utils.check_output')
+    def test_run_cli_command_in_process(self, check_output):
+        cli = FakeCli('{"id": "snapshot"}')
+        cli_utils._in_process_cli = cli
+
+        output = run_cli_command(prepare_cli_command(['snapshot', 'show', '--name', 's']), return_as_json=True)
+
+        self.assertEqual(output, {'id': 'snapshot'})
+        self.assertEqual(cli.invocations[0][:5], ['snapshot', 'show', '--name', 's', '--output'])
+        check_output.assert_not_called()
+
+    def test_run_cli_command_in_process_failure(self):
+        cli_utils._in_process_cli = FakeCli('', exit_code=1, error="(ResourceGroupNotFound) Resource group 'rg' "
+                                                                    "could not be found.")
+
+        with self.assertRaises(CalledProcessError) as context:
+            run_cli_command(prepare_cli_command(['snapshot', 'show', '-n', 's', '-g', 'rg']))
+
+        self.assertEqual(context.exception.output,
+                         "(ResourceGroupNotFound) Resource group 'rg' could not be found.\n")
+        # the capturing handler is removed once the command returned
+        self.assertFalse(any(isinstance(h, cli_utils._ErrorCapturingHandler)
+                             for h in logging.getLogger('cli').handlers))
+
+    @mock.patch('azext_imagecopy.cli_utils.check_output', return_value='true\n')
+    def test_run_cli_command_falls_back_to_subprocess(self, check_output):
+        cli = mock.MagicMock()
+        cli.invoke.side_effect = RuntimeError('boom')
+        cli_utils._in_process_cli = cli
+        cli_cmd = prepare_cli_command(['group', 'exists', '-n', 'rg'], output_as_json=False)
+
+        self.assertEqual(run_cli_command(cli_cmd), 'true\n')
+        self.assertEqual(run_cli_command(cli_cmd), 'true\n')
+
+        self.assertEqual(cli.invoke.call_count, 1)
+        self.assertEqual(check_output.call_count, 2)
+        self.assertEqual(check_output.call_args[0][0], cli_cmd)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from knack.util import CLIError
+
+from azext_imagecopy.create_target import (TargetCopy, TargetOperation, copy_to_target_locations,
+                                          start_target_snapshot, start_target_image)
+
+
+class FakeBlobService(object):
+    """A blob whose copy advances by a quarter every time its properties are read."""
+
+    def __init__(self, final_status='success'):
+        self.final_status = final_status
+        self.polls = 0
+
+    def get_blob_properties(self, container_name, blob_name):
+        self.polls += 1
+        copied = min(self.polls, 4)
+        status = 'pending' if copied < 4 else self.final_status
+        copy = mock.MagicMock(status=status, progress='{}/4'.format(copied))
+        return mock.MagicMock(properties=mock.MagicMock(copy=copy))
+
+
+class FakeResource(object):
+    """A snapshot or image that is provisioned after it was read twice."""
+
+    def __init__(self, resource_id, final_state='Succeeded'):
+        self.id = resource_id
+        self.final_state = final_state
+        self.reads = 0
+
+    def get(self):
+        self.reads += 1
+        self.provisioning_state = 'Creating' if self.reads < 2 else self.final_state
+        return self
+
+
+class ImageCopySchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.blob_services = {}
+        self.started_threads = set()
+        self.finished = []
+        self.image_states = {}
+        self.in_flight = set()
+        self.max_in_flight = 0
+        patches = [
+            mock.patch('azext_imagecopy.create_target.TargetClients'),
+            mock.patch('azext_imagecopy.create_target._get_subscription_id', return_value='sub'),
+            mock.patch('azext_imagecopy.create_target.start_target_copy', side_effect=self._start_target_copy),
+            mock.patch('azext_imagecopy.create_target.start_target_snapshot', side_effect=self._start_snapshot),
+            mock.patch('azext_imagecopy.create_target.start_target_image', side_effect=self._start_image),
+            mock.patch('azext_imagecopy.create_target.time.sleep'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _start_target_copy(self, clients, location, *args):
+        self.started_threads.add(threading.current_thread().name)
+        blob_service = self.blob_services[location]
+        return TargetCopy(location, location + 'account', 'https://{}.blob/'.format(location), blob_service, 'b')
+
+    def _start_operation(self, location, kind, final_state='Succeeded'):
+        resource = FakeResource('/{}/{}'.format(kind, location), final_state)
+        self.in_flight.add((location, kind))
+        self.max_in_flight = max(self.max_in_flight, len(self.in_flight))
+
+        def _get():
+            resource.get()
+            if resource.provisioning_state != 'Creating':
+                self.in_flight.discard((location, kind))
+                if kind == 'image' and final_state == 'Succeeded':
+                    self.finished.append(location)
+            return resource
+        return TargetOperation(location, kind, _get)
+
+    def _start_snapshot(self, clients, target_copy, *args):
+        if target_copy.status != 'success':
+            raise CLIError('copy failed')
+        return self._start_operation(target_copy.location, 'snapshot')
+
+    def _start_image(self, clients, target_copy, snapshot_id, *args):
+        self.assertEqual(snapshot_id, '/snapshot/' + target_copy.location)
+        return self._start_operation(target_copy.location, 'image', self.image_states.get(target_copy.location,
+                                                                                            'Succeeded'))
+
+    def _copy(self, locations, parallel_degree=-1):
+        copy_to_target_locations(mock.MagicMock(), locations, parallel_degree, 'transient-rg', 'image', 'img',
+                                 'img_os_disk_snapshot', 'https://source/sas', 'Linux', 'target-rg', None, None,
+                                 None, False)
+
+    def test_copy_to_target_locations(self):
+        locations = ['eastus', 'westus', 'uksouth']
+        for location in locations:
+            self.blob_services[location] = FakeBlobService()
+
+        self._copy(locations)
+
+        self.assertEqual(sorted(self.finished), sorted(locations))
+        # the copies are polled until done, and no more
+        self.assertEqual([self.blob_services[l].polls for l in locations], [4, 4, 4])
+        # the snapshots and images of all locations are created side by side
+        self.assertEqual(self.max_in_flight, 3)
+
+    def test_copy_to_target_locations_reports_failed_locations(self):
+        self.blob_services['eastus'] = FakeBlobService()
+        self.blob_services['westus'] = FakeBlobService(final_status='failed')
+
+        with self.assertRaisesRegex(CLIError, 'westus'):
+            self._copy(['eastus', 'westus'], parallel_degree=1)
+
+        self.assertEqual(self.finished, ['eastus'])
+        self.assertEqual(len(self.started_threads), 1)
+
+    def test_copy_to_target_locations_reports_failed_images(self):
+        self.blob_services['eastus'] = FakeBlobService()
+        self.blob_services['westus'] = FakeBlobService()
+        self.image_states['westus'] = 'Failed'
+
+        with self.assertRaisesRegex(CLIError, 'westus'):
+            self._copy(['eastus', 'westus'])
+
+        self.assertEqual(self.finished, ['eastus'])
+
+
+class TargetOperationTest(unittest.TestCase):
+    def setUp(self):
+        self.cmd = mock.MagicMock()
+        self.cmd.get_models.side_effect = lambda *names, **kwargs: [mock.MagicMock(name=n) for n in names]
+        self.clients = mock.MagicMock(cmd=self.cmd)
+        self.target_copy = TargetCopy('eastus', 'account', 'https://account.blob/', None, 'snap.vhd')
+        self.target_copy.status = 'success'
+
+    @mock.patch('azext_imagecopy.create_target.get_storage_account_id_from_blob_path', return_value='/account')
+    def test_start_target_snapshot_does_not_wait(self, _):
+        snapshots = self.clients.compute_management.return_value.snapshots
+
+        operation = start_target_snapshot(self.clients, self.target_copy, 'transient-rg', 'snap', 'target-rg',
+                                          'sub', False)
+
+        snapshots.begin_create_or_update.assert_called_once_with('transient-rg', 'snap-eastus', mock.ANY,
+                                                                 polling=False)
+        self.clients.compute_management.assert_called_once_with('sub')
+        snapshots.get.assert_not_called()
+        operation.get_resource()
+        snapshots.get.assert_called_once_with('transient-rg', 'snap-eastus')
+
+    def test_start_target_image_does_not_wait(self):
+        images = self.clients.compute_management.return_value.images
+
+        operation = start_target_image(self.clients, self.target_copy, '/snapshot', 'image', 'img', 'Linux',
+                                       'target-rg', {'env': 'prod'}, None, 'sub')
+
+        images.begin_create_or_update.assert_called_once_with('target-rg', 'img-eastus', mock.ANY, polling=False)
+        self.assertEqual(operation.kind, 'image')
+
+    def test_poll_target_operation_retries_failed_reads(self):
+        from azext_imagecopy.create_target import poll_target_operation, MAX_POLL_ERRORS
+        get_resource = mock.Mock(side_effect=[RuntimeError('throttled'), mock.Mock(provisioning_state='Succeeded')])
+        operation = TargetOperation('eastus', 'image', get_resource)
+
+        self.assertFalse(poll_target_operation(operation))
+        self.assertTrue(poll_target_operation(operation))
+        self.assertTrue(operation.done)
+
+        operation = TargetOperation('eastus', 'image', mock.Mock(side_effect=RuntimeError('gone')))
+        for _ in range(MAX_POLL_ERRORS - 1):
+            poll_target_operation(operation)
+        with self.assertRaises(RuntimeError):
+            poll_target_operation(operation)
+
+
+class ImageCopyCleanupTest(unittest.TestCase):
+    def setUp(self):
+        self.commands = []
+        patches = [
+            mock.patch('azext_imagecopy.custom.prepare_cli_command', side_effect=lambda args, **_: args),
+            mock.patch('azext_imagecopy.custom.run_cli_command', side_effect=self._run_cli_command),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _run_cli_command(self, cli_cmd, return_as_json=False):
+        self.commands.append(' '.join(cli_cmd[:2]))
+        if cli_cmd[:2] == ['image', 'show']:
+            return {'location': 'westus', 'storageProfile': {
+                'dataDisks': [], 'osDisk': {'osType': 'Linux', 'managedDisk': {'id': '/disk'}}}}
+        if cli_cmd[:2] == ['snapshot', 'grant-access']:
+            return {'accessSas': 'https://account.blob.core.windows.net/sas'}
+        return 'false'
+
+    def _imagecopy(self):
+        from azext_imagecopy.custom import imagecopy
+        imagecopy(None, 'source-rg', 'img', ['eastus', 'westus2'], 'target-rg', cleanup=True)
+
+    @mock.patch('azext_imagecopy.custom.copy_to_target_locations',
+                side_effect=CLIError('Failed to copy the image to: eastus'))
+    def test_transient_resources_are_deleted_when_a_location_failed(self, _):
+        with self.assertRaises(CLIError):
+            self._imagecopy()
+
+        self.assertEqual(['group delete', 'snapshot revoke-access', 'snapshot delete'], self.commands[-3:])
+
+    @mock.patch('azext_imagecopy.custom.copy_to_target_locations', side_effect=KeyboardInterrupt)
+    def test_transient_resources_are_kept_when_cancelled(self, _):
+        self._imagecopy()
+
+        self.assertNotIn('snapshot revoke-access', self.commands)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,8 +5,11 @@
 
 import json
 import os
+import sys
 import yaml  # pylint: disable=import-error
 
+from six.moves import cPickle as pickle
+
 from azure.cli.core import MainCommandsLoader
 
 from knack.help import REQUIRED_TAG
@@ -63,6 +66,12 @@ class AzInteractiveCommandsLoader(MainCommandsLoader):  # pylint: disable=too-fe
                 loader._update_command_definitions()  # pylint: disable=protected-access
 
 
+COMMAND_TABLE_CACHE_FORMAT = 1
+MANIFEST_FILE_NAME = 'manifest.pkl'
+# the shard of commands and help entries that do not belong to exactly one command source
+OTHER_SHARD = '_other'
+
+
 # pylint: disable=too-few-public-methods
 class FreshTable(object):
     """
@@ -70,17 +79,17 @@ class FreshTable(object):
     as well as installs all the modules
     """
     loader = None
+    # whether loading the command table was skipped at start because the cache was up to date
+    loader_deferred = False
 
     def __init__(self, shell_ctx):
         self.shell_ctx = shell_ctx
 
-    def dump_command_table(self, shell_ctx=None):
-        """ dumps the command table """
+    def load_command_table(self, shell_ctx=None):
+        """ loads the command table with the arguments of every command """
         from azure.cli.core.commands.arm import register_global_subscription_argument, register_ids_argument
         from knack import events
-        import timeit
 
-        start_time = timeit.default_timer()
         shell_ctx = shell_ctx or self.shell_ctx
         main_loader = AzInteractiveCommandsLoader(shell_ctx.cli_ctx)
 
@@ -89,10 +98,46 @@ class FreshTable(object):
         register_global_subscription_argument(shell_ctx.cli_ctx)
         register_ids_argument(shell_ctx.cli_ctx)
         shell_ctx.cli_ctx.raise_event(events.EVENT_INVOKER_POST_CMD_TBL_CREATE, commands_loader=main_loader)
+        FreshTable.loader = main_loader
+        FreshTable.loader_deferred = False
+        return main_loader
+
+    def dump_command_table(self, shell_ctx=None):
+        """
+        dumps the parts of the command table whose command module or extension changed since the last dump,
+        returns whether the cache was updated
+        """
+        import timeit
+
+        start_time = timeit.default_timer()
+        shell_ctx = shell_ctx or self.shell_ctx
+        cache = CommandTableCache(shell_ctx.config)
+        sources = get_command_sources()
+        changed_sources = cache.get_changed_sources(sources)
+        if not changed_sources:
+            logger.debug('Command table cache is up to date')
+            FreshTable.loader_deferred = True
+            return False
+
+        main_loader = self.load_command_table(shell_ctx)
         cmd_table = main_loader.command_table
+        command_sources = {name: _get_command_source(main_loader, name, sources) for name in cmd_table}
+        group_sources = {}
+        for command_name, source in command_sources.items():
+            words = command_name.split()
+            for index in range(1, len(words)):
+                group_sources.setdefault(' '.join(words[:index]), set()).add(source)
+
+        def _get_entry_shard(name):
+            if name in command_sources:
+                return command_sources[name]
+            sources_of_group = group_sources.get(name, ())
+            return next(iter(sources_of_group)) if len(sources_of_group) == 1 else OTHER_SHARD
 
         cmd_table_data = {}
         for command_name, cmd in cmd_table.items():
+            if command_sources[command_name] not in changed_sources:
+                continue
 
             try:
                 command_description = cmd.description
@@ -102,14 +147,16 @@ class FreshTable(object):
                 # checking all the parameters for a single command
                 parameter_metadata = {}
                 for arg in cmd.arguments.values():
+                    # deprecated options are Deprecated objects, which can't be pickled, so keep their names
+                    option_names = [getattr(option, 'target', option) for option in arg.options_list]
                     options = {
-                        'name': [name for name in arg.options_list],
+                        'name': option_names,
                         'required': REQUIRED_TAG if arg.type.settings.get('required') else '',
                         'help': arg.type.settings.get('help') or ''
                     }
                     # the key is the first alias option
-                    if arg.options_list:
-                        parameter_metadata[arg.options_list[0]] = options
+                    if option_names:
+                        parameter_metadata[option_names[0]] = options
 
                 cmd_table_data[command_name] = {
                     'parameters': parameter_metadata,
@@ -119,20 +166,153 @@ class FreshTable(object):
             except (ImportError, ValueError):
                 pass
 
-        load_help_files(cmd_table_data)
+        load_help_files(cmd_table_data, include=lambda name: _get_entry_shard(name) in changed_sources)
+
+        shards = {source: {} for source in changed_sources}
+        for command_name, command_data in cmd_table_data.items():
+            shards[_get_entry_shard(command_name)][command_name] = command_data
+        cache.update(sources, shards)
+
         elapsed = timeit.default_timer() - start_time
-        logger.debug('Command table dumped: %s sec', elapsed)
-        FreshTable.loader = main_loader
+        logger.debug('Command table dumped for %d of %d sources: %s sec',
+                     len(changed_sources - {OTHER_SHARD}), len(sources), elapsed)
+        return True
+
+
+class CommandTableCache(object):
+    """
+    the command table cache, split into one shard per command module or extension so that only the
+    shards of the sources that changed since the last dump are regenerated
+    """
+
+    def __init__(self, config):
+        help_file_name, _ = os.path.splitext(config.get_help_files())
+        self.cache_dir = os.path.join(config.get_config_dir(), 'cache', help_file_name)
+        self.manifest = self._load(MANIFEST_FILE_NAME) or {}
+        if self.manifest.get('format') != _get_cache_format():
+            self.manifest = {}
+
+    def exists(self):
+        """ whether there is a complete cache """
+        return bool(self.manifest)
+
+    def get_changed_sources(self, sources):
+        """ gets the sources whose shard needs to be regenerated, including the shard shared by several sources """
+        cached_sources = self.manifest.get('sources', {})
+        changed = set(source for source, key in sources.items()
+                      if cached_sources.get(source) != key or not self._exists(_get_shard_file_name(source)))
+        if changed or set(cached_sources) != set(sources) or not self._exists(_get_shard_file_name(OTHER_SHARD)):
+            changed.add(OTHER_SHARD)
+        return changed
+
+    def load(self):
+        """ loads the command table data of all the shards """
+        data = {}
+        for source in list(self.manifest.get('sources', {})) + [OTHER_SHARD]:
+            shard = self._load(_get_shard_file_name(source))
+            if shard is None:
+                raise IOError('Missing command table cache for {}'.format(source))
+            data.update(shard)
+        return data
+
+    def update(self, sources, shards):
+        """ writes the regenerated shards and then the manifest of the sources they were generated from """
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        for source, shard in shards.items():
+            self._dump(_get_shard_file_name(source), shard)
+        for source in set(self.manifest.get('sources', {})) - set(sources):
+            try:
+                os.remove(os.path.join(self.cache_dir, _get_shard_file_name(source)))
+            except OSError:
+                pass
+        self.manifest = {'format': _get_cache_format(), 'sources': sources}
+        self._dump(MANIFEST_FILE_NAME, self.manifest)
+
+    def _exists(self, file_name):
+        return os.path.exists(os.path.join(self.cache_dir, file_name))
+
+    def _load(self, file_name):
+        try:
+            with open(os.path.join(self.cache_dir, file_name), 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except Exception:  # pylint: disable=broad-except
+            # a missing or unreadable shard is regenerated by the next dump
+            return None
+
+    def _dump(self, file_name, value):
+        temp_path = os.path.join(self.cache_dir, file_name + '.tmp')
+        with open(temp_path, 'wb') as cache_file:
+            pickle.dump(value, cache_file, pickle.HIGHEST_PROTOCOL)
+        # os.replace is not available in Python 2
+        getattr(os, 'replace', os.rename)(temp_path, os.path.join(self.cache_dir, file_name))
+
+
+def load_command_table_data(config):
+    """ loads the cached command table data, from the sharded cache or the json dump of earlier versions """
+    cache = CommandTableCache(config)
+    if cache.exists():
+        return cache.load()
+
+    cache_path = os.path.join(config.get_config_dir(), 'cache')
+    with open(os.path.join(cache_path, config.get_help_files()), 'r') as help_file:
+        return json.load(help_file)
+
+
+def get_command_sources():
+    """ gets a key for every installed command module and extension that changes when it is updated """
+    import pkgutil
+    from azure.cli.core import __version__ as core_version
+    from azure.cli.core.extension import get_extensions, get_extension_modname
+    import azure.cli.command_modules as command_modules
+
+    sources = {}
+    for finder, module_name, _ in pkgutil.iter_modules(command_modules.__path__):
+        module_path = os.path.join(getattr(finder, 'path', ''), module_name)
+        sources['azure.cli.command_modules.' + module_name] = _get_source_key(core_version, module_path)
+
+    for ext in get_extensions():
+        try:
+            ext_module_name = get_extension_modname(ext_dir=ext.path)
+        except Exception:  # pylint: disable=broad-except
+            continue
+        sources[ext_module_name] = _get_source_key(ext.version, os.path.join(ext.path, ext_module_name))
+    return sources
+
+
+def _get_source_key(version, path):
+    """ the version of a command source and the last modification time of its files """
+    try:
+        mtimes = [os.path.getmtime(path)] + [os.path.getmtime(os.path.join(path, file_name))
+                                             for file_name in os.listdir(path) if file_name.endswith('.py')]
+    except OSError:
+        return str(version)
+    return '{}:{}'.format(version, max(mtimes))
+
+
+def _get_command_source(main_loader, command_name, sources):
+    """ gets the command module or extension that a command was loaded from """
+    for loader in main_loader.cmd_to_loader_map.get(command_name, []):
+        module_name = type(loader).__module__
+        for source in sources:
+            if module_name == source or module_name.startswith(source + '.'):
+                return source
+    return OTHER_SHARD
 
-        # dump into the cache file
-        command_file = shell_ctx.config.get_help_files()
-        with open(os.path.join(get_cache_dir(shell_ctx), command_file), 'w') as help_file:
-            json.dump(cmd_table_data, help_file, default=lambda x: x.target or '', skipkeys=True)
 
+def _get_shard_file_name(source):
+    return source + '.pkl'
 
-def load_help_files(data):
-    """ loads all the extra information from help files """
+
+def _get_cache_format():
+    return [COMMAND_TABLE_CACHE_FORMAT] + list(sys.version_info[:2])
+
+
+def load_help_files(data, include=None):
+    """ loads all the extra information from help files, only for the entries accepted by include if it is given """
     for command_name, help_yaml in helps.items():
+        if include and not include(command_name):
+            continue
 
         help_entry = yaml.safe_load(help_yaml)
         try:
@@ -38,7 +38,7 @@ from . import VERSION
 from .az_completer import AzCompleter
 from .az_lexer import get_az_lexer, ExampleLexer, ToolbarLexer
 from .configuration import Configuration, SELECT_SYMBOL
-from .frequency_heuristic import DISPLAY_TIME, frequency_heuristic
+from .frequency_heuristic import DISPLAY_TIME, UsageStore, frequency_heuristic
 from .gather_commands import add_new_lines, GatherCommands
 from .key_bindings import InteractiveKeyBindings
 from .layout import LayoutManager
@@ -89,13 +89,14 @@ class AzInteractiveShell(object):
         self.config = Configuration(cli_ctx.config, style=style)
         self.config.set_style(style)
         self.style = style_factory(self.config.get_style())
+        self.usage = UsageStore(os.path.join(self.config.get_config_dir(), self.config.get_frequency()))
         try:
             gathered_commands = GatherCommands(self.config)
-            self.completer = completer or AzCompleter(self, gathered_commands)
+            self.completer = completer or AzCompleter(self, gathered_commands, usage=self.usage)
             self.completer.initialize_command_table_attributes()
             self.lexer = lexer or get_az_lexer(gathered_commands)
         except IOError:  # if there is no cache
-            self.completer = AzCompleter(self, None)
+            self.completer = AzCompleter(self, None, usage=self.usage)
             self.lexer = None
         self.history = history or FileHistory(os.path.join(self.config.get_config_dir(), self.config.get_history()))
         if os.environ.get(_ENV_ADDITIONAL_USER_AGENT):
@@ -205,6 +206,21 @@ class AzInteractiveShell(object):
             self.lexer = get_az_lexer(command_info)
         self._cli = None
 
+    def refresh_completions(self):
+        """ completes the current input again, e.g. when the dynamic completions for it arrived """
+        cli = self._cli
+        if cli is None or cli.eventloop is None:
+            return
+
+        def _restart_completion():
+            buffer = cli.current_buffer
+            if buffer.complete_state and buffer.complete_state.current_completion is None:
+                buffer.cancel_completion()
+            if not buffer.complete_state:
+                cli.start_completion()
+
+        cli.eventloop.call_from_executor(_restart_completion)
+
     def _space_examples(self, list_examples, rows, section_value):
         """ makes the example text """
         examples_with_index = []
@@ -677,6 +693,13 @@ class AzInteractiveShell(object):
         except SystemExit as ex:
             self.last_exit = int(ex.code)
 
+    def record_command_usage(self, cmd):
+        """ records which command was run, to rank the completions by how often they are used """
+        if self.completer and self.completer.command_tree:
+            tree, command, _ = self.completer.command_tree.get_sub_tree(parse_quotes(cmd))
+            if not tree.children:
+                self.usage.record_command(command)
+
     def progress_patch(self, _=False):
         """ forces to use the Shell Progress """
         from .progress import ShellProgressView
@@ -733,6 +756,7 @@ class AzInteractiveShell(object):
                 else:
                     telemetry.start()
                     self.cli_execute(cmd)
+                    self.record_command_usage(cmd)
                     if self.last_exit and self.last_exit != 0:
                         telemetry.set_failure()
                     else:
@@ -6,6 +6,9 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import os
+import threading
+import time
+from collections import OrderedDict
 
 from azure.cli.core.parser import AzCliCommandParser
 from azure.cli.core.commands.events import (
@@ -17,9 +20,15 @@ from prompt_toolkit.completion import Completer, Completion  # pylint: disable=i
 
 from . import configuration
 from .argfinder import ArgsFinder
+from .command_tree import PrefixIndex
 from .util import parse_quotes
 
 SELECT_SYMBOL = configuration.SELECT_SYMBOL
+# how long the results of an argument completer are reused, in seconds
+DYNAMIC_COMPLETION_TTL = 60
+# how long typing has to pause before an argument completer is called, in seconds
+DYNAMIC_COMPLETION_DEBOUNCE = 0.2
+DYNAMIC_COMPLETION_CACHE_SIZE = 128
 
 
 def error_pass(_, message):  # pylint: disable=unused-argument
@@ -34,16 +43,67 @@ def _check_value_muted(_, action, value):
         raise argparse.ArgumentError(action, msg)
 
 
-def sort_completions(completions_gen):
+def _call_completer(completer, prefix, parsed_args):
+    """ calls an argument completer in whichever of the 3 formats the cli uses it supports """
+    try:
+        return completer(prefix=prefix, action=None, parsed_args=parsed_args)
+    except TypeError:
+        try:
+            return completer(prefix=prefix)
+        except TypeError:
+            try:
+                return completer()
+            except TypeError:
+                return []  # other completion method used
+
+
+def _get_current_subscription():
+    from azure.cli.core._session import ACCOUNT
+    subscriptions = ACCOUNT.get('subscriptions') or []
+    return next((sub.get('id') for sub in subscriptions if sub.get('isDefault')), None)
+
+
+class DynamicCompletionCache(object):
+    """
+    the results of argument completers by subscription, command, argument and the other arguments typed,
+    reused until they expire
+    """
+    def __init__(self, ttl=DYNAMIC_COMPLETION_TTL, max_size=DYNAMIC_COMPLETION_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, prefix):
+        """
+        returns the cached completions for the prefix, or for the longest shorter prefix since those
+        include them, or None if there are none
+        """
+        now = time.time()
+        with self._lock:
+            for length in range(len(prefix), -1, -1):
+                entry = self._entries.get((key, prefix[:length]))
+                if entry and entry[0] > now:
+                    return entry[1]
+        return None
+
+    def set(self, key, prefix, completions):
+        with self._lock:
+            self._entries.pop((key, prefix), None)
+            self._entries[(key, prefix)] = (time.time() + self.ttl, completions)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+def sort_completions(completions_gen, get_usage_count=None):
     """ sorts the completions """
     from knack.help import REQUIRED_TAG
 
     def _get_weight(val):
-        """ weights the completions with required things first the lexicographically"""
-        priority = ''
-        if val.display_meta and val.display_meta.startswith(REQUIRED_TAG):
-            priority = ' '  # a space has the lowest ordinance
-        return priority + val.text
+        """ weights the completions with required things first, then the most used, then lexicographically """
+        required = bool(val.display_meta and val.display_meta.startswith(REQUIRED_TAG))
+        usage_count = get_usage_count(val) if get_usage_count else 0
+        return not required, -usage_count, val.text
 
     return sorted(completions_gen, key=_get_weight)
 
@@ -52,9 +112,11 @@ def sort_completions(completions_gen):
 class AzCompleter(Completer):
     """ Completes Azure CLI commands """
 
-    def __init__(self, shell_ctx, commands, global_params=True):
+    def __init__(self, shell_ctx, commands, global_params=True, usage=None):
         self.shell_ctx = shell_ctx
         self.started = False
+        # how often the commands were run, to rank their completions
+        self.usage = usage
 
         # dictionary of command to descriptions
         self.command_description = {}
@@ -69,6 +131,9 @@ class AzCompleter(Completer):
         self.command_examples = None
         # a dictionary of commands with parameters with multiple names (e.g. {'vm create':{-n: --name}})
         self.command_param_info = {}
+        # a dictionary of commands to the prefix index of their parameter names, built when first needed
+        self.command_param_index = {}
+        self.global_param_index = PrefixIndex()
 
         # information about what completions to generate
         self.current_command = ''
@@ -88,6 +153,9 @@ class AzCompleter(Completer):
         self.argsfinder = ArgsFinder(self.parser)
         self.cmdtab = {}
 
+        self.dynamic_completion_cache = DynamicCompletionCache()
+        self.dynamic_completion_thread = None
+
         if commands:
             self.start(commands, global_params=global_params)
 
@@ -102,12 +170,20 @@ class AzCompleter(Completer):
         self.param_description = commands.param_descript
         self.command_examples = commands.command_example
         self.command_param_info = commands.command_param_info or self.command_param_info
+        self.command_param_index = {}
 
         if global_params:
             self.global_param = commands.global_param
             self.output_choices = commands.output_choices
             self.output_options = commands.output_options
             self.global_param_descriptions = commands.global_param_descriptions
+            self.global_param_index = PrefixIndex(self.global_param)
+
+    def get_param_index(self, command):
+        """ returns the prefix index of the parameter names of a command """
+        if command not in self.command_param_index:
+            self.command_param_index[command] = PrefixIndex(self.command_param_info.get(command, {}))
+        return self.command_param_index[command]
 
     def initialize_command_table_attributes(self):
         from ._dump_commands import FreshTable
@@ -117,6 +193,22 @@ class AzCompleter(Completer):
             self.parser.load_command_table(loader)
             self.argsfinder = ArgsFinder(self.parser)
 
+    def load_deferred_command_table(self):
+        """ loads the command table for dynamic completions if it was not loaded at start as the cache was up to date """
+        from ._dump_commands import FreshTable
+        from .threads import LoadCommandTableThread
+        if FreshTable.loader_deferred:
+            FreshTable.loader_deferred = False
+            self.shell_ctx.command_table_thread = LoadCommandTableThread(
+                self.initialize_command_table_attributes, self.shell_ctx, dump=False)
+            self.shell_ctx.command_table_thread.start()
+
+    def get_usage_count(self, completion):
+        """ returns how many times the command or group a completion completes was run """
+        if not self.usage or completion.text.startswith('-'):
+            return 0
+        return self.usage.get_command_count((self.current_command + ' ' + completion.text).strip())
+
     def validate_param_completion(self, param, leftover_args):
         """ validates that a param should be completed """
         # validates param starts with unfinished word
@@ -171,15 +263,18 @@ class AzCompleter(Completer):
         self.shell_ctx.cli_ctx.raise_event(EVENT_INTERACTIVE_POST_SUB_TREE_CREATE, subtree=self.subtree)
         self.complete_command = not self.subtree.children
 
-        for comp in sort_completions(self.gen_cmd_and_param_completions()):
+        for comp in sort_completions(self.gen_cmd_and_param_completions(), self.get_usage_count):
             yield comp
 
         for comp in sort_completions(self.gen_global_params_and_arg_completions()):
             yield comp
 
-        if self.complete_command and self.cmdtab and self.leftover_args and self.leftover_args[-1].startswith('-'):
-            for comp in sort_completions(self.gen_dynamic_completions(text)):
-                yield comp
+        if self.complete_command and self.leftover_args and self.leftover_args[-1].startswith('-'):
+            if not self.cmdtab:
+                self.load_deferred_command_table()
+            else:
+                for comp in sort_completions(self.gen_dynamic_completions(text)):
+                    yield comp
 
     def gen_enum_completions(self, arg_name):
         """ generates dynamic enumeration completions """
@@ -220,10 +315,12 @@ class AzCompleter(Completer):
         AzCliCommandParser._check_value = _check_value
         return parse_args
 
-    # pylint: disable=too-many-branches
     def gen_dynamic_completions(self, text):
-        """ generates the dynamic values, like the names of resource groups """
-        try:  # pylint: disable=too-many-nested-blocks
+        """
+        generates the dynamic values, like the names of resource groups, from the cache and requests
+        the completer to be called in the background when they are not cached
+        """
+        try:
             param = self.leftover_args[-1]
 
             # command table specific name
@@ -232,24 +329,13 @@ class AzCompleter(Completer):
             for comp in self.gen_enum_completions(arg_name):
                 yield comp
 
-            parsed_args = self.mute_parse_args(text)
-
-            # there are 3 formats for completers the cli uses
-            # this try catches which format it is
-            if self.cmdtab[self.current_command].arguments[arg_name].completer:
-                completions = []
-                try:
-                    completions = self.cmdtab[self.current_command].arguments[arg_name].completer(
-                        prefix=self.unfinished_word, action=None, parsed_args=parsed_args)
-                except TypeError:
-                    try:
-                        completions = self.cmdtab[self.current_command].arguments[arg_name].completer(
-                            prefix=self.unfinished_word)
-                    except TypeError:
-                        try:
-                            completions = self.cmdtab[self.current_command].arguments[arg_name].completer()
-                        except TypeError:
-                            pass  # other completion method used
+            completer = self.cmdtab[self.current_command].arguments[arg_name].completer
+            if completer:
+                key = (_get_current_subscription(), self.current_command, arg_name, tuple(self.leftover_args[:-1]))
+                completions = self.dynamic_completion_cache.get(key, self.unfinished_word)
+                if completions is None:
+                    self.request_dynamic_completions(key, completer, text)
+                    completions = []
 
                 for comp in completions:
                     for completion in self.process_dynamic_completion(comp):
@@ -259,25 +345,46 @@ class AzCompleter(Completer):
         except Exception:  # pylint: disable=broad-except
             pass
 
+    def request_dynamic_completions(self, key, completer, text):
+        """ calls the completer in the background, then shows its completions if they are still wanted """
+        prefix = self.unfinished_word
+
+        def _complete():
+            return list(_call_completer(completer, prefix, self.mute_parse_args(text)))
+
+        def _on_complete(completions):
+            if completions is None:
+                return
+            self.dynamic_completion_cache.set(key, prefix, completions)
+            refresh_completions = getattr(self.shell_ctx, 'refresh_completions', None)
+            if refresh_completions:
+                refresh_completions()
+
+        if self.dynamic_completion_thread is None:
+            from .threads import DynamicCompletionThread
+            self.dynamic_completion_thread = DynamicCompletionThread(DYNAMIC_COMPLETION_DEBOUNCE)
+            self.dynamic_completion_thread.start()
+        self.dynamic_completion_thread.request((key, prefix), _complete, _on_complete)
+
     def yield_param_completion(self, param, last_word):
         """ yields a parameter """
-        return Completion(param, -len(last_word), display_meta=self.param_description.get(
+        # the completion menu shows the description on one line, so it does not need to be wrapped
+        return Completion(param, -len(last_word), display_meta=self.param_description.get_raw(
             self.current_command + " " + str(param), '').replace(os.linesep, ''))
 
     def gen_cmd_and_param_completions(self):
         """ generates command and parameter completions """
         if self.complete_command:
-            for param in self.command_param_info.get(self.current_command, []):
+            for param in self.get_param_index(self.current_command).get_words(self.unfinished_word):
                 if self.validate_param_completion(param, self.leftover_args):
                     yield self.yield_param_completion(param, self.unfinished_word)
         elif not self.leftover_args:
-            for child_command in self.subtree.children:
-                if self.validate_completion(child_command):
-                    yield Completion(child_command, -len(self.unfinished_word))
+            for child_command in self.subtree.get_children_with_prefix(self.unfinished_word):
+                yield Completion(child_command, -len(self.unfinished_word))
 
     def gen_global_params_and_arg_completions(self):
         # global parameters
-        for param in self.global_param:
+        for param in self.global_param_index.get_words(self.unfinished_word):
             if self.validate_param_completion(param, self.leftover_args) and self.unfinished_word:
                 if param in self.output_options and not self.complete_command:
                     continue
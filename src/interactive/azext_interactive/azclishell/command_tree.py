@@ -3,6 +3,28 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from bisect import bisect_left
+
+
+class PrefixIndex(object):
+    """ a sorted index of words for case insensitive prefix lookups """
+    def __init__(self, words=None):
+        self.keys = sorted((word.lower(), word) for word in set(words or []))
+
+    def get_words(self, prefix=''):
+        """ returns the words that start with the prefix, ignoring case, in sorted order """
+        prefix = prefix.lower()
+        words = []
+        for index in range(bisect_left(self.keys, (prefix,)), len(self.keys)):
+            key, word = self.keys[index]
+            if not key.startswith(prefix):
+                break
+            words.append(word)
+        return words
+
+    def __len__(self):
+        return len(self.keys)
+
 
 class CommandTree(object):
     """ a command tree """
@@ -12,6 +34,7 @@ class CommandTree(object):
             self.children = {}
         else:
             self.children = children
+        self._child_index = None
 
     def get_child(self, child_name):  # pylint: disable=no-self-use
         """ returns the object with the name supplied """
@@ -24,6 +47,13 @@ class CommandTree(object):
         """ adds a child to this branch """
         # TODO allow adding child_name
         self.children[child.data] = child
+        self._child_index = None
+
+    def get_children_with_prefix(self, prefix=''):
+        """ returns the names of the children that start with the prefix, ignoring case """
+        if self._child_index is None or len(self._child_index) != len(self.children):
+            self._child_index = PrefixIndex(self.children)
+        return self._child_index.get_words(prefix)
 
     def has_child(self, name):
         """ whether this has a child """
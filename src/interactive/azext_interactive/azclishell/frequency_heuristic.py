@@ -6,10 +6,19 @@
 import os
 import datetime
 import json
+import threading
 
 DAYS_AGO = 28
 ACTIVE_STATUS = 5
 DISPLAY_TIME = 20
+# how long the usage of a command counts towards ranking its completions, in days
+COMMAND_RETENTION_DAYS = 90
+MAX_COMMANDS = 1000
+# the usage log is compacted once it has this many more records than it would after compaction
+COMPACT_THRESHOLD = 200
+
+_DAY_RECORD = 'day'
+_COMMAND_RECORD = 'command'
 
 
 def day_format(now):
@@ -17,37 +26,169 @@ def day_format(now):
     return now.strftime("%Y-%m-%d")
 
 
-def update_frequency(shell_ctx):
-    """ updates the frequency from files """
+class UsageStore(object):
+    """
+    how many times the shell was started per day and how many times each command was run, kept in a log
+    that usage is appended to and that is compacted, dropping the expired usage, once it grew long enough
+    """
+    def __init__(self, path):
+        self.path = path
+        self.days = {}
+        # command to [count, last day used]
+        self.commands = {}
+        # command or group to the number of times it or the commands under it were run
+        self.command_counts = {}
+        self._records = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, now=None):
+        """ reads the usage that is not expired yet """
+        now = now or datetime.datetime.utcnow()
+        self.days = {}
+        self.commands = {}
+        self._records = 0
+        legacy = False
+        try:
+            with open(self.path, 'r') as usage_file:
+                for line in usage_file:
+                    if not line.strip():
+                        continue
+                    self._records += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict):  # the days of the single JSON object written by older versions
+                        legacy = True
+                        for day, count in record.items():
+                            self._add_day(day, count)
+                    elif isinstance(record, list) and record:
+                        if record[0] == _DAY_RECORD and len(record) == 3:
+                            self._add_day(record[1], record[2])
+                        elif record[0] == _COMMAND_RECORD and len(record) == 4:
+                            self._add_command(record[1], record[2], record[3])
+        except (IOError, OSError):
+            pass
+
+        self._expire(now)
+        self._loaded = True
+        if legacy or self._records > len(self.days) + len(self.commands) + COMPACT_THRESHOLD:
+            self.compact()
+
+    def _add_day(self, day, count):
+        try:
+            self.days[day] = self.days.get(day, 0) + int(count)
+        except (TypeError, ValueError):
+            pass
+
+    def _add_command(self, command, count, day):
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            return
+        usage = self.commands.setdefault(command, [0, day])
+        usage[0] += count
+        usage[1] = max(usage[1], day)
+
+    def _expire(self, now):
+        oldest_day = day_format(now - datetime.timedelta(days=DAYS_AGO - 1))
+        self.days = {day: count for day, count in self.days.items() if day >= oldest_day}
+
+        oldest_command_day = day_format(now - datetime.timedelta(days=COMMAND_RETENTION_DAYS - 1))
+        commands = sorted(((command, usage) for command, usage in self.commands.items()
+                           if usage[1] >= oldest_command_day), key=lambda item: -item[1][0])
+        self.commands = dict(commands[:MAX_COMMANDS])
+
+        self.command_counts = {}
+        for command, usage in self.commands.items():
+            self._count_command(command, usage[0])
+
+    def _count_command(self, command, count):
+        words = command.split()
+        for index in range(1, len(words) + 1):
+            prefix = ' '.join(words[:index])
+            self.command_counts[prefix] = self.command_counts.get(prefix, 0) + count
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _append(self, record):
+        try:
+            with open(self.path, 'a') as usage_file:
+                usage_file.write(json.dumps(record) + '\n')
+            self._records += 1
+        except (IOError, OSError):
+            pass
+
+    def compact(self):
+        """ rewrites the log with one record per day and command """
+        lines = [json.dumps([_DAY_RECORD, day, count]) + '\n' for day, count in sorted(self.days.items())]
+        lines.extend(json.dumps([_COMMAND_RECORD, command, count, day]) + '\n'
+                     for command, (count, day) in sorted(self.commands.items()))
+        temp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        try:
+            with open(temp_path, 'w') as usage_file:
+                usage_file.writelines(lines)
+            getattr(os, 'replace', os.rename)(temp_path, self.path)
+            self._records = len(lines)
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def record_start(self, now=None):
+        """ records that the shell was started """
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            self._ensure_loaded()
+            day = day_format(now)
+            self._add_day(day, 1)
+            self._append([_DAY_RECORD, day, 1])
+
+    def record_command(self, command, now=None):
+        """ records that a command was run """
+        if not command:
+            return
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            self._ensure_loaded()
+            day = day_format(now)
+            self._add_command(command, 1, day)
+            self._count_command(command, 1)
+            self._append([_COMMAND_RECORD, command, 1, day])
+
+    def get_command_count(self, command):
+        """ returns how many times a command, or the commands in a group, were run """
+        if not self._loaded:
+            with self._lock:
+                self._ensure_loaded()
+        return self.command_counts.get(command, 0)
+
+
+def get_usage_store(shell_ctx):
+    """ returns the usage store of the shell, or one for its frequency file """
     frequency_path = os.path.join(shell_ctx.config.get_config_dir(), shell_ctx.config.get_frequency())
-    if os.path.exists(frequency_path):
-        with open(frequency_path, 'r') as freq:
-            try:
-                frequency = json.load(freq)
-            except ValueError:
-                frequency = {}
-    else:
-        frequency = {}
+    usage = getattr(shell_ctx, 'usage', None)
+    if isinstance(usage, UsageStore) and usage.path == frequency_path:
+        return usage
+    return UsageStore(frequency_path)
 
-    with open(frequency_path, 'w') as freq:
-        now = day_format(datetime.datetime.utcnow())
-        val = frequency.get(now)
-        frequency[now] = val + 1 if val else 1
-        json.dump(frequency, freq)
 
-    return frequency
+def update_frequency(shell_ctx):
+    """ updates the frequency from files """
+    usage = get_usage_store(shell_ctx)
+    usage.record_start()
+    return usage.days
 
 
 def frequency_measurement(shell_ctx):
     """ measures how many times a user has used this program in the last calendar week """
     freq = update_frequency(shell_ctx)
-    count = 0
     base = datetime.datetime.utcnow()
-    date_list = [base - datetime.timedelta(days=x) for x in range(0, DAYS_AGO)]
-    for day in date_list:
-        count += 1 if freq.get(day_format(day), 0) > 0 else 0
-
-    return count
+    oldest_day = day_format(base - datetime.timedelta(days=DAYS_AGO - 1))
+    today = day_format(base)
+    return sum(1 for day, count in freq.items() if oldest_day <= day <= today and count > 0)
 
 
 def frequency_heuristic(shell_ctx):
@@ -4,8 +4,12 @@
 # --------------------------------------------------------------------------------------------
 
 import math
-import os
-import json
+from collections import OrderedDict
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping  # pylint: disable=deprecated-class
+from six.moves import intern  # pylint: disable=redefined-builtin
 from knack.log import get_logger
 
 from .command_tree import CommandBranch, CommandHead
@@ -25,6 +29,8 @@ GLOBAL_PARAM_DESCRIPTIONS = {
 OUTPUT_CHOICES = ['json', 'tsv', 'table', 'jsonc']
 OUTPUT_OPTIONS = ['--output', '-o']
 GLOBAL_PARAM = list(GLOBAL_PARAM_DESCRIPTIONS.keys())
+# how many of the most recently shown help texts are kept wrapped to the terminal width
+WRAPPED_HELP_CACHE_SIZE = 512
 
 
 def _get_window_columns():
@@ -68,6 +74,100 @@ def add_new_lines(long_phrase, line_min=None, tolerance=TOLERANCE):
     return long_phrase + "\n"
 
 
+_wrapped_help_cache = OrderedDict()
+
+
+def wrap_help_text(text):
+    """ adds newlines to help text to fit the current terminal width, caching the most recently used text """
+    if text is None:
+        return text
+    key = (text, int(_get_window_columns()) - 2 * TOLERANCE)
+    try:
+        wrapped = _wrapped_help_cache.pop(key)
+    except KeyError:
+        wrapped = add_new_lines(text, line_min=key[1])
+        if len(_wrapped_help_cache) >= WRAPPED_HELP_CACHE_SIZE:
+            _wrapped_help_cache.popitem(last=False)
+    _wrapped_help_cache[key] = wrapped
+    return wrapped
+
+
+def _intern_text(text):
+    return intern(text) if isinstance(text, str) else text
+
+
+class HelpText(Mapping):
+    """ the raw help text of commands, only wrapped to the terminal width when it is looked up """
+    def __init__(self):
+        self._raw = {}
+
+    def __setitem__(self, key, text):
+        self._raw[_intern_text(key)] = _intern_text(text)
+
+    def __getitem__(self, key):
+        return wrap_help_text(self._raw[key])
+
+    def __contains__(self, key):
+        return key in self._raw
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def get_raw(self, key, default=None):
+        """ returns the help text as it was stored """
+        return self._raw.get(key, default)
+
+
+class ParamHelpText(HelpText):
+    """
+    the raw help text of parameters keyed by the command and parameter name separated by a space,
+    stored per command so that the aliases of a parameter share the same text
+    """
+    def __setitem__(self, key, text):
+        command, _, param = key.rpartition(' ')
+        self._raw.setdefault(_intern_text(command), {})[_intern_text(param)] = _intern_text(text)
+
+    def __getitem__(self, key):
+        return wrap_help_text(self._get(key))
+
+    def __contains__(self, key):
+        try:
+            self._get(key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for command, params in self._raw.items():
+            for param in params:
+                yield command + ' ' + param
+
+    def __len__(self):
+        return sum(len(params) for params in self._raw.values())
+
+    def get_raw(self, key, default=None):
+        try:
+            return self._get(key)
+        except KeyError:
+            return default
+
+    def _get(self, key):
+        command, _, param = key.rpartition(' ')
+        return self._raw[command][param]
+
+
+class ExampleText(HelpText):
+    """ the raw examples of commands, only wrapped to the terminal width when they are looked up """
+    def __setitem__(self, key, examples):
+        self._raw[_intern_text(key)] = [(_intern_text(name), _intern_text(text)) for name, text in examples]
+
+    def __getitem__(self, key):
+        return [[wrap_help_text(name), wrap_help_text(text)] for name, text in self._raw[key]]
+
+
 # pylint: disable=too-many-instance-attributes
 class GatherCommands(object):
     """ grabs all the cached commands from files """
@@ -75,14 +175,14 @@ class GatherCommands(object):
         # everything that is completable
         self.completable = []
         # a completable to the description of what is does
-        self.descrip = {}
+        self.descrip = HelpText()
         # from a command to a list of parameters
         self.command_param = {}
 
         self.completable_param = []
-        self.command_example = {}
+        self.command_example = ExampleText()
         self.command_tree = CommandHead()
-        self.param_descript = {}
+        self.param_descript = ParamHelpText()
         self.completer = None
         self.command_param_info = {}
 
@@ -112,34 +212,28 @@ class GatherCommands(object):
 
     def _gather_from_files(self, config):
         """ gathers from the files in a way that is convienent to use """
-        command_file = config.get_help_files()
-        cache_path = os.path.join(config.get_config_dir(), 'cache')
-        cols = _get_window_columns()
+        from ._dump_commands import load_command_table_data
 
-        with open(os.path.join(cache_path, command_file), 'r') as help_file:
-            data = json.load(help_file)
+        data = load_command_table_data(config)
         self.add_exit()
         commands = data.keys()
+        completable = set(self.completable)
+        completable_param = set()
 
         for command in commands:
             branch = self.command_tree
             for word in command.split():
-                if word not in self.completable:
+                if word not in completable:
+                    completable.add(word)
                     self.completable.append(word)
                 if not branch.has_child(word):
                     branch.add_child(CommandBranch(word))
                 branch = branch.get_child(word)
 
-            description = data[command]['help']
-            self.descrip[command] = add_new_lines(description, line_min=int(cols) - 2 * TOLERANCE)
+            self.descrip[command] = data[command]['help']
 
             if 'examples' in data[command]:
-                examples = []
-                for example in data[command]['examples']:
-                    examples.append([
-                        add_new_lines(example[0], line_min=int(cols) - 2 * TOLERANCE),
-                        add_new_lines(example[1], line_min=int(cols) - 2 * TOLERANCE)])
-                self.command_example[command] = examples
+                self.command_example[command] = data[command]['examples']
 
             command_params = data[command].get('parameters', {})
             for param in command_params:
@@ -150,11 +244,9 @@ class GatherCommands(object):
                         param_aliases.add(par)
 
                         self.param_descript[command + " " + par] = \
-                            add_new_lines(
-                                command_params[param]['required'] +
-                                " " + command_params[param]['help'],
-                                line_min=int(cols) - 2 * TOLERANCE)
-                        if par not in self.completable_param:
+                            command_params[param]['required'] + " " + command_params[param]['help']
+                        if par not in completable_param:
+                            completable_param.add(par)
                             self.completable_param.append(par)
 
                     param_doubles = self.command_param_info.get(command, {})
@@ -165,9 +257,10 @@ class GatherCommands(object):
     def get_all_subcommands(self):
         """ returns all the subcommands """
         subcommands = []
+        seen = set()
         for command in self.descrip:
             for word in command.split():
-                for kid in self.command_tree.children:
-                    if word != kid and word not in subcommands:
-                        subcommands.append(word)
+                if word not in seen and any(word != kid for kid in self.command_tree.children):
+                    seen.add(word)
+                    subcommands.append(word)
         return subcommands
@@ -4,21 +4,71 @@
 # --------------------------------------------------------------------------------------------
 
 import threading
+import time
 
 
 class LoadCommandTableThread(threading.Thread):
     """ a thread that loads the command table """
-    def __init__(self, target, shell):
+    def __init__(self, target, shell, dump=True):
         super(LoadCommandTableThread, self).__init__()
         self.initialize_function = target
         self.shell = shell
+        # whether to update the command table cache, or only load the command table
+        self.dump = dump
         self.daemon = True
 
     def run(self):
         from ._dump_commands import FreshTable
 
         try:
-            FreshTable(self.shell).dump_command_table(self.shell)
-            self.initialize_function()
+            if not self.dump:
+                FreshTable(self.shell).load_command_table(self.shell)
+                self.initialize_function()
+            elif FreshTable(self.shell).dump_command_table(self.shell):
+                self.initialize_function()
         except KeyboardInterrupt:
             pass
+
+
+class DynamicCompletionThread(threading.Thread):
+    """ a thread that runs the most recently requested dynamic completion once typing pauses """
+    def __init__(self, debounce):
+        super(DynamicCompletionThread, self).__init__()
+        self.debounce = debounce
+        self.daemon = True
+        self._condition = threading.Condition()
+        self._request = None
+        self._requested_at = 0
+        self._running_key = None
+
+    def request(self, key, complete, callback):
+        """ replaces the pending request, unless the same completion is already pending or running """
+        with self._condition:
+            if key == self._running_key or (self._request and self._request[0] == key):
+                return
+            self._request = (key, complete, callback)
+            self._requested_at = time.time()
+            self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._request is None:
+                    self._condition.wait()
+                # wait until no newer request arrived for the debounce interval
+                remaining = self._requested_at + self.debounce - time.time()
+                while remaining > 0:
+                    self._condition.wait(remaining)
+                    remaining = self._requested_at + self.debounce - time.time()
+                key, complete, callback = self._request
+                self._request = None
+                self._running_key = key
+
+            try:
+                completions = complete()
+            except Exception:  # pylint: disable=broad-except
+                # e.g. the user isn't logged in
+                completions = None
+            with self._condition:
+                self._running_key = None
+            callback(completions)
@@ -0,0 +1,99 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import timeit
+import unittest
+import mock
+
+from prompt_toolkit.document import Document
+
+from azext_interactive.azclishell.az_completer import AzCompleter
+from azext_interactive.azclishell.command_tree import PrefixIndex
+from azext_interactive.azclishell.gather_commands import GatherCommands
+
+# keystrokes recorded from an interactive session, replayed one character at a time
+RECORDED_INPUT = [
+    'group12 subgroup3 command4 --param-7 value --par',
+    'grou',
+    'group49 subgroup9 ',
+    'group0 subgroup0 command0 -',
+    'GROUP7 SUB',
+]
+
+
+def _get_command_table_data(groups=50, subgroups=10, commands=5, params=10):
+    """ the cached command table data of a CLI with groups * subgroups * commands commands """
+    data = {}
+    for group in range(groups):
+        data['group{}'.format(group)] = {'help': 'Group {}'.format(group)}
+        for subgroup in range(subgroups):
+            data['group{} subgroup{}'.format(group, subgroup)] = {'help': 'Subgroup {}'.format(subgroup)}
+            for command in range(commands):
+                data['group{} subgroup{} command{}'.format(group, subgroup, command)] = {
+                    'help': 'Command {}'.format(command),
+                    'examples': [['Example', 'az group{} subgroup{} command{}'.format(group, subgroup, command)]],
+                    'parameters': {
+                        '--param-{}'.format(param): {
+                            'name': ['--param-{}'.format(param), '-p{}'.format(param)],
+                            'required': '',
+                            'help': 'Parameter {}'.format(param)
+                        } for param in range(params)
+                    }
+                }
+    return data
+
+
+class PrefixIndexTest(unittest.TestCase):
+
+    def test_get_words(self):
+        index = PrefixIndex(['vm', 'vmss', 'storage', 'Network', 'vm'])
+        self.assertEqual(['vm', 'vmss'], index.get_words('vm'))
+        self.assertEqual(['vm', 'vmss'], index.get_words('VM'))
+        self.assertEqual(['Network'], index.get_words('net'))
+        self.assertEqual(['Network', 'storage', 'vm', 'vmss'], index.get_words())
+        self.assertEqual([], index.get_words('x'))
+
+
+class CompletionLatencyTest(unittest.TestCase):
+
+    def setUp(self):
+        data = _get_command_table_data()
+        with mock.patch('azext_interactive.azclishell._dump_commands.load_command_table_data', return_value=data), \
+                mock.patch('azext_interactive.azclishell.gather_commands._get_window_columns', return_value=120):
+            commands = GatherCommands(mock.MagicMock())
+        shell_ctx = mock.MagicMock()
+        shell_ctx.default_command = ''
+        self.completer = AzCompleter(shell_ctx, commands)
+
+    def _get_completions(self, text):
+        return [completion.text for completion in self.completer.get_completions(Document(text), None)]
+
+    def test_completions(self):
+        self.assertEqual(['group1', 'group10', 'group11', 'group12', 'group13', 'group14', 'group15', 'group16',
+                          'group17', 'group18', 'group19'], self._get_completions('group1'))
+        self.assertEqual(['subgroup3'], self._get_completions('group12 subgroup3'))
+        self.assertEqual(['subgroup{}'.format(i) for i in range(10)], self._get_completions('group7 SUB'))
+        self.assertEqual(['--param-1'], self._get_completions('group12 subgroup3 command4 --param-1'))
+        self.assertNotIn('--param-7', self._get_completions('group12 subgroup3 command4 --param-7 value --par'))
+        self.assertEqual([], self._get_completions('group12 subgroup3 command4 --param-7 value --x'))
+
+    def test_keystroke_latency(self):
+        latencies = []
+        for line in RECORDED_INPUT:
+            for index in range(1, len(line) + 1):
+                start = timeit.default_timer()
+                self._get_completions(line[:index])
+                latencies.append(timeit.default_timer() - start)
+
+        latencies.sort()
+        median = latencies[len(latencies) // 2]
+        worst = latencies[-1]
+        print('\nCompletion latency over {} keystrokes: median {:.3f}ms, max {:.3f}ms'.format(
+            len(latencies), median * 1000, worst * 1000))
+        self.assertLess(median, 0.001)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+
+from knack.deprecation import Deprecated
+
+from azext_interactive.azclishell._dump_commands import FreshTable, CommandTableCache, load_command_table_data
+
+
+VM_SOURCE = 'azure.cli.command_modules.vm'
+ALIAS_SOURCE = 'azext_alias'
+
+HELPS = {
+    'vm': """
+        type: group
+        short-summary: Manage Linux or Windows virtual machines.
+        """,
+    'vm create': """
+        type: command
+        short-summary: Create an Azure Virtual Machine.
+        examples:
+          - name: Create a VM.
+            text: az vm create -n MyVm -g MyResourceGroup --image UbuntuLTS
+        """,
+    'alias': """
+        type: group
+        short-summary: Manage Azure CLI Aliases.
+        """
+}
+
+
+class MockConfig(object):
+    def __init__(self, config_dir):
+        self.config_dir = config_dir
+
+    def get_help_files(self):
+        return 'help_dump.json'
+
+    def get_config_dir(self):
+        return self.config_dir
+
+
+class MockShell(object):  # pylint: disable=too-few-public-methods
+    def __init__(self, config):
+        self.config = config
+        self.cli_ctx = None
+
+
+class MockCommand(object):  # pylint: disable=too-few-public-methods
+    def __init__(self, description, arguments=None):
+        self.description = description
+        self.arguments = arguments or {}
+
+
+class MockArgument(object):  # pylint: disable=too-few-public-methods
+    def __init__(self, options_list, **settings):
+        self.options_list = options_list
+        self.type = mock.Mock(settings=settings)
+
+
+def _mock_loader(commands, arguments=None):
+    """ a commands loader whose commands are loaded by command loaders of the given modules """
+    loader = mock.MagicMock()
+    loader.command_table = {}
+    loader.cmd_to_loader_map = {}
+    for command_name, (module_name, description) in commands.items():
+        loader.command_table[command_name] = MockCommand(description, (arguments or {}).get(command_name))
+        loader.cmd_to_loader_map[command_name] = [type('CommandsLoader', (object,), {'__module__': module_name})()]
+    return loader
+
+
+class DumpCommandsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.shell = MockShell(MockConfig(self.config_dir))
+        self.patchers = [mock.patch('azext_interactive.azclishell._dump_commands.helps', HELPS)]
+        for patcher in self.patchers:
+            patcher.start()
+        FreshTable.loader_deferred = False
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.config_dir)
+
+    def _dump(self, sources, commands, arguments=None):
+        loader = _mock_loader(commands, arguments)
+        with mock.patch('azext_interactive.azclishell._dump_commands.get_command_sources', return_value=sources), \
+                mock.patch.object(FreshTable, 'load_command_table', return_value=loader) as load_command_table:
+            dumped = FreshTable(self.shell).dump_command_table(self.shell)
+        return dumped, load_command_table.called
+
+    def test_dump_command_table(self):
+        sources = {VM_SOURCE: '2.0.0', ALIAS_SOURCE: '0.5.2'}
+        commands = {'vm create': (VM_SOURCE, 'Create a VM'), 'alias create': (ALIAS_SOURCE, 'Create an alias')}
+        self.assertEqual((True, True), self._dump(sources, commands))
+
+        data = load_command_table_data(self.shell.config)
+        self.assertEqual({'vm', 'vm create', 'alias', 'alias create'}, set(data))
+        self.assertEqual('Create an Azure Virtual Machine.', data['vm create']['help'])
+        self.assertEqual([['Create a VM.', 'az vm create -n MyVm -g MyResourceGroup --image UbuntuLTS']],
+                         data['vm create']['examples'])
+        self.assertEqual('Create an alias', data['alias create']['help'])
+        self.assertEqual({'help': 'Manage Azure CLI Aliases.'}, data['alias'])
+
+    def test_dump_command_table_deprecated_options(self):
+        cli_ctx = mock.Mock()
+        cli_ctx.get_cli_version.return_value = '2.0.0'
+        arguments = {'vm create': {
+            'name': MockArgument(['--name', '-n'], required=True, help='The name of the VM.'),
+            'size': MockArgument([Deprecated(cli_ctx, object_type='option', target='--vm-size', redirect='--size'),
+                                  '--size'], help='The VM size.')
+        }}
+        commands = {'vm create': (VM_SOURCE, 'Create a VM')}
+        self.assertEqual((True, True), self._dump({VM_SOURCE: '2.0.0'}, commands, arguments))
+
+        parameters = load_command_table_data(self.shell.config)['vm create']['parameters']
+        self.assertEqual({'--name', '--vm-size'}, set(parameters))
+        self.assertEqual(['--vm-size', '--size'], parameters['--vm-size']['name'])
+        self.assertEqual(['--name', '-n'], parameters['--name']['name'])
+
+    def test_dump_command_table_skipped_when_unchanged(self):
+        sources = {VM_SOURCE: '2.0.0', ALIAS_SOURCE: '0.5.2'}
+        commands = {'vm create': (VM_SOURCE, 'Create a VM'), 'alias create': (ALIAS_SOURCE, 'Create an alias')}
+        self._dump(sources, commands)
+
+        self.assertEqual((False, False), self._dump(sources, commands))
+        self.assertTrue(FreshTable.loader_deferred)
+
+    def test_dump_command_table_regenerates_changed_sources(self):
+        commands = {'vm create': (VM_SOURCE, 'Create a VM'), 'alias create': (ALIAS_SOURCE, 'Create an alias')}
+        self._dump({VM_SOURCE: '2.0.0', ALIAS_SOURCE: '0.5.2'}, commands)
+
+        commands = {'vm create': (VM_SOURCE, 'Create a VM'), 'alias create': (ALIAS_SOURCE, 'Create an alias'),
+                    'alias list': (ALIAS_SOURCE, 'List the aliases')}
+        with mock.patch('azext_interactive.azclishell._dump_commands.yaml.safe_load') as safe_load:
+            safe_load.return_value = {'type': 'group', 'short-summary': 'Manage Azure CLI Aliases.'}
+            self.assertEqual((True, True), self._dump({VM_SOURCE: '2.0.0', ALIAS_SOURCE: '0.5.3'}, commands))
+            # only the help of the changed extension is parsed again
+            self.assertEqual([mock.call(HELPS['alias'])], safe_load.call_args_list)
+
+        data = load_command_table_data(self.shell.config)
+        self.assertEqual({'vm', 'vm create', 'alias', 'alias create', 'alias list'}, set(data))
+        self.assertEqual('Create an Azure Virtual Machine.', data['vm create']['help'])
+
+    def test_dump_command_table_removes_uninstalled_sources(self):
+        commands = {'vm create': (VM_SOURCE, 'Create a VM'), 'alias create': (ALIAS_SOURCE, 'Create an alias')}
+        self._dump({VM_SOURCE: '2.0.0', ALIAS_SOURCE: '0.5.2'}, commands)
+
+        commands = {'vm create': (VM_SOURCE, 'Create a VM')}
+        self.assertEqual((True, True), self._dump({VM_SOURCE: '2.0.0'}, commands))
+
+        data = load_command_table_data(self.shell.config)
+        self.assertIn('vm create', data)
+        self.assertNotIn('alias create', data)
+        self.assertFalse(os.path.exists(os.path.join(CommandTableCache(self.shell.config).cache_dir,
+                                                     ALIAS_SOURCE + '.pkl')))
+
+    def test_dump_command_table_after_missing_shard(self):
+        sources = {VM_SOURCE: '2.0.0', ALIAS_SOURCE: '0.5.2'}
+        commands = {'vm create': (VM_SOURCE, 'Create a VM'), 'alias create': (ALIAS_SOURCE, 'Create an alias')}
+        self._dump(sources, commands)
+        os.remove(os.path.join(CommandTableCache(self.shell.config).cache_dir, VM_SOURCE + '.pkl'))
+
+        self.assertEqual({VM_SOURCE, '_other'}, CommandTableCache(self.shell.config).get_changed_sources(sources))
+        self.assertEqual((True, True), self._dump(sources, commands))
+        self.assertIn('vm create', load_command_table_data(self.shell.config))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+import unittest
+import mock
+
+from prompt_toolkit.document import Document
+
+from azext_interactive.azclishell.az_completer import AzCompleter, DynamicCompletionCache
+from azext_interactive.azclishell.gather_commands import GatherCommands
+from azext_interactive.azclishell.threads import DynamicCompletionThread
+
+COMMAND_TABLE_DATA = {
+    'vm show': {
+        'help': 'Show a VM',
+        'parameters': {
+            '--resource-group': {'name': ['--resource-group', '-g'], 'required': '', 'help': 'Resource group'},
+            '--name': {'name': ['--name', '-n'], 'required': '', 'help': 'VM name'}
+        }
+    }
+}
+
+
+class MockArgument(object):  # pylint: disable=too-few-public-methods
+    def __init__(self, options_list, completer=None):
+        self.options_list = options_list
+        self.completer = completer
+        self.choices = None
+
+
+class DynamicCompletionCacheTest(unittest.TestCase):
+
+    def test_get_cached_completions(self):
+        cache = DynamicCompletionCache()
+        cache.set('key', 'my', ['myrg', 'myrg2'])
+        self.assertEqual(['myrg', 'myrg2'], cache.get('key', 'my'))
+        # completions for a shorter prefix include the ones for the longer prefix
+        self.assertEqual(['myrg', 'myrg2'], cache.get('key', 'myrg'))
+        self.assertIsNone(cache.get('key', 'm'))
+        self.assertIsNone(cache.get('other', 'my'))
+
+    def test_cached_completions_expire(self):
+        cache = DynamicCompletionCache(ttl=0.01)
+        cache.set('key', '', ['myrg'])
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('key', ''))
+
+    def test_cache_size_is_bounded(self):
+        cache = DynamicCompletionCache(max_size=2)
+        for key in ['a', 'b', 'c']:
+            cache.set(key, '', [key])
+        self.assertIsNone(cache.get('a', ''))
+        self.assertEqual(['c'], cache.get('c', ''))
+
+
+class DynamicCompletionThreadTest(unittest.TestCase):
+
+    def test_only_the_last_request_is_completed(self):
+        thread = DynamicCompletionThread(debounce=0.05)
+        thread.start()
+        completed = []
+        done = threading.Event()
+
+        def _on_complete(completions):
+            completed.append(completions)
+            done.set()
+
+        for prefix in ['m', 'my', 'myr']:
+            thread.request(prefix, lambda p=prefix: [p + 'g'], _on_complete)
+            time.sleep(0.01)
+
+        self.assertTrue(done.wait(5))
+        time.sleep(0.1)
+        self.assertEqual([['myrg']], completed)
+
+
+class DynamicCompletionTest(unittest.TestCase):
+
+    def setUp(self):
+        with mock.patch('azext_interactive.azclishell._dump_commands.load_command_table_data',
+                        return_value=COMMAND_TABLE_DATA):
+            commands = GatherCommands(mock.MagicMock())
+        self.refreshed = threading.Event()
+        shell_ctx = mock.MagicMock()
+        shell_ctx.default_command = ''
+        shell_ctx.refresh_completions.side_effect = self.refreshed.set
+        self.completer = AzCompleter(shell_ctx, commands)
+        self.completer.mute_parse_args = mock.MagicMock(return_value=None)
+
+        self.resource_group_completer = mock.MagicMock(return_value=['myrg', 'myrg2', 'otherrg'])
+        command = mock.MagicMock()
+        command.arguments = {
+            'resource_group_name': MockArgument(['--resource-group', '-g'], self.resource_group_completer),
+            'name': MockArgument(['--name', '-n'])
+        }
+        self.completer.cmdtab = {'vm show': command}
+
+        self.patchers = [
+            mock.patch('azext_interactive.azclishell.az_completer.DYNAMIC_COMPLETION_DEBOUNCE', 0.01),
+            mock.patch('azext_interactive.azclishell.az_completer._get_current_subscription', return_value='sub')
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def _get_completions(self, text):
+        return [completion.text for completion in self.completer.get_completions(Document(text), None)]
+
+    def test_dynamic_completions_are_completed_in_background(self):
+        # the first completion does not wait for the completer
+        self.assertEqual([], self._get_completions('vm show -g '))
+        self.assertTrue(self.refreshed.wait(5))
+        self.assertEqual(['myrg', 'myrg2', 'otherrg'], self._get_completions('vm show -g '))
+        # typing more of the value reuses the completions
+        self.assertEqual(['myrg', 'myrg2'], self._get_completions('vm show -g my'))
+        self.assertEqual(1, self.resource_group_completer.call_count)
+
+    def test_dynamic_completions_depend_on_context(self):
+        self._get_completions('vm show -g ')
+        self.assertTrue(self.refreshed.wait(5))
+        self.refreshed.clear()
+
+        self.assertEqual([], self._get_completions('vm show -n myvm -g '))
+        self.assertTrue(self.refreshed.wait(5))
+        self.assertEqual(2, self.resource_group_completer.call_count)
+
+    def test_no_dynamic_completions_without_completer(self):
+        self.assertEqual([], self._get_completions('vm show -n '))
+        self.assertIsNone(self.completer.dynamic_completion_thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
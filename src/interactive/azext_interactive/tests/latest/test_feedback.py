@@ -5,10 +5,14 @@
 
 import os
 import datetime
+import shutil
 import unittest
 import tempfile
 
+from prompt_toolkit.completion import Completion
+
 import azext_interactive.azclishell.frequency_heuristic as fh
+from azext_interactive.azclishell.az_completer import sort_completions
 
 
 def _mock_update(_):
@@ -101,5 +105,73 @@ class FeedbackTest(unittest.TestCase):
             os.remove(freq_path)
 
 
+class UsageStoreTest(unittest.TestCase):
+    """ tests the usage store """
+    def setUp(self):
+        self.usage_dir = tempfile.mkdtemp()
+        self.usage_path = os.path.join(self.usage_dir, 'frequency.json')
+        self.now = datetime.datetime.utcnow()
+
+    def tearDown(self):
+        shutil.rmtree(self.usage_dir)
+
+    def _count_records(self):
+        with open(self.usage_path, 'r') as usage_file:
+            return len(usage_file.readlines())
+
+    def test_usage_is_appended(self):
+        usage = fh.UsageStore(self.usage_path)
+        usage.record_start(self.now)
+        usage.record_command('vm create', self.now)
+        usage.record_command('vm create', self.now)
+        usage.record_command('vm list', self.now)
+        self.assertEqual(4, self._count_records())
+
+        usage = fh.UsageStore(self.usage_path)
+        usage.load(self.now)
+        self.assertEqual(2, usage.get_command_count('vm create'))
+        self.assertEqual(3, usage.get_command_count('vm'))
+        self.assertEqual(0, usage.get_command_count('network'))
+        self.assertEqual({fh.day_format(self.now): 1}, usage.days)
+
+    def test_legacy_frequency_file(self):
+        with open(self.usage_path, 'w') as usage_file:
+            usage_file.write('{"%s": 3, "2017-01-01": 1}' % fh.day_format(self.now))
+
+        usage = fh.UsageStore(self.usage_path)
+        usage.record_start(self.now)
+        self.assertEqual({fh.day_format(self.now): 4}, usage.days)
+
+        usage = fh.UsageStore(self.usage_path)
+        usage.load(self.now)
+        self.assertEqual({fh.day_format(self.now): 4}, usage.days)
+        self.assertEqual(2, self._count_records())
+
+    def test_expired_usage_is_compacted(self):
+        usage = fh.UsageStore(self.usage_path)
+        old = self.now - datetime.timedelta(days=fh.COMMAND_RETENTION_DAYS + 1)
+        for _ in range(fh.COMPACT_THRESHOLD):
+            usage.record_start(old)
+            usage.record_command('vm create', old)
+        usage.record_command('vm list', self.now)
+
+        usage = fh.UsageStore(self.usage_path)
+        usage.load(self.now)
+        self.assertEqual({}, usage.days)
+        self.assertEqual(0, usage.get_command_count('vm create'))
+        self.assertEqual(1, usage.get_command_count('vm list'))
+        self.assertEqual(1, self._count_records())
+
+    def test_sort_completions_by_usage(self):
+        usage = fh.UsageStore(self.usage_path)
+        for command in ['vm list', 'vm list', 'vm show']:
+            usage.record_command(command, self.now)
+
+        completions = [Completion('create'), Completion('list'), Completion('show'), Completion('delete')]
+        sorted_completions = sort_completions(completions, lambda c: usage.get_command_count('vm ' + c.text))
+        self.assertEqual(['list', 'show', 'create', 'delete'], [c.text for c in sorted_completions])
+        self.assertEqual(['create', 'delete', 'list', 'show'], [c.text for c in sort_completions(completions)])
+
+
 if __name__ == '__main__':
     unittest.main()
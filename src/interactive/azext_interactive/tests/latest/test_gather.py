@@ -4,7 +4,8 @@
 # --------------------------------------------------------------------------------------------
 
 import unittest
-from azext_interactive.azclishell.gather_commands import add_new_lines as nl
+import mock
+from azext_interactive.azclishell.gather_commands import add_new_lines as nl, HelpText, ParamHelpText, ExampleText
 
 
 class GatherTest(unittest.TestCase):
@@ -55,6 +56,45 @@ class GatherTest(unittest.TestCase):
             nl(phrase3, 1, tolerance=6)
         )
 
+    @mock.patch('azext_interactive.azclishell.gather_commands._get_window_columns')
+    def test_help_text_wrapped_on_lookup(self, get_window_columns):
+        help_text = HelpText()
+        help_text['storage account'] = "Manage storage accounts."
+        help_text['storage'] = None
+
+        get_window_columns.return_value = 28
+        self.assertEqual("Manage storage \naccounts.\n", help_text['storage account'])
+        # wrapped again for the new width after the terminal is resized
+        get_window_columns.return_value = 100
+        self.assertEqual("Manage storage accounts.\n", help_text['storage account'])
+        self.assertEqual("Manage storage accounts.", help_text.get_raw('storage account'))
+        self.assertIsNone(help_text['storage'])
+        self.assertEqual({'storage account', 'storage'}, set(help_text))
+
+    @mock.patch('azext_interactive.azclishell.gather_commands._get_window_columns', return_value=100)
+    def test_param_help_text(self, _):
+        param_help = ParamHelpText()
+        param_help['storage account create --name'] = " The storage account name."
+        param_help['storage account create -n'] = " The storage account name."
+
+        self.assertIn('storage account create -n', param_help)
+        self.assertNotIn('storage account create --sku', param_help)
+        self.assertNotIn('storage account --name', param_help)
+        self.assertEqual(" The storage account name.\n", param_help['storage account create --name'])
+        self.assertEqual('', param_help.get('storage account create --sku', ''))
+        self.assertEqual(" The storage account name.", param_help.get_raw('storage account create -n'))
+        self.assertEqual({'storage account create --name', 'storage account create -n'}, set(param_help.keys()))
+        self.assertEqual(2, len(param_help))
+
+    @mock.patch('azext_interactive.azclishell.gather_commands._get_window_columns', return_value=100)
+    def test_example_text(self, _):
+        examples = ExampleText()
+        examples['vm create'] = [['Create a VM.', 'az vm create -n MyVm']]
+        examples['vm list'] = ''
+
+        self.assertEqual([['Create a VM.\n', 'az vm create -n MyVm\n']], examples['vm create'])
+        self.assertEqual([], examples['vm list'])
+
 
 if __name__ == '__main__':
     unittest.main()
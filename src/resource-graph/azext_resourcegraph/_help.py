@@ -25,13 +25,21 @@ helps['graph query'] = """
           short-summary: "Resource Graph query to execute."
         - name: --first
           type: int
-          short-summary: "The maximum number of objects to return. Accepted range: 1-5000."
+          short-summary: "The maximum number of objects to return. Accepted range: 1-5000, or any positive number with --stream."
         - name: --skip
           type: int
           short-summary: Ignores the first N objects and then gets the remaining objects.
         - name: --subscriptions -s
           type: string
           short-summary: List of subscriptions to run query against. By default all accessible subscriptions are queried.
+        - name: --shard-subscriptions
+          short-summary: Split the subscriptions into batches of up to 1000 and query the batches in parallel, to query more than 1000 subscriptions.
+        - name: --stream
+          short-summary: Write the results to stdout page by page as they arrive, as newline-delimited JSON or CSV, instead of returning them once the query completed.
+          long-summary: Nested objects are written as JSON in CSV cells. The CSV columns are the properties of the first row.
+        - name: --resume-file
+          short-summary: File to save the progress of a streamed query to after every page.
+          long-summary: An interrupted query that is run again with the same file continues where it stopped, writing at most the last page again. The file is removed when the query completes.
     examples:
         - name: Query resources requesting a subset of resource fields.
           text: >
@@ -45,6 +53,12 @@ helps['graph query'] = """
         - name: Choose subscriptions to query.
           text: >
             az graph query -q "where type =~ "Microsoft.Compute" | project name, tags" --subscriptions 11111111-1111-1111-1111-111111111111, 22222222-2222-2222-2222-222222222222
+        - name: Query all accessible subscriptions, even when there are more than 1000 of them.
+          text: >
+            az graph query -q "project id, name, type" --first 5000 --shard-subscriptions
+        - name: Export all virtual machines to a CSV file, resuming the export if it was interrupted before.
+          text: >
+            az graph query -q "where type =~ 'Microsoft.Compute/virtualMachines' | project id, name, location" --first 1000000 --stream csv --resume-file vms.state >> vms.csv
 """
 
 helps['graph shared-query'] = """
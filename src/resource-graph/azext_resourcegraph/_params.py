@@ -7,9 +7,9 @@
 
 
 from azure.cli.core.commands.parameters import get_generic_completion_list
-from azure.cli.core.commands.parameters import tags_type
+from azure.cli.core.commands.parameters import tags_type, get_enum_type
 
-from azext_resourcegraph.resource_graph_enums import IncludeOptionsEnum
+from azext_resourcegraph.resource_graph_enums import IncludeOptionsEnum, StreamFormatEnum
 
 _QUERY_EXAMPLES = [
     '''summarize count()''',
@@ -31,13 +31,19 @@ def load_arguments(self, _):
         c.argument('graph_query', options_list=['--graph-query', '--q', '-q'], required=True,
                    completer=get_generic_completion_list(_QUERY_EXAMPLES), help='Resource Graph query to execute.')
         c.argument('first', options_list=['--first'], required=False, type=int, default=100,
-                   help='The maximum number of objects to return. Accepted range: 1-5000.')
+                   help='The maximum number of objects to return. Accepted range: 1-5000, or any positive number with --stream.')
         c.argument('skip', options_list=['--skip'], required=False, type=int, default=0,
                    help='Ignores the first N objects and then gets the remaining objects.')
         c.argument('subscriptions', options_list=['--subscriptions', '-s'], nargs='*', required=False, default=None,
                    help='List of subscriptions to run query against. By default all accessible subscriptions are queried.')
         c.argument('include', options_list=['--include'], required=False,
                    help='Indicates if result should be extended with subscription and tenants names. Possible values: none, displayNames')
+        c.argument('shard_subscriptions', options_list=['--shard-subscriptions'], action='store_true', required=False,
+                   help='Split the subscriptions into batches of up to 1000 and query the batches in parallel, to query more than 1000 subscriptions.')
+        c.argument('stream_format', options_list=['--stream'], arg_type=get_enum_type(StreamFormatEnum), required=False,
+                   help='Write the results to stdout page by page as they arrive, as newline-delimited JSON or CSV, instead of returning them once the query completed.')
+        c.argument('resume_file', options_list=['--resume-file'], required=False,
+                   help='File to save the progress of a streamed query to after every page. An interrupted query that is run again with the same file continues where it stopped.')
 
     with self.argument_context('graph shared-query') as c:
         c.argument('graph_query', options_list=['--graph-query', '--q', '-q'],
@@ -7,8 +7,20 @@ from knack.util import CLIError
 
 
 def validate_query_args(namespace):
-    if not 1 <= namespace.first <= 5000:
-        raise CLIError("Value of --first has to be between 1 and 5000.")
+    if namespace.stream_format:
+        if namespace.first < 1:
+            raise CLIError("Value of --first has to be positive.")
+    elif not 1 <= namespace.first <= 5000:
+        raise CLIError("Value of --first has to be between 1 and 5000. Use --stream to return more objects.")
 
     if not namespace.skip >= 0:
         raise CLIError("Value of --skip cannot be negative.")
+
+    if namespace.shard_subscriptions and namespace.skip:
+        raise CLIError("--skip cannot be used with --shard-subscriptions.")
+
+    if namespace.resume_file and not namespace.stream_format:
+        raise CLIError("--resume-file can only be used with --stream.")
+
+    if namespace.resume_file and namespace.shard_subscriptions:
+        raise CLIError("--resume-file cannot be used with --shard-subscriptions.")
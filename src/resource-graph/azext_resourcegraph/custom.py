@@ -5,9 +5,14 @@
 
 # pylint: disable=unused-import, broad-except
 
+import csv
+import hashlib
 import json
 import os
+import sys
+import threading
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
 import requests
@@ -17,7 +22,7 @@ from azure.cli.core._session import SESSION
 from knack.log import get_logger
 from knack.util import todict, CLIError, ensure_dir
 
-from azext_resourcegraph.resource_graph_enums import IncludeOptionsEnum
+from azext_resourcegraph.resource_graph_enums import IncludeOptionsEnum, StreamFormatEnum
 from azext_resourcegraph.vendored_sdks.resourcegraph.models import ResultTruncated
 from .vendored_sdks.resourcegraph import ResourceGraphClient
 from .vendored_sdks.resourcegraph.models import \
@@ -27,24 +32,28 @@ __ROWS_PER_PAGE = 1000
 __CACHE_FILE_NAME = ".azgraphcache"
 __CACHE_KEY = "query_extension"
 __SUBSCRIPTION_LIMIT = 1000
+__MAX_PARALLEL_SHARDS = 4
 __logger = get_logger(__name__)
 
 
-def execute_query(client, graph_query, first, skip, subscriptions, include):
-    # type: (ResourceGraphClient, str, int, int, list[str], str) -> object
+def execute_query(client, graph_query, first, skip, subscriptions, include, shard_subscriptions=False,
+                  stream_format=None, resume_file=None):
+    # type: (ResourceGraphClient, str, int, int, list[str], str, bool, str, str) -> object
 
     subs_list = subscriptions or _get_cached_subscriptions()
 
-    if len(subs_list) > __SUBSCRIPTION_LIMIT:
+    if shard_subscriptions:
+        subscription_batches = [subs_list[i:i + __SUBSCRIPTION_LIMIT]
+                                for i in range(0, len(subs_list), __SUBSCRIPTION_LIMIT)] or [subs_list]
+    elif len(subs_list) > __SUBSCRIPTION_LIMIT:
         subs_list = subs_list[:__SUBSCRIPTION_LIMIT]
         warning_message = "The query included more subscriptions than allowed. "\
                           "Only the first {0} subscriptions were included for the results. "\
-                          "To use more than {0} subscriptions, "\
+                          "To use more than {0} subscriptions, use --shard-subscriptions or "\
                           "see the docs for examples: https://aka.ms/arg-error-toomanysubs".format(__SUBSCRIPTION_LIMIT)
         __logger.warning(warning_message)
 
     results = []
-    skip_token = None
     full_query = graph_query
 
     if include == IncludeOptionsEnum.display_names:
@@ -55,31 +64,16 @@ def execute_query(client, graph_query, first, skip, subscriptions, include):
             __logger.warning("Failed to include displayNames to result. Error: %s", e)
 
     try:
-        result_truncated = False
-        while True:
-            request_options = QueryRequestOptions(
-                top=min(first - len(results), __ROWS_PER_PAGE),
-                skip=skip + len(results),
-                skip_token=skip_token,
-                result_format=ResultFormat.object_array
-            )
-
-            request = QueryRequest(query=full_query, subscriptions=subs_list, options=request_options)
-            response = client.resources(request)  # type: QueryResponse
-            if response.result_truncated == ResultTruncated.true:
-                result_truncated = True
-
-            skip_token = response.skip_token
-            results.extend(response.data)
-
-            if len(results) >= first or skip_token is None:
-                break
-
-        if result_truncated and len(results) < first:
-            __logger.warning("Unable to paginate the results of the query. "
-                             "Some resources may be missing from the results. "
-                             "To rewrite the query and enable paging, "
-                             "see the docs for an example: https://aka.ms/arg-results-truncated")
+        if stream_format:
+            _stream_query(client, full_query, subscription_batches if shard_subscriptions else [subs_list],
+                          first, skip, stream_format, resume_file)
+            return None
+
+        if shard_subscriptions:
+            _query_shards(client, full_query, subscription_batches, first, results.extend)
+        else:
+            for response in _query_pages(client, full_query, subs_list, first, skip):
+                results.extend(response.data)
 
     except ErrorResponseException as ex:
         raise CLIError(json.dumps(_to_dict(ex.error), indent=4))
@@ -87,6 +81,192 @@ def execute_query(client, graph_query, first, skip, subscriptions, include):
     return results
 
 
+def _query_pages(client, query, subscriptions, first, skip, skip_token=None, received=0, stop=None):
+    # type: (ResourceGraphClient, str, list[str], int, int, str, int, Callable[[], bool]) -> Iterator[QueryResponse]
+    """
+    Yields the pages of the results of a query until the first N rows were received or there are no more.
+    Paging starts after the given number of received rows, from the skip token of the page that follows them.
+    When stop is given, it is asked before every page whether no more pages are needed.
+    """
+
+    result_truncated = False
+    while True:
+        if stop is not None and stop():
+            return
+
+        request_options = QueryRequestOptions(
+            top=min(first - received, __ROWS_PER_PAGE),
+            skip=skip + received,
+            skip_token=skip_token,
+            result_format=ResultFormat.object_array
+        )
+
+        request = QueryRequest(query=query, subscriptions=subscriptions, options=request_options)
+        response = client.resources(request)  # type: QueryResponse
+        if response.result_truncated == ResultTruncated.true:
+            result_truncated = True
+
+        skip_token = response.skip_token
+        received += len(response.data)
+        yield response
+
+        if received >= first or skip_token is None:
+            break
+
+    if result_truncated and received < first:
+        __logger.warning("Unable to paginate the results of the query. "
+                         "Some resources may be missing from the results. "
+                         "To rewrite the query and enable paging, "
+                         "see the docs for an example: https://aka.ms/arg-results-truncated")
+
+
+def _query_shards(client, query, subscription_batches, first, on_rows):
+    # type: (ResourceGraphClient, str, list[list[str]], int, Callable[[list], None]) -> None
+    """
+    Runs a query against each batch of subscriptions on a bounded pool of threads, paging through the results
+    of every batch until the first N rows were received from all of them. The rows of each page are passed
+    to on_rows as soon as they arrive, one page at a time.
+    """
+
+    lock = threading.Lock()
+    received = [0]
+
+    def _received_first():
+        with lock:
+            return received[0] >= first
+
+    def _query_shard(subscriptions):
+        for response in _query_pages(client, query, subscriptions, first, 0, stop=_received_first):
+            with lock:
+                rows = response.data[:first - received[0]]
+                if rows:
+                    received[0] += len(rows)
+                    on_rows(rows)
+                if received[0] >= first:
+                    return
+
+    with ThreadPoolExecutor(max_workers=min(__MAX_PARALLEL_SHARDS, len(subscription_batches))) as executor:
+        futures = [executor.submit(_query_shard, batch) for batch in subscription_batches]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def _stream_query(client, query, subscription_batches, first, skip, stream_format, resume_file=None):
+    # type: (ResourceGraphClient, str, list[list[str]], int, int, str, str) -> None
+    """
+    Writes the rows of a query to stdout one page at a time, so that the rows are never held in memory all
+    at once. When a resume file is given, the skip token of the next page is saved to it after every page,
+    and a query that was interrupted continues from it, writing at most the last page again.
+    """
+
+    if len(subscription_batches) > 1:
+        writer = _RowWriter(sys.stdout, stream_format)
+        _query_shards(client, query, subscription_batches, first, writer.write)
+        return
+
+    subscriptions = subscription_batches[0]
+    state = _QueryState(resume_file, query, subscriptions, skip) if resume_file else None
+    if state and state.load():
+        __logger.warning("Resuming the query after %d rows.", state.received)
+        writer = _RowWriter(sys.stdout, stream_format, columns=state.columns, write_header=False)
+        pages = _query_pages(client, query, subscriptions, first, skip, state.skip_token, state.received)
+    else:
+        writer = _RowWriter(sys.stdout, stream_format)
+        pages = _query_pages(client, query, subscriptions, first, skip)
+
+    received = state.received if state else 0
+    for response in pages:
+        writer.write(response.data)
+        received += len(response.data)
+        if state:
+            if response.skip_token is None or received >= first:
+                state.remove()
+            else:
+                state.save(response.skip_token, received, writer.columns)
+
+
+class _RowWriter(object):
+    """Writes rows to a stream as NDJSON, one JSON object per line, or as CSV with the columns of the first row."""
+
+    def __init__(self, stream, stream_format, columns=None, write_header=True):
+        self.stream = stream
+        self.stream_format = stream_format
+        self.columns = columns
+        self._write_header = write_header
+        self._csv_writer = csv.writer(stream, lineterminator='\n') if stream_format == StreamFormatEnum.csv else None
+
+    def write(self, rows):
+        # type: (list[dict]) -> None
+        if not rows:
+            return
+        if self._csv_writer is None:
+            self.stream.write(''.join(json.dumps(row) + '\n' for row in rows))
+        else:
+            if self.columns is None:
+                self.columns = list(rows[0].keys())
+            if self._write_header:
+                self._csv_writer.writerow(self.columns)
+                self._write_header = False
+            self._csv_writer.writerows([_to_csv_value(row.get(column)) for column in self.columns] for row in rows)
+        self.stream.flush()
+
+
+def _to_csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+class _QueryState(object):
+    """The progress of a streamed query, kept in a file to resume the query from if it is interrupted."""
+
+    def __init__(self, path, query, subscriptions, skip):
+        self.path = os.path.expanduser(path)
+        self.query_hash = hashlib.sha256(json.dumps([query, sorted(subscriptions), skip]).encode('utf-8')).hexdigest()
+        self.skip_token = None
+        self.received = 0
+        self.columns = None
+
+    def load(self):
+        # type: () -> bool
+        """Reads the progress of the query, returns whether there is any to resume from."""
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (IOError, OSError):
+            return False
+        except ValueError:
+            raise CLIError("The resume file '{}' is not valid. Delete it to run the query "
+                           "from the beginning.".format(self.path))
+
+        if state.get('queryHash') != self.query_hash:
+            raise CLIError("The resume file '{}' was written for a different query, subscriptions or --skip. "
+                           "Delete it or use a different file to run this query.".format(self.path))
+        self.skip_token = state['skipToken']
+        self.received = state['received']
+        self.columns = state.get('columns')
+        return True
+
+    def save(self, skip_token, received, columns=None):
+        # type: (str, int, list[str]) -> None
+        state = {'queryHash': self.query_hash, 'skipToken': skip_token, 'received': received, 'columns': columns}
+        temp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 def create_shared_query(client, resource_group_name,
                         resource_name, description,
                         graph_query, location='global', tags=None):
@@ -0,0 +1,235 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+from unittest import mock
+
+from knack.util import CLIError
+
+from azext_resourcegraph.custom import execute_query
+from azext_resourcegraph.vendored_sdks.resourcegraph.models import \
+    QueryResponse, ResultTruncated, ErrorResponse, ErrorResponseException, Error
+
+
+class FakeResourceGraphClient(object):
+    """Serves rows_per_subscription rows for each subscription queried, in pages linked by skip tokens."""
+
+    def __init__(self, rows_per_subscription=1, delay=0, fail=False, fail_after=None):
+        self.rows_per_subscription = rows_per_subscription
+        self.delay = delay
+        self.fail = fail
+        self.fail_after = fail_after
+        self.requests = []
+        self.max_concurrent_requests = 0
+        self._concurrent_requests = 0
+        self._lock = threading.Lock()
+
+    def resources(self, request):
+        with self._lock:
+            self.requests.append(request)
+            self._concurrent_requests += 1
+            self.max_concurrent_requests = max(self.max_concurrent_requests, self._concurrent_requests)
+        try:
+            time.sleep(self.delay)
+            if self.fail or (self.fail_after is not None and len(self.requests) > self.fail_after):
+                raise ErrorResponseException(lambda _, __: ErrorResponse(error=Error(code='BadRequest', message='failed')),
+                                             _Response())
+            rows = [{'id': '/subscriptions/{}/resources/{}'.format(sub, i), 'tags': {'index': i}}
+                    for sub in request.subscriptions for i in range(self.rows_per_subscription)]
+            start = int(request.options.skip_token or request.options.skip)
+            end = start + request.options.top
+            page = rows[start:end]
+            return QueryResponse(total_records=len(rows), count=len(page), result_truncated=ResultTruncated.false,
+                                 skip_token=str(end) if end < len(rows) else None, data=page)
+        finally:
+            with self._lock:
+                self._concurrent_requests -= 1
+
+
+class _Response(object):  # pylint: disable=too-few-public-methods
+    status_code = 400
+    reason = 'Bad Request'
+
+
+def _subscriptions(count):
+    return ['{:08d}-0000-0000-0000-000000000000'.format(i) for i in range(count)]
+
+
+class ResourceGraphQueryTests(unittest.TestCase):
+
+    def test_query_truncates_subscriptions(self):
+        client = FakeResourceGraphClient()
+        results = execute_query(client, 'project id', 5000, 0, _subscriptions(3400), None)
+
+        self.assertEqual(1000, len(results))
+        self.assertEqual(1, len(client.requests))
+
+    def test_query_pages(self):
+        client = FakeResourceGraphClient(rows_per_subscription=25)
+        results = execute_query(client, 'project id', 2400, 10, _subscriptions(100), None)
+
+        self.assertEqual(2400, len(results))
+        self.assertEqual('/subscriptions/00000000-0000-0000-0000-000000000000/resources/10', results[0]['id'])
+        self.assertEqual([1000, 1000, 400], [request.options.top for request in client.requests])
+
+    def test_sharded_query(self):
+        client = FakeResourceGraphClient(delay=0.05)
+        results = execute_query(client, 'project id', 5000, 0, _subscriptions(3400), None, shard_subscriptions=True)
+
+        self.assertEqual(3400, len(results))
+        self.assertEqual(3400, len({row['id'] for row in results}))
+        self.assertEqual([1000, 1000, 1000, 400], sorted((len(r.subscriptions) for r in client.requests), reverse=True))
+        self.assertEqual(4, client.max_concurrent_requests)
+
+    def test_sharded_query_pages_each_shard(self):
+        client = FakeResourceGraphClient(rows_per_subscription=2)
+        results = execute_query(client, 'project id', 5000, 0, _subscriptions(2500), None, shard_subscriptions=True)
+
+        self.assertEqual(5000, len(results))
+        self.assertEqual(5000, len({row['id'] for row in results}))
+        self.assertTrue(all(len(request.subscriptions) <= 1000 for request in client.requests))
+
+    def test_sharded_query_stops_after_first_rows(self):
+        client = FakeResourceGraphClient(rows_per_subscription=10)
+        results = execute_query(client, 'project id', 1500, 0, _subscriptions(1200), None, shard_subscriptions=True)
+
+        self.assertEqual(1500, len(results))
+
+    def test_sharded_query_sends_no_requests_after_first_rows(self):
+        client = FakeResourceGraphClient(delay=0.05)
+        results = execute_query(client, 'project id', 1000, 0, _subscriptions(5000), None, shard_subscriptions=True)
+
+        self.assertEqual(1000, len(results))
+        # the fifth shard is queued until one of the first four returns its 1000 rows
+        self.assertEqual(4, len(client.requests))
+
+    def test_sharded_query_error(self):
+        client = FakeResourceGraphClient(fail=True)
+        with self.assertRaises(CLIError):
+            execute_query(client, 'project id', 100, 0, _subscriptions(1200), None, shard_subscriptions=True)
+
+
+class _CountingStream(object):
+    """A stdout that only counts what is written to it."""
+
+    def __init__(self):
+        self.lines = 0
+
+    def write(self, text):
+        self.lines += text.count('\n')
+
+    def flush(self):
+        pass
+
+
+class ResourceGraphStreamingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def _stream(self, client, first, stream_format='ndjson', **kwargs):
+        with mock.patch('sys.stdout', new=io.StringIO()) as stdout:
+            self.assertIsNone(execute_query(client, 'project id, tags', first, 0, _subscriptions(100), None,
+                                            stream_format=stream_format, **kwargs))
+        return stdout.getvalue()
+
+    def test_stream_ndjson(self):
+        client = FakeResourceGraphClient(rows_per_subscription=70)
+        output = self._stream(client, 6500)
+
+        rows = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(6500, len(rows))
+        self.assertEqual({'id': '/subscriptions/00000000-0000-0000-0000-000000000000/resources/0', 'tags': {'index': 0}},
+                         rows[0])
+        self.assertEqual(7, len(client.requests))
+
+    def test_stream_csv(self):
+        client = FakeResourceGraphClient(rows_per_subscription=30)
+        output = self._stream(client, 2500, stream_format='csv')
+
+        rows = list(csv.reader(io.StringIO(output)))
+        self.assertEqual(['id', 'tags'], rows[0])
+        self.assertEqual(['/subscriptions/00000000-0000-0000-0000-000000000000/resources/1', '{"index": 1}'], rows[2])
+        self.assertEqual(2501, len(rows))
+
+    def test_stream_sharded(self):
+        client = FakeResourceGraphClient(rows_per_subscription=2)
+        with mock.patch('sys.stdout', new=io.StringIO()) as stdout:
+            execute_query(client, 'project id', 10000, 0, _subscriptions(2500), None, shard_subscriptions=True,
+                          stream_format='ndjson')
+
+        self.assertEqual(5000, len({json.loads(line)['id'] for line in stdout.getvalue().splitlines()}))
+
+    def test_stream_resumes_from_skip_token(self):
+        resume_file = os.path.join(self.temp_dir, 'query.state')
+        with self.assertRaises(CLIError):
+            self._stream(FakeResourceGraphClient(rows_per_subscription=50, fail_after=2), 5000, stream_format='csv',
+                         resume_file=resume_file)
+        with open(resume_file) as f:
+            self.assertEqual('2000', json.load(f)['skipToken'])
+
+        client = FakeResourceGraphClient(rows_per_subscription=50)
+        output = self._stream(client, 5000, stream_format='csv', resume_file=resume_file)
+
+        rows = list(csv.reader(io.StringIO(output)))
+        self.assertEqual(3000, len(rows))
+        self.assertEqual('/subscriptions/00000040-0000-0000-0000-000000000000/resources/0', rows[0][0])
+        self.assertEqual(['2000', '3000', '4000'], [request.options.skip_token for request in client.requests])
+        self.assertFalse(os.path.exists(resume_file))
+
+    def test_stream_resume_file_of_other_query(self):
+        resume_file = os.path.join(self.temp_dir, 'query.state')
+        with open(resume_file, 'w') as f:
+            json.dump({'queryHash': 'other', 'skipToken': '1000', 'received': 1000}, f)
+
+        with self.assertRaises(CLIError):
+            self._stream(FakeResourceGraphClient(), 100, resume_file=resume_file)
+
+    def test_stream_throughput(self):
+        """Streams 200k rows from a mocked client, measuring the rows written per second and the peak memory."""
+        total_rows = 200000
+
+        def _resources(request):
+            start = int(request.options.skip_token or 0)
+            end = min(start + request.options.top, total_rows)
+            data = [{'id': '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Compute/virtualMachines/vm{}'.format(i),
+                     'name': 'vm{}'.format(i), 'location': 'westus2', 'tags': {'env': 'prod'}} for i in range(start, end)]
+            return QueryResponse(total_records=total_rows, count=len(data), result_truncated=ResultTruncated.false,
+                                 skip_token=str(end) if end < total_rows else None, data=data)
+
+        client = mock.Mock()
+        client.resources.side_effect = _resources
+        stdout = _CountingStream()
+        tracemalloc.start()
+        start_time = time.time()
+        try:
+            with mock.patch('sys.stdout', new=stdout):
+                execute_query(client, 'project id, name, location, tags', total_rows, 0, _subscriptions(1), None,
+                              stream_format='ndjson')
+            elapsed = time.time() - start_time
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        print('\nStreamed {} rows in {:.1f}s ({:.0f} rows/s), peak memory {:.1f} MB'.format(
+            total_rows, elapsed, total_rows / elapsed, peak_memory / 1024.0 / 1024.0))
+        self.assertEqual(total_rows, stdout.lines)
+        self.assertEqual(200, client.resources.call_count)
+        # a few pages at a time, where holding all rows takes hundreds of MB
+        self.assertLess(peak_memory, 20 * 1024 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,9 +5,10 @@
 
 # pylint: disable=wrong-import-order
 
+import sys
 import time
+import codecs
 import colorama   # pylint: disable=import-error
-from io import BytesIO
 from random import uniform
 from knack.util import CLIError
 from knack.log import get_logger
@@ -20,6 +21,8 @@ logger = get_logger(__name__)
 
 DEFAULT_CHUNK_SIZE = 1024 * 4
 DEFAULT_LOG_TIMEOUT_IN_SEC = 60 * 30  # 30 minutes
+DEFAULT_APP_LOG_CHUNK_SIZE = 1024 * 8
+MAX_LOG_RANGE_SIZE = 1024 * 1024 * 4
 
 
 def stream_logs(client,
@@ -63,6 +66,50 @@ def stream_logs(client,
                  logger_level_func)
 
 
+class LogStreamMetrics(object):  # pylint: disable=too-few-public-methods
+    """Counters of the data read and the requests issued while streaming a log blob."""
+
+    def __init__(self):
+        self.bytes_read = 0
+        self.range_reads = 0
+        self.property_polls = 0
+
+    @property
+    def polls(self):
+        return self.range_reads + self.property_polls
+
+    def __str__(self):
+        return "{} bytes read with {} range reads and {} property polls".format(
+            self.bytes_read, self.range_reads, self.property_polls)
+
+
+class _LineAssembler(object):
+    """
+    Collect log bytes and flush them up to the last line break. Only the trailing partial line
+    is kept between reads, so nothing already flushed is copied or scanned again.
+    """
+
+    def __init__(self, logger_level_func):
+        self.logger_level_func = logger_level_func
+        self.pending = b''
+
+    def feed(self, data):
+        data = self.pending + data
+        # lines end with '\r\n' or '\r'; flush up to and including the last '\r' and drop the '\n' after it
+        index = data.rfind(b'\r')
+        if index < 0:
+            self.pending = data
+            return
+        remaining = index + 2 if data[index + 1:index + 2] == b'\n' else index + 1
+        self.pending = data[remaining:]
+        self.logger_level_func(data[:index + 1].decode('utf-8', errors='ignore'))
+
+    def flush(self):
+        if self.pending:
+            self.logger_level_func(self.pending.decode('utf-8', errors='ignore'))
+            self.pending = b''
+
+
 def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-statements, too-many-branches
                  byte_size,
                  timeout_in_seconds,
@@ -75,10 +122,11 @@ def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-stateme
     if not no_format:
         colorama.init()
 
-    stream = BytesIO()
+    lines = _LineAssembler(logger_level_func)
+    metrics = LogStreamMetrics()
     metadata = {}
+    etag = None
     start = 0
-    end = byte_size - 1
     available = 0
     sleep_time = 1
     max_sleep_time = 15
@@ -89,104 +137,97 @@ def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-stateme
     # Try to get the initial properties so there's no waiting.
     # If the storage call fails, we'll just sleep and try again after.
     try:
+        metrics.property_polls += 1
         props = blob_service.get_blob_properties(
             container_name=container_name, blob_name=blob_name)
         metadata = props.metadata
         available = props.properties.content_length
+        etag = props.properties.etag
     except (AttributeError, AzureHttpError):
         pass
 
-    while (_blob_is_not_complete(metadata) or start < available):
-        while start < available:
-            # Success! Reset our polling backoff.
-            sleep_time = 1
-            num_fails = 0
-            consecutive_sleep_in_sec = 0
-
+    try:
+        while (_blob_is_not_complete(metadata) or start < available):
+            while start < available:
+                # Success! Reset our polling backoff.
+                sleep_time = 1
+                num_fails = 0
+                consecutive_sleep_in_sec = 0
+
+                # A range read returns the blob's metadata, ETag and total length along with the content,
+                # so keep reading without polling the properties until we catch up with the writer.
+                read_size = min(max(byte_size, available - start), MAX_LOG_RANGE_SIZE)
+                try:
+                    metrics.range_reads += 1
+                    blob = blob_service.get_blob_to_bytes(
+                        container_name=container_name,
+                        blob_name=blob_name,
+                        start_range=start,
+                        end_range=start + read_size - 1,
+                        max_connections=1)
+                except AzureHttpError as ae:
+                    if ae.status_code not in (404, 416):
+                        raise CLIError(ae)
+                    # nothing to read at this offset, wait for the properties to change
+                    available = start
+                    break
+
+                content = blob.content or b''
+                start += len(content)
+                metrics.bytes_read += len(content)
+                metadata = blob.metadata
+                etag = blob.properties.etag
+                available = max(_get_length_from_content_range(blob.properties.content_range, start), start)
+                lines.feed(content)
+                if not content:
+                    available = start
+                    break
+
+            if not _blob_is_not_complete(metadata) and start >= available:
+                break
+
+            # Only fetch the properties when they changed since the last read.
             try:
-                old_byte_size = len(stream.getvalue())
-                blob_service.get_blob_to_stream(
-                    container_name=container_name,
-                    blob_name=blob_name,
-                    start_range=start,
-                    end_range=end,
-                    stream=stream)
-
-                curr_bytes = stream.getvalue()
-                new_byte_size = len(curr_bytes)
-                amount_read = new_byte_size - old_byte_size
-                start += amount_read
-                end = start + byte_size - 1
-
-                # Only scan what's newly read. If nothing is read, default to 0.
-                min_scan_range = max(new_byte_size - amount_read - 1, 0)
-                for i in range(new_byte_size - 1, min_scan_range, -1):
-                    if curr_bytes[i - 1:i + 1] == b'\r\n':
-                        flush = curr_bytes[:i]  # won't logger.warning \n
-                        stream = BytesIO()
-                        stream.write(curr_bytes[i + 1:])
-                        logger_level_func(flush.decode('utf-8', errors='ignore'))
-                        break
-                    if curr_bytes[i:i + 1] == b'\r':
-                        flush = curr_bytes[:i + 1]  # won't logger.warning \n
-                        stream = BytesIO()
-                        stream.write(curr_bytes[i + 1:])
-                        logger_level_func(flush.decode('utf-8', errors='ignore'))
-                        break
-
+                metrics.property_polls += 1
+                props = blob_service.get_blob_properties(
+                    container_name=container_name, blob_name=blob_name, if_none_match=etag)
+                metadata = props.metadata
+                available = props.properties.content_length
+                etag = props.properties.etag
             except AzureHttpError as ae:
-                if ae.status_code != 404:
+                if ae.status_code not in (304, 404):
                     raise CLIError(ae)
-            except KeyboardInterrupt:
-                curr_bytes = stream.getvalue()
-                if curr_bytes:
-                    logger_level_func(curr_bytes.decode('utf-8', errors='ignore'))
-                return
-
-        try:
-            props = blob_service.get_blob_properties(
-                container_name=container_name, blob_name=blob_name)
-            metadata = props.metadata
-            available = props.properties.content_length
-        except AzureHttpError as ae:
-            if ae.status_code != 404:
-                raise CLIError(ae)
-        except KeyboardInterrupt:
-            if curr_bytes:
-                logger_level_func(curr_bytes.decode('utf-8', errors='ignore'))
-            return
-        except Exception as err:
-            raise CLIError(err)
-
-        if consecutive_sleep_in_sec > timeout_in_seconds:
-            # Flush anything remaining in the buffer - this would be the case
-            # if the file has expired and we weren't able to detect any \r\n
-            curr_bytes = stream.getvalue()
-            if curr_bytes:
-                logger_level_func(curr_bytes.decode('utf-8', errors='ignore'))
-
-            return
-
-        # If no new data available but not complete, sleep before trying to process additional data.
-        if (_blob_is_not_complete(metadata) and start >= available):
-            num_fails += 1
-
-            if num_fails >= num_fails_for_backoff:
-                num_fails = 0
-                sleep_time = min(sleep_time * 2, max_sleep_time)
-
-            rnd = uniform(1, 2)  # 1.0 <= x < 2.0
-            total_sleep_time = sleep_time + rnd
-            consecutive_sleep_in_sec += total_sleep_time
-            time.sleep(total_sleep_time)
+            except Exception as err:
+                raise CLIError(err)
+
+            if consecutive_sleep_in_sec > timeout_in_seconds:
+                # Flush anything remaining in the buffer - this would be the case
+                # if the file has expired and we weren't able to detect any \r\n
+                lines.flush()
+                logger.debug("Log stream timed out: %s", metrics)
+                return metrics
+
+            # If no new data available but not complete, sleep before trying to process additional data.
+            if (_blob_is_not_complete(metadata) and start >= available):
+                num_fails += 1
+
+                if num_fails >= num_fails_for_backoff:
+                    num_fails = 0
+                    sleep_time = min(sleep_time * 2, max_sleep_time)
+
+                rnd = uniform(1, 2)  # 1.0 <= x < 2.0
+                total_sleep_time = sleep_time + rnd
+                consecutive_sleep_in_sec += total_sleep_time
+                time.sleep(total_sleep_time)
+    except KeyboardInterrupt:
+        lines.flush()
+        return metrics
 
     # One final check to see if there's anything in the buffer to flush
     # E.g., metadata has been set and start == available, but the log file
     # didn't end in \r\n, so we were unable to flush out the final contents.
-    curr_bytes = stream.getvalue()
-
-    if curr_bytes:
-        logger_level_func(curr_bytes.decode('utf-8', errors='ignore'))
+    lines.flush()
+    logger.debug("Log stream completed: %s", metrics)
 
     build_status = _get_run_status(metadata).lower()
     logger_level_func("Log status was: {}".format(build_status))
@@ -199,6 +240,18 @@ def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-stateme
         if build_status == 'canceled':
             raise CLIError("Run was canceled")
 
+    return metrics
+
+
+def _get_length_from_content_range(content_range, default):
+    # e.g. 'bytes 0-4095/10240'
+    if not content_range or '/' not in content_range:
+        return default
+    try:
+        return int(content_range.split('/')[1])
+    except ValueError:
+        return default
+
 
 def _blob_is_not_complete(metadata):
     if not metadata:
@@ -216,3 +269,45 @@ def _get_run_status(metadata):
         if key.lower() == '__complete_status':
             return metadata[key]
     return 'inprogress'
+
+
+def stream_app_log_response(response, output=None, chunk_size=DEFAULT_APP_LOG_CHUNK_SIZE):
+    """Copy a streamed app log response to `output` in line-aligned batches.
+
+    The body is read `chunk_size` bytes at a time and decoded incrementally, so
+    multi-byte characters split across chunks are kept intact. Only complete
+    lines are written; a trailing partial line is held back until its newline
+    arrives, unless it grows beyond `chunk_size`. Returns the number of bytes read.
+    """
+    output = output or sys.stdout
+    std_encoding = getattr(output, 'encoding', None) or 'utf-8'
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ''
+    total_bytes = 0
+    start_time = time.time()
+
+    def _write(text):
+        output.write(text.encode(std_encoding, errors='replace').decode(std_encoding, errors='replace'))
+        output.flush()
+
+    try:
+        for content in response.iter_content(chunk_size=chunk_size):
+            if not content:
+                continue
+            total_bytes += len(content)
+            pending += decoder.decode(content)
+            line_end = pending.rfind('\n') + 1
+            if line_end:
+                _write(pending[:line_end])
+                pending = pending[line_end:]
+            if len(pending) >= chunk_size:
+                _write(pending)
+                pending = ''
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            _write(pending)
+    finally:
+        elapsed = max(time.time() - start_time, 1e-6)
+        logger.debug("Streamed %d bytes of app log in %.2f seconds (%.1f KB/s, chunk size %d bytes)",
+                     total_bytes, elapsed, total_bytes / 1024.0 / elapsed, chunk_size)
+    return total_bytes
@@ -158,6 +158,60 @@ def _archive_file_recursively(tar, name, arcname, parent_ignored, parent_matchin
                                       ignore_check=ignore_check)
 
 
+def _get_file_hash(file_path, chunk_size=4 * 1024 * 1024):
+    import hashlib
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _get_uploaded_artifacts_file():
+    from azure.cli.core._environment import get_config_dir
+    return os.path.join(get_config_dir(), 'spring_cloud_uploaded_artifacts.json')
+
+
+def _load_uploaded_artifacts():
+    from json import load
+    try:
+        with open(_get_uploaded_artifacts_file(), 'r') as f:
+            return load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def _get_deployment_key(resource_group, service, app, deployment):
+    return '/'.join([resource_group, service, app, deployment]).lower()
+
+
+def get_uploaded_artifact_path(resource_group, service, app, deployment, artifact_hash):
+    """Return the relative path the artifact with this hash was last uploaded to for the deployment, if any."""
+    record = _load_uploaded_artifacts().get(_get_deployment_key(resource_group, service, app, deployment))
+    if record and record.get('hash') == artifact_hash:
+        return record.get('relativePath')
+    return None
+
+
+def save_uploaded_artifact_path(resource_group, service, app, deployment, artifact_hash, relative_path):
+    artifacts = _load_uploaded_artifacts()
+    artifacts[_get_deployment_key(resource_group, service, app, deployment)] = {
+        'hash': artifact_hash,
+        'relativePath': relative_path
+    }
+    artifacts_file = _get_uploaded_artifacts_file()
+    # deploys may run side by side, so the record is replaced as a whole rather than rewritten in place
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(artifacts_file), prefix='.spring_cloud_uploaded_artifacts')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(dumps(artifacts))
+        os.replace(temp_path, artifacts_file)
+    except (IOError, OSError) as e:
+        logger.debug("Failed to save the uploaded artifact record: %s", e)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
 def get_blob_info(blob_sas_url):
     return _get_azure_storage_client_info('blob', blob_sas_url)
 
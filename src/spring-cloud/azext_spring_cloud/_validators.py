@@ -132,6 +132,16 @@ def validate_log_lines(namespace):
     namespace.lines = temp_lines
 
 
+def validate_log_chunk_size(namespace):
+    if namespace.chunk_size is not None and namespace.chunk_size < 1:
+        raise CLIError('--chunk-size must be a positive number of bytes')
+
+
+def validate_max_connections(namespace):
+    if namespace.max_connections is not None and namespace.max_connections < 1:
+        raise CLIError('--max-connections must be a positive number')
+
+
 def validate_log_since(namespace):
     if namespace.since:
         last = namespace.since[-1:]
@@ -9,7 +9,7 @@ import re
 from requests.auth import HTTPBasicAuth
 import yaml   # pylint: disable=import-error
 from time import sleep
-from ._stream_utils import stream_logs
+from ._stream_utils import stream_logs, stream_app_log_response, DEFAULT_APP_LOG_CHUNK_SIZE
 from msrestazure.azure_exceptions import CloudError
 from msrestazure.tools import parse_resource_id, is_valid_resource_id
 from ._utils import _get_upload_local_file, _get_persistent_disk_size, get_portal_uri, get_azure_files_info
@@ -27,6 +27,7 @@ from azure.mgmt.applicationinsights import ApplicationInsightsManagementClient
 from ast import literal_eval
 from azure.cli.core.commands import cached_put
 from ._utils import _get_rg_location
+from ._utils import _get_file_hash, get_uploaded_artifact_path, save_uploaded_artifact_path
 from ._utils import _get_sku_name
 from six.moves.urllib import parse
 from threading import Thread
@@ -458,7 +459,9 @@ def app_deploy(cmd, client, resource_group, service, name,
                jvm_options=None,
                main_entry=None,
                env=None,
-               no_wait=False):
+               no_wait=False,
+               max_connections=None,
+               skip_unchanged=False):
     logger.warning(LOG_RUNNING_PROMPT)
     if not deployment:
         deployment = client.apps.get(
@@ -488,7 +491,9 @@ def app_deploy(cmd, client, resource_group, service, name,
                        target_module,
                        no_wait,
                        file_type,
-                       True)
+                       True,
+                       max_connections=max_connections,
+                       skip_unchanged=skip_unchanged)
 
 
 def app_scale(cmd, client, resource_group, service, name,
@@ -530,7 +535,8 @@ def app_get_build_log(cmd, client, resource_group, service, name, deployment=Non
     return stream_logs(client.deployments, resource_group, service, name, deployment)
 
 
-def app_tail_log(cmd, client, resource_group, service, name, deployment=None, instance=None, follow=False, lines=50, since=None, limit=2048):
+def app_tail_log(cmd, client, resource_group, service, name, deployment=None, instance=None, follow=False, lines=50, since=None, limit=2048,
+                 chunk_size=DEFAULT_APP_LOG_CHUNK_SIZE):
     if not instance:
         if deployment is None:
             deployment = client.apps.get(
@@ -574,7 +580,7 @@ def app_tail_log(cmd, client, resource_group, service, name, deployment=None, in
     exceptions = []
     streaming_url += "?{}".format(parse.urlencode(params)) if params else ""
     t = Thread(target=_get_app_log, args=(
-        streaming_url, "primary", primary_key, exceptions))
+        streaming_url, "primary", primary_key, exceptions, chunk_size))
     t.daemon = True
     t.start()
 
@@ -703,7 +709,8 @@ def deployment_create(cmd, client, resource_group, service, app, name,
                       memory=None,
                       instance_count=None,
                       env=None,
-                      no_wait=False):
+                      no_wait=False,
+                      max_connections=None):
     logger.warning(LOG_RUNNING_PROMPT)
     deployments = _get_all_deployments(client, resource_group, service, app)
     if name in deployments:
@@ -743,7 +750,8 @@ def deployment_create(cmd, client, resource_group, service, app, name,
                        main_entry,
                        target_module,
                        no_wait,
-                       file_type)
+                       file_type,
+                       max_connections=max_connections)
 
 
 def _validate_instance_count(sku, instance_count=None):
@@ -1262,22 +1270,33 @@ def _app_deploy(client, resource_group, service, app, name, version, path, runti
                 target_module=None,
                 no_wait=False,
                 file_type="Jar",
-                update=False):
+                update=False,
+                max_connections=None,
+                skip_unchanged=False):
     upload_url = None
     relative_path = None
+    artifact_hash = None
     logger.warning("file_type is {}".format(file_type))
-    logger.warning("[1/3] Requesting for upload URL")
-    try:
-        response = client.apps.get_resource_upload_url(resource_group,
-                                                       service,
-                                                       app,
-                                                       None,
-                                                       None)
-        upload_url = response.upload_url
-        relative_path = response.relative_path
-    except (AttributeError, CloudError) as e:
-        raise CLIError(
-            "Failed to get a SAS URL to upload context. Error: {}".format(e.message))
+    if skip_unchanged:
+        artifact_hash = _get_file_hash(path)
+        relative_path = _get_unchanged_artifact_path(client, resource_group, service, app, name, artifact_hash)
+    reuse_uploaded_package = bool(relative_path)
+
+    if reuse_uploaded_package:
+        logger.warning("[1/3] Package is unchanged since it was last uploaded, skipping upload")
+    else:
+        logger.warning("[1/3] Requesting for upload URL")
+        try:
+            response = client.apps.get_resource_upload_url(resource_group,
+                                                           service,
+                                                           app,
+                                                           None,
+                                                           None)
+            upload_url = response.upload_url
+            relative_path = response.relative_path
+        except (AttributeError, CloudError) as e:
+            raise CLIError(
+                "Failed to get a SAS URL to upload context. Error: {}".format(e.message))
 
     deployment_settings = models.DeploymentSettings(
         cpu=cpu,
@@ -1297,12 +1316,17 @@ def _app_deploy(client, resource_group, service, app, name, version, path, runti
         source=user_source_info)
 
     # upload file
-    if not upload_url:
-        raise CLIError("Failed to get a SAS URL to upload context.")
-    account_name, endpoint_suffix, share_name, relative_name, sas_token = get_azure_files_info(upload_url)
-    logger.warning("[2/3] Uploading package to blob")
-    file_service = FileService(account_name, sas_token=sas_token, endpoint_suffix=endpoint_suffix)
-    file_service.create_file_from_path(share_name, None, relative_name, path)
+    if not reuse_uploaded_package:
+        if not upload_url:
+            raise CLIError("Failed to get a SAS URL to upload context.")
+        account_name, endpoint_suffix, share_name, relative_name, sas_token = get_azure_files_info(upload_url)
+        logger.warning("[2/3] Uploading package to blob")
+        file_service = FileService(account_name, sas_token=sas_token, endpoint_suffix=endpoint_suffix)
+        # the file is uploaded in ranges of FileService.MAX_RANGE_SIZE bytes, max_connections of them at a time
+        upload_args = {'max_connections': max_connections} if max_connections else {}
+        file_service.create_file_from_path(share_name, None, relative_name, path, **upload_args)
+        if artifact_hash:
+            save_uploaded_artifact_path(resource_group, service, app, name, artifact_hash, relative_path)
 
     if file_type == "Source" and not no_wait:
         def get_log_url():
@@ -1345,18 +1369,30 @@ def _app_deploy(client, resource_group, service, app, name, version, path, runti
                        resource_group, service, app, name, properties=properties, sku=sku)
 
 
-def _get_app_log(url, user_name, password, exceptions):
+def _get_unchanged_artifact_path(client, resource_group, service, app, deployment, artifact_hash):
+    """
+    Return the relative path of the package the deployment currently runs if it was uploaded from this machine
+    with the same content hash, so that it can be deployed again without uploading it.
+    """
+    relative_path = get_uploaded_artifact_path(resource_group, service, app, deployment, artifact_hash)
+    if not relative_path:
+        return None
+    try:
+        source = client.deployments.get(resource_group, service, app, deployment).properties.source
+    except CloudError:
+        return None
+    if source and source.relative_path == relative_path:
+        return relative_path
+    return None
+
+
+def _get_app_log(url, user_name, password, exceptions, chunk_size=DEFAULT_APP_LOG_CHUNK_SIZE):
     with requests.get(url, stream=True, auth=HTTPBasicAuth(user_name, password)) as response:
         try:
             if response.status_code != 200:
                 raise CLIError("Failed to connect to the server with status code '{}' and reason '{}'".format(
                     response.status_code, response.reason))
-            std_encoding = sys.stdout.encoding
-            for content in response.iter_content():
-                if content:
-                    sys.stdout.write(content.decode(encoding='utf-8', errors='replace')
-                                     .encode(std_encoding, errors='replace')
-                                     .decode(std_encoding, errors='replace'))
+            stream_app_log_response(response, sys.stdout, chunk_size)
         except CLIError as e:
             exceptions.append(e)
 
@@ -0,0 +1,114 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from ..._utils import _get_file_hash, get_uploaded_artifact_path, save_uploaded_artifact_path
+from ...custom import _app_deploy
+
+UPLOAD_URL = 'https://account.file.core.windows.net/share/resources/new.jar?sv=sas'
+
+
+def _sdk_no_wait(no_wait, func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def _get_client(deployed_relative_path):
+    client = mock.MagicMock()
+    client.apps.get_resource_upload_url.return_value = mock.MagicMock(upload_url=UPLOAD_URL,
+                                                                       relative_path='resources/new.jar')
+    client.deployments.get.return_value.properties.source.relative_path = deployed_relative_path
+    return client
+
+
+@mock.patch('azext_spring_cloud.custom.sdk_no_wait', _sdk_no_wait)
+@mock.patch('azext_spring_cloud.custom.get_azure_files_info',
+            return_value=('account', 'core.windows.net', 'share', 'resources/new.jar', 'sv=sas'))
+@mock.patch('azext_spring_cloud.custom.FileService')
+class AppDeployTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.artifacts_file = os.path.join(self.temp_dir, 'spring_cloud_uploaded_artifacts.json')
+        patcher = mock.patch('azext_spring_cloud._utils._get_uploaded_artifacts_file', return_value=self.artifacts_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.jar = os.path.join(self.temp_dir, 'app.jar')
+        with open(self.jar, 'wb') as f:
+            f.write(b'jar content')
+
+    def _deploy(self, client, **kwargs):
+        return _app_deploy(client, 'rg', 'service', 'app', 'default', None, self.jar, None, None, None, None, None,
+                           None, update=True, **kwargs)
+
+    def _deployed_relative_path(self, client):
+        return client.deployments.update.call_args[1]['properties'].source.relative_path
+
+    def test_unchanged_package_is_not_uploaded(self, file_service, _):
+        save_uploaded_artifact_path('rg', 'service', 'app', 'default', _get_file_hash(self.jar), 'resources/old.jar')
+        client = _get_client('resources/old.jar')
+
+        self._deploy(client, skip_unchanged=True)
+
+        client.apps.get_resource_upload_url.assert_not_called()
+        file_service.assert_not_called()
+        self.assertEqual('resources/old.jar', self._deployed_relative_path(client))
+
+    def test_changed_package_is_uploaded(self, file_service, _):
+        save_uploaded_artifact_path('rg', 'service', 'app', 'default', 'otherhash', 'resources/old.jar')
+        client = _get_client('resources/old.jar')
+
+        self._deploy(client, skip_unchanged=True)
+
+        file_service.return_value.create_file_from_path.assert_called_once_with('share', None, 'resources/new.jar',
+                                                                                self.jar)
+        self.assertEqual('resources/new.jar', self._deployed_relative_path(client))
+        self.assertEqual('resources/new.jar',
+                         get_uploaded_artifact_path('rg', 'service', 'app', 'default', _get_file_hash(self.jar)))
+
+    def test_package_no_longer_deployed_is_uploaded(self, file_service, _):
+        save_uploaded_artifact_path('rg', 'service', 'app', 'default', _get_file_hash(self.jar), 'resources/old.jar')
+        client = _get_client('resources/other.jar')
+
+        self._deploy(client, skip_unchanged=True)
+
+        client.apps.get_resource_upload_url.assert_called_once()
+        file_service.return_value.create_file_from_path.assert_called_once()
+        self.assertEqual('resources/new.jar', self._deployed_relative_path(client))
+
+    def test_max_connections_reaches_uploader(self, file_service, _):
+        client = _get_client(None)
+
+        self._deploy(client, max_connections=8)
+
+        file_service.return_value.create_file_from_path.assert_called_once_with('share', None, 'resources/new.jar',
+                                                                                self.jar, max_connections=8)
+        # the hash of the package is only recorded with --skip-unchanged
+        self.assertFalse(os.path.exists(self.artifacts_file))
+
+    def test_uploaded_artifacts_are_replaced_atomically(self, *_):
+        save_uploaded_artifact_path('rg', 'service', 'app', 'default', 'hash1', 'resources/1.jar')
+        save_uploaded_artifact_path('rg', 'service', 'app', 'staging', 'hash2', 'resources/2.jar')
+
+        with open(self.artifacts_file) as f:
+            self.assertEqual(2, len(json.load(f)))
+        # no temporary files are left next to the record
+        self.assertEqual(['app.jar', 'spring_cloud_uploaded_artifacts.json'], sorted(os.listdir(self.temp_dir)))
+        self.assertEqual('resources/1.jar', get_uploaded_artifact_path('rg', 'service', 'app', 'default', 'hash1'))
+        self.assertIsNone(get_uploaded_artifact_path('rg', 'service', 'app', 'default', 'hash2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import io
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from azure.common import AzureHttpError
+
+from ... import _stream_utils
+from ..._stream_utils import stream_app_log_response, _stream_logs
+
+
+class _FakeResponse(object):
+    def __init__(self, body):
+        self.body = body
+        self.chunk_sizes = []
+
+    def iter_content(self, chunk_size=1):
+        self.chunk_sizes.append(chunk_size)
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class _RecordingOutput(io.StringIO):
+    encoding = 'utf-8'
+
+    def __init__(self):
+        super(_RecordingOutput, self).__init__()
+        self.writes = []
+
+    def write(self, s):
+        self.writes.append(s)
+        return super(_RecordingOutput, self).write(s)
+
+
+class _FakeAppendBlobService(object):
+    """An append blob which grows by one write every time its properties are polled."""
+
+    def __init__(self, writes):
+        self.writes = list(writes)
+        self.content = b''
+        self.metadata = {}
+        self.etag = 0
+
+    def _append(self):
+        if self.writes:
+            self.content += self.writes.pop(0)
+            if not self.writes:
+                self.metadata = {'__complete_status': 'Succeeded'}
+            self.etag += 1
+
+    def _properties(self, **kwargs):
+        return mock.MagicMock(etag=self.etag, content_length=len(self.content), **kwargs)
+
+    def get_blob_properties(self, container_name, blob_name, if_none_match=None):
+        self._append()
+        if if_none_match is not None and if_none_match == self.etag:
+            raise AzureHttpError('Not Modified', 304)
+        return mock.MagicMock(metadata=self.metadata, properties=self._properties())
+
+    def get_blob_to_bytes(self, container_name, blob_name, start_range, end_range, max_connections):
+        if start_range >= len(self.content):
+            raise AzureHttpError('InvalidRange', 416)
+        data = self.content[start_range:end_range + 1]
+        content_range = 'bytes {}-{}/{}'.format(start_range, start_range + len(data) - 1, len(self.content))
+        return mock.MagicMock(content=data, metadata=self.metadata,
+                              properties=self._properties(content_range=content_range))
+
+
+class BuildLogStreamTest(unittest.TestCase):
+    def test_stream_logs_assembles_lines_across_reads(self):
+        writes = [b'step 1\r\nstep', b' 2\r\n', b'', b'x' * 10000 + b'\r\n', b'done']
+        blob_service = _FakeAppendBlobService(writes)
+        logged = []
+
+        with mock.patch.object(_stream_utils.time, 'sleep'):
+            metrics = _stream_logs(True, 4096, 60, blob_service, 'container', 'blob', True, logged.append)
+
+        self.assertEqual(logged, ['step 1\r', 'step 2\r', 'x' * 10000 + '\r', 'done', 'Log status was: succeeded'])
+        self.assertEqual(metrics.bytes_read, len(blob_service.content))
+        # each write is read with a single range request, however large it is
+        self.assertEqual(metrics.range_reads, 4)
+        self.assertEqual(metrics.property_polls, 5)
+
+
+class AppLogStreamTest(unittest.TestCase):
+    def test_writes_line_aligned_batches(self):
+        body = u'first line\nsecond line\nthird'.encode('utf-8')
+        response = _FakeResponse(body)
+        output = _RecordingOutput()
+
+        read = stream_app_log_response(response, output, chunk_size=16)
+
+        self.assertEqual(read, len(body))
+        self.assertEqual(response.chunk_sizes, [16])
+        self.assertEqual(output.getvalue(), u'first line\nsecond line\nthird')
+        self.assertEqual(output.writes, [u'first line\n', u'second line\n', u'third'])
+
+    def test_multi_byte_characters_split_across_chunks(self):
+        body = u'日本語 log\nété\n'.encode('utf-8')
+        output = _RecordingOutput()
+
+        stream_app_log_response(_FakeResponse(body), output, chunk_size=2)
+
+        self.assertEqual(output.getvalue(), u'日本語 log\nété\n')
+        self.assertNotIn(u'�', output.getvalue())
+
+    def test_long_partial_line_is_flushed(self):
+        output = _RecordingOutput()
+
+        stream_app_log_response(_FakeResponse(b'x' * 10), output, chunk_size=4)
+
+        self.assertEqual(output.writes, [u'xxxx', u'xxxx', u'xx'])
@@ -0,0 +1,151 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from knack import log
+
+from . import cert_parser
+from . import file_utils
+
+logger = log.get_logger(__name__)
+
+# a cached certificate is requested again once it expires within this many seconds
+CERT_RENEWAL_MARGIN = 300
+# how long the IP address resolved for a VM is used without looking it up again, in seconds
+IP_CACHE_TTL = 300
+
+
+class CertificateCache(object):
+    """
+    The AAD issued certificates, one file each, for the public key and the account they were issued to.
+    A certificate is reused until it is about to expire.
+    """
+
+    _cert_suffix = "-aadcert"
+
+    def __init__(self, cache_dir, renewal_margin=CERT_RENEWAL_MARGIN):
+        self.cache_dir = cache_dir
+        self.renewal_margin = renewal_margin
+
+    def get(self, tenant_id, user_name, key_id):
+        cert_path = self._get_cert_path(tenant_id, user_name, key_id)
+        certificate, valid_before = self._read(cert_path)
+        if not certificate:
+            return None
+
+        if valid_before < time.time() + self.renewal_margin:
+            logger.debug("Cached certificate %s expires at %d, requesting a new one", cert_path, valid_before)
+            _remove(cert_path)
+            return None
+
+        logger.debug("Using cached certificate %s valid until %d", cert_path, valid_before)
+        return certificate
+
+    def add(self, certificate, tenant_id, user_name, key_id):
+        self.prune()
+        try:
+            _write_atomic(self._get_cert_path(tenant_id, user_name, key_id), certificate)
+        except (IOError, OSError) as e:
+            logger.debug("Could not cache certificate: %s", str(e))
+
+    def prune(self):
+        """Removes the certificates that expired, whose keys may never be used again."""
+        try:
+            file_names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        now = time.time()
+        for file_name in file_names:
+            if file_name.endswith(self._cert_suffix):
+                cert_path = os.path.join(self.cache_dir, file_name)
+                certificate, valid_before = self._read(cert_path)
+                if certificate and valid_before < now:
+                    logger.debug("Removing expired cached certificate %s", cert_path)
+                    _remove(cert_path)
+
+    def _read(self, cert_path):
+        try:
+            with open(cert_path, 'r') as f:
+                certificate = f.read()
+        except (IOError, OSError):
+            return None, 0
+
+        parser = cert_parser.CertParser()
+        try:
+            parser.parse(certificate)
+        except Exception:  # pylint: disable=broad-except
+            logger.debug("Ignoring unreadable cached certificate %s", cert_path)
+            _remove(cert_path)
+            return None, 0
+        return certificate, parser.valid_before
+
+    def _get_cert_path(self, tenant_id, user_name, key_id):
+        return os.path.join(self.cache_dir, _hash_key(tenant_id, user_name, key_id) + self._cert_suffix)
+
+
+class IPCache(object):
+    """The IP addresses resolved for VMs, kept in a JSON file for ttl seconds."""
+
+    def __init__(self, cache_path, ttl=IP_CACHE_TTL):
+        self.cache_path = cache_path
+        self.ttl = ttl
+
+    def get(self, subscription_id, resource_group, vm_name, use_private_ip):
+        entry = self._load().get(_hash_key(subscription_id, resource_group, vm_name, use_private_ip))
+        if entry and entry.get('expires', 0) > time.time():
+            logger.debug("Using cached IP address %s of VM %s", entry.get('ip'), vm_name)
+            return entry.get('ip')
+        return None
+
+    def add(self, ip, subscription_id, resource_group, vm_name, use_private_ip):
+        now = time.time()
+        entries = {key: entry for key, entry in self._load().items() if entry.get('expires', 0) > now}
+        entries[_hash_key(subscription_id, resource_group, vm_name, use_private_ip)] = {
+            'ip': ip,
+            'expires': now + self.ttl
+        }
+        try:
+            _write_atomic(self.cache_path, json.dumps(entries))
+        except (IOError, OSError) as e:
+            logger.debug("Could not cache IP address: %s", str(e))
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                entries = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+
+def _hash_key(*parts):
+    key_hash = hashlib.sha256()
+    key_hash.update(json.dumps([str(part).lower() for part in parts]).encode('utf-8'))
+    return key_hash.hexdigest()
+
+
+def _write_atomic(path, contents):
+    # several sessions may be started at once, so a reader never sees a partially written file
+    file_utils.mkdir_p(os.path.dirname(path))
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(contents)
+        os.replace(temp_path, path)
+    except (IOError, OSError):
+        _remove(temp_path)
+        raise
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
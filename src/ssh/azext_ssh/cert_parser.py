@@ -0,0 +1,83 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import base64
+import struct
+
+
+class CertParser(object):
+    # pylint: disable=too-few-public-methods
+    """Reads the fields of an ssh-rsa-cert-v01@openssh.com certificate, as laid out in OpenSSH's PROTOCOL.certkeys"""
+    RSACertAlgorithm = 'ssh-rsa-cert-v01@openssh.com'
+
+    def __init__(self):
+        self.algorithm = ''
+        self.serial = 0
+        self.cert_type = 0
+        self.key_id = ''
+        self.principals = []
+        self.valid_after = 0
+        self.valid_before = 0
+        self._cert_bytes = b''
+        self._read = 0
+
+    def parse(self, cert_text):
+        text_parts = cert_text.split()
+
+        # the certificate may be given with or without its algorithm in front of it
+        if len(text_parts) > 1:
+            algorithm = text_parts[0]
+            if algorithm != CertParser.RSACertAlgorithm:
+                raise ValueError(f"Certificate is not {CertParser.RSACertAlgorithm} algorithm ({algorithm})")
+            text_parts = text_parts[1:]
+
+        if not text_parts:
+            error_str = ("Incorrectly formatted certificate. "
+                         "Certificate must be format '<algorithm> <base64_cert>'")
+            raise ValueError(error_str)
+
+        self._cert_bytes = base64.b64decode(text_parts[0])
+        self._read = 0
+
+        encoded_algorithm = self._get_string().decode("ascii")
+        if encoded_algorithm != CertParser.RSACertAlgorithm:
+            raise ValueError(f"Encoded certificate is not {CertParser.RSACertAlgorithm} algorithm "
+                             f"({encoded_algorithm})")
+
+        self._get_string()  # nonce
+        self._get_string()  # public key exponent
+        self._get_string()  # public key modulus
+        self.algorithm = encoded_algorithm
+        self.serial = self._get_uint64()
+        self.cert_type = self._get_uint32()
+        self.key_id = self._get_string().decode("utf-8")
+        self.principals = [principal.decode("utf-8") for principal in self._get_fields(self._get_string())]
+        self.valid_after = self._get_uint64()
+        self.valid_before = self._get_uint64()
+
+    def _get_fields(self, field_bytes):
+        read = 0
+        while read < len(field_bytes):
+            length = struct.unpack(">L", field_bytes[read:read + 4])[0]
+            read = read + 4
+            data = field_bytes[read:read + length]
+            read = read + length
+            yield data
+
+    def _get_string(self):
+        return self._get_bytes(self._get_uint32())
+
+    def _get_uint32(self):
+        return struct.unpack(">L", self._get_bytes(4))[0]
+
+    def _get_uint64(self):
+        return struct.unpack(">Q", self._get_bytes(8))[0]
+
+    def _get_bytes(self, length):
+        if self._read + length > len(self._cert_bytes):
+            raise ValueError("Incorrectly encoded certificate. Certificate ended before all its fields were read")
+        data = self._cert_bytes[self._read:self._read + length]
+        self._read = self._read + length
+        return data
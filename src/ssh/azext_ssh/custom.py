@@ -11,6 +11,7 @@ import tempfile
 
 from knack import util
 
+from . import cache_utils
 from . import ip_utils
 from . import rsa_parser
 from . import ssh_utils
@@ -29,13 +30,16 @@ def ssh_config(cmd, config_path, resource_group_name=None, vm_name=None, ssh_ip=
 
 
 def ssh_cert(cmd, cert_path=None, public_key_file=None):
+    cache_certificate = bool(public_key_file)
     public_key_file, _ = _check_or_create_public_private_files(public_key_file, None)
-    cert_file, _ = _get_and_write_certificate(cmd, public_key_file, cert_path)
+    cert_file, _ = _get_and_write_certificate(cmd, public_key_file, cert_path, cache_certificate)
     print(cert_file + "\n")
 
 
 def _do_ssh_op(cmd, resource_group, vm_name, ssh_ip, public_key_file, private_key_file, use_private_ip, op_call):
     _assert_args(resource_group, vm_name, ssh_ip)
+    # a generated key pair is never used again, so neither is its certificate
+    cache_certificate = bool(public_key_file or private_key_file)
     public_key_file, private_key_file = _check_or_create_public_private_files(public_key_file, private_key_file)
     ssh_ip = ssh_ip or ip_utils.get_ssh_ip(cmd, resource_group, vm_name, use_private_ip)
 
@@ -45,17 +49,27 @@ def _do_ssh_op(cmd, resource_group, vm_name, ssh_ip, public_key_file, private_ke
 
         raise util.CLIError(f"VM '{vm_name}' does not have a public or private IP address to SSH to")
 
-    cert_file, username = _get_and_write_certificate(cmd, public_key_file, None)
+    cert_file, username = _get_and_write_certificate(cmd, public_key_file, None, cache_certificate)
     op_call(ssh_ip, username, cert_file, private_key_file)
 
 
-def _get_and_write_certificate(cmd, public_key_file, cert_file):
+def _get_and_write_certificate(cmd, public_key_file, cert_file, cache_certificate=True):
     scopes = ["https://pas.windows.net/CheckMyAccess/Linux/.default"]
     data = _prepare_jwk_data(public_key_file)
     from azure.cli.core._profile import Profile
     profile = Profile(cli_ctx=cmd.cli_ctx)
-    # we used to use the username from the token but now we throw it away
-    _, certificate = profile.get_msal_token(scopes, data)
+    # certificates are issued for a key and the signed in account, and are reused for both until they expire
+    certificate = None
+    if cache_certificate:
+        account = profile.get_subscription()
+        cache_key = (account['tenantId'], account['user']['name'], data['key_id'])
+        cert_cache = cache_utils.CertificateCache(os.path.join(cmd.cli_ctx.config.config_dir, "ssh", "certs"))
+        certificate = cert_cache.get(*cache_key)
+    if not certificate:
+        # we used to use the username from the token but now we throw it away
+        _, certificate = profile.get_msal_token(scopes, data)
+        if cache_certificate:
+            cert_cache.add(certificate, *cache_key)
     if not cert_file:
         cert_file = public_key_file + "-aadcert.pub"
     _write_cert_file(certificate, cert_file)
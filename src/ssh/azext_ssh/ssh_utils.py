@@ -9,6 +9,7 @@ import subprocess
 from knack import log
 from knack import util
 
+from . import cert_parser
 from . import file_utils
 
 logger = log.get_logger(__name__)
@@ -27,26 +28,20 @@ def create_ssh_keyfile(private_key_file):
     subprocess.call(command, shell=platform.system() == 'Windows')
 
 
-def get_ssh_cert_info(cert_file):
-    command = [_get_ssh_path("ssh-keygen"), "-L", "-f", cert_file]
-    logger.debug("Running ssh-keygen command %s", ' '.join(command))
-    return subprocess.check_output(command, shell=platform.system() == 'Windows').decode().splitlines()
+def get_ssh_cert_principals(cert_file):
+    return get_ssh_cert_info(cert_file).principals
 
 
-def get_ssh_cert_principals(cert_file):
-    info = get_ssh_cert_info(cert_file)
-    principals = []
-    in_principal = False
-    for line in info:
-        if ":" in line:
-            in_principal = False
-        if "Principals:" in line:
-            in_principal = True
-            continue
-        if in_principal:
-            principals.append(line.strip())
-
-    return principals
+def get_ssh_cert_info(cert_file):
+    with open(cert_file, 'r') as f:
+        cert_text = f.read()
+
+    parser = cert_parser.CertParser()
+    try:
+        parser.parse(cert_text)
+    except Exception as e:
+        raise util.CLIError(f"Could not parse certificate {cert_file}. Error: {str(e)}")
+    return parser
 
 
 def write_ssh_config(config_path, resource_group, vm_name, overwrite,
@@ -0,0 +1,109 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import mock
+
+from azext_ssh import cache_utils
+from azext_ssh.tests.latest import test_cert_parser
+
+
+class CertificateCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = os.path.join(tempfile.mkdtemp(), "certs")
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.cache_dir), ignore_errors=True)
+
+    def test_certificate_is_reused(self):
+        certificate = test_cert_parser.get_certificate(valid_before=int(time.time()) + 3600)
+        cert_cache = cache_utils.CertificateCache(self.cache_dir)
+        self.assertIsNone(cert_cache.get("tenant", "user@contoso.com", "keyid"))
+
+        cert_cache.add(certificate, "tenant", "user@contoso.com", "keyid")
+
+        cert_cache = cache_utils.CertificateCache(self.cache_dir)
+        self.assertEqual(certificate, cert_cache.get("Tenant", "User@contoso.com", "keyid"))
+        self.assertIsNone(cert_cache.get("othertenant", "user@contoso.com", "keyid"))
+        self.assertIsNone(cert_cache.get("tenant", "other@contoso.com", "keyid"))
+        self.assertIsNone(cert_cache.get("tenant", "user@contoso.com", "otherkeyid"))
+
+    def test_certificate_about_to_expire_is_not_reused(self):
+        certificate = test_cert_parser.get_certificate(valid_before=int(time.time()) + 60)
+        cert_cache = cache_utils.CertificateCache(self.cache_dir)
+        cert_cache.add(certificate, "tenant", "user@contoso.com", "keyid")
+
+        self.assertIsNone(cert_cache.get("tenant", "user@contoso.com", "keyid"))
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_unreadable_certificate_is_not_reused(self):
+        cert_cache = cache_utils.CertificateCache(self.cache_dir)
+        cert_cache.add("notacertificate", "tenant", "user@contoso.com", "keyid")
+
+        self.assertIsNone(cert_cache.get("tenant", "user@contoso.com", "keyid"))
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_expired_certificates_are_pruned(self):
+        expired = test_cert_parser.get_certificate(valid_before=int(time.time()) - 60)
+        valid = test_cert_parser.get_certificate(valid_before=int(time.time()) + 3600)
+        cert_cache = cache_utils.CertificateCache(self.cache_dir)
+        cert_cache.add(expired, "tenant", "user@contoso.com", "ephemeralkeyid")
+        cert_cache.add(valid, "tenant", "user@contoso.com", "otherkeyid")
+
+        cert_cache.add(valid, "tenant", "user@contoso.com", "keyid")
+
+        self.assertEqual(2, len(os.listdir(self.cache_dir)))
+        self.assertEqual(valid, cert_cache.get("tenant", "user@contoso.com", "otherkeyid"))
+        self.assertEqual(valid, cert_cache.get("tenant", "user@contoso.com", "keyid"))
+
+
+class IPCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = os.path.join(tempfile.mkdtemp(), "ssh", "ips.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(os.path.dirname(self.cache_path)), ignore_errors=True)
+
+    def test_ip_is_reused(self):
+        ip_cache = cache_utils.IPCache(self.cache_path)
+        self.assertIsNone(ip_cache.get("sub", "rg", "vm", False))
+
+        ip_cache.add("1.2.3.4", "sub", "rg", "vm", False)
+        ip_cache.add("10.0.0.4", "sub", "rg", "vm", True)
+
+        ip_cache = cache_utils.IPCache(self.cache_path)
+        self.assertEqual("1.2.3.4", ip_cache.get("sub", "RG", "vm", False))
+        self.assertEqual("10.0.0.4", ip_cache.get("sub", "rg", "vm", True))
+        self.assertIsNone(ip_cache.get("othersub", "rg", "vm", False))
+
+    @mock.patch('time.time')
+    def test_expired_ip_is_not_reused(self, mock_time):
+        mock_time.return_value = 1000
+        ip_cache = cache_utils.IPCache(self.cache_path, ttl=300)
+        ip_cache.add("1.2.3.4", "sub", "rg", "vm", False)
+
+        mock_time.return_value = 1299
+        self.assertEqual("1.2.3.4", ip_cache.get("sub", "rg", "vm", False))
+        mock_time.return_value = 1300
+        self.assertIsNone(ip_cache.get("sub", "rg", "vm", False))
+
+        ip_cache.add("5.6.7.8", "sub", "rg", "othervm", False)
+        with open(self.cache_path) as f:
+            self.assertEqual(1, len(json.load(f)))
+
+    def test_corrupt_cache_is_ignored(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, 'w') as f:
+            f.write("{not json")
+        ip_cache = cache_utils.IPCache(self.cache_path)
+
+        self.assertIsNone(ip_cache.get("sub", "rg", "vm", False))
+        ip_cache.add("1.2.3.4", "sub", "rg", "vm", False)
+        self.assertEqual("1.2.3.4", ip_cache.get("sub", "rg", "vm", False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import base64
+import struct
+import unittest
+
+from azext_ssh import cert_parser
+
+
+def _string(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return struct.pack(">L", len(data)) + data
+
+
+def get_certificate(principals=("user@contoso.com",), valid_after=1600000000, valid_before=1600003600,
+                    algorithm="ssh-rsa-cert-v01@openssh.com"):
+    cert_bytes = b''.join([
+        _string(algorithm),
+        _string(b'nonce'),
+        _string(b'\x01\x00\x01'),
+        _string(b'\x00modulus'),
+        struct.pack(">Q", 42),
+        struct.pack(">L", 1),
+        _string("keyid"),
+        _string(b''.join(_string(principal) for principal in principals)),
+        struct.pack(">Q", valid_after),
+        struct.pack(">Q", valid_before),
+        _string(b''),
+        _string(b''),
+        _string(b''),
+        _string(b'signaturekey'),
+        _string(b'signature')
+    ])
+    return base64.b64encode(cert_bytes).decode('ascii')
+
+
+class CertParserTest(unittest.TestCase):
+    def test_cert_parser_success(self):
+        parser = cert_parser.CertParser()
+
+        parser.parse("ssh-rsa-cert-v01@openssh.com " + get_certificate(("User@contoso.com", "user")))
+
+        self.assertEqual("ssh-rsa-cert-v01@openssh.com", parser.algorithm)
+        self.assertEqual(42, parser.serial)
+        self.assertEqual(1, parser.cert_type)
+        self.assertEqual("keyid", parser.key_id)
+        self.assertEqual(["User@contoso.com", "user"], parser.principals)
+        self.assertEqual(1600000000, parser.valid_after)
+        self.assertEqual(1600003600, parser.valid_before)
+
+    def test_cert_parser_without_algorithm(self):
+        parser = cert_parser.CertParser()
+
+        parser.parse(get_certificate())
+
+        self.assertEqual(["user@contoso.com"], parser.principals)
+
+    def test_cert_parser_wrong_algorithm(self):
+        parser = cert_parser.CertParser()
+
+        self.assertRaises(ValueError, parser.parse, "ssh-rsa " + get_certificate())
+
+    def test_cert_parser_algorithm_mismatch(self):
+        parser = cert_parser.CertParser()
+
+        self.assertRaises(ValueError, parser.parse, get_certificate(algorithm="ssh-ed25519-cert-v01@openssh.com"))
+
+    def test_cert_parser_truncated(self):
+        parser = cert_parser.CertParser()
+        cert_bytes = base64.b64decode(get_certificate())
+
+        self.assertRaises(ValueError, parser.parse, base64.b64encode(cert_bytes[:60]).decode('ascii'))
+
+    def test_cert_parser_empty(self):
+        parser = cert_parser.CertParser()
+
+        self.assertRaises(ValueError, parser.parse, "")
+
+
+if __name__ == '__main__':
+    unittest.main()
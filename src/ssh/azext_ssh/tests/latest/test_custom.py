@@ -4,6 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 import io
+import os
 from knack import util
 import mock
 import unittest
@@ -37,6 +38,8 @@ class SshCustomCommandTest(unittest.TestCase):
         mock_do_op.assert_called_once_with(
             cmd, "rg", "vm", "ip", "public", "private", False, mock.ANY)
 
+    @mock.patch('azext_ssh.cache_utils.CertificateCache')
+    @mock.patch('azure.cli.core._profile.Profile.get_subscription')
     @mock.patch('azext_ssh.ssh_utils.get_ssh_cert_principals')
     @mock.patch('os.path.join')
     @mock.patch('azext_ssh.custom._assert_args')
@@ -46,7 +49,7 @@ class SshCustomCommandTest(unittest.TestCase):
     @mock.patch('azure.cli.core._profile.Profile.get_msal_token')
     @mock.patch('azext_ssh.custom._write_cert_file')
     def test_do_ssh_op(self, mock_write_cert, mock_ssh_creds, mock_get_mod_exp, mock_ip,
-                       mock_check_files, mock_assert, mock_join, mock_principal):
+                       mock_check_files, mock_assert, mock_join, mock_principal, mock_subscription, mock_cache):
         cmd = mock.Mock()
         mock_op = mock.Mock()
         mock_check_files.return_value = "public", "private"
@@ -54,6 +57,8 @@ class SshCustomCommandTest(unittest.TestCase):
         mock_get_mod_exp.return_value = "modulus", "exponent"
         mock_ssh_creds.return_value = "username", "certificate"
         mock_join.return_value = "public-aadcert.pub"
+        mock_subscription.return_value = {'tenantId': 'tenant', 'user': {'name': 'user@contoso.com'}}
+        mock_cache.return_value.get.return_value = None
 
         custom._do_ssh_op(cmd, None, None, "1.2.3.4", "publicfile", "privatefile", False, mock_op)
 
@@ -61,6 +66,64 @@ class SshCustomCommandTest(unittest.TestCase):
         mock_check_files.assert_called_once_with("publicfile", "privatefile")
         mock_ip.assert_not_called()
         mock_get_mod_exp.assert_called_once_with("public")
+        mock_ssh_creds.assert_called_once()
+        mock_cache.return_value.add.assert_called_once_with("certificate", "tenant", "user@contoso.com", mock.ANY)
+        mock_write_cert.assert_called_once_with("certificate", "public-aadcert.pub")
+        mock_op.assert_called_once_with(
+            "1.2.3.4", "username", "public-aadcert.pub", "private")
+
+    @mock.patch('azext_ssh.cache_utils.CertificateCache')
+    @mock.patch('azure.cli.core._profile.Profile.get_subscription')
+    @mock.patch('azext_ssh.ssh_utils.get_ssh_cert_principals')
+    @mock.patch('azext_ssh.custom._get_modulus_exponent')
+    @mock.patch('azure.cli.core._profile.Profile.get_msal_token')
+    @mock.patch('azext_ssh.custom._write_cert_file')
+    def test_get_and_write_certificate_cached(self, mock_write_cert, mock_ssh_creds, mock_get_mod_exp,
+                                              mock_principal, mock_subscription, mock_cache):
+        cmd = mock.Mock()
+        cmd.cli_ctx.config.config_dir = "/home/user/.azure"
+        mock_principal.return_value = ["UserName"]
+        mock_get_mod_exp.return_value = "modulus", "exponent"
+        mock_subscription.return_value = {'tenantId': 'tenant', 'user': {'name': 'user@contoso.com'}}
+        mock_cache.return_value.get.return_value = "cachedcertificate"
+
+        cert_file, username = custom._get_and_write_certificate(cmd, "public", None)
+
+        self.assertEqual("public-aadcert.pub", cert_file)
+        self.assertEqual("username", username)
+        mock_cache.assert_called_once_with(os.path.join("/home/user/.azure", "ssh", "certs"))
+        mock_cache.return_value.get.assert_called_once_with(
+            "tenant", "user@contoso.com", custom._prepare_jwk_data("public")["key_id"])
+        mock_ssh_creds.assert_not_called()
+        mock_cache.return_value.add.assert_not_called()
+        mock_write_cert.assert_called_once_with("cachedcertificate", "public-aadcert.pub")
+
+    @mock.patch('azext_ssh.cache_utils.CertificateCache')
+    @mock.patch('azure.cli.core._profile.Profile.get_subscription')
+    @mock.patch('azext_ssh.ssh_utils.get_ssh_cert_principals')
+    @mock.patch('os.path.join')
+    @mock.patch('azext_ssh.custom._assert_args')
+    @mock.patch('azext_ssh.custom._check_or_create_public_private_files')
+    @mock.patch('azext_ssh.custom._get_modulus_exponent')
+    @mock.patch('azure.cli.core._profile.Profile.get_msal_token')
+    @mock.patch('azext_ssh.custom._write_cert_file')
+    def test_do_ssh_op_generated_keys_not_cached(self, mock_write_cert, mock_ssh_creds, mock_get_mod_exp,
+                                                 mock_check_files, mock_assert, mock_join, mock_principal,
+                                                 mock_subscription, mock_cache):
+        cmd = mock.Mock()
+        mock_op = mock.Mock()
+        mock_check_files.return_value = "public", "private"
+        mock_principal.return_value = ["username"]
+        mock_get_mod_exp.return_value = "modulus", "exponent"
+        mock_ssh_creds.return_value = "username", "certificate"
+        mock_join.return_value = "public-aadcert.pub"
+
+        custom._do_ssh_op(cmd, None, None, "1.2.3.4", None, None, False, mock_op)
+
+        mock_check_files.assert_called_once_with(None, None)
+        mock_ssh_creds.assert_called_once()
+        mock_subscription.assert_not_called()
+        mock_cache.assert_not_called()
         mock_write_cert.assert_called_once_with("certificate", "public-aadcert.pub")
         mock_op.assert_called_once_with(
             "1.2.3.4", "username", "public-aadcert.pub", "private")
@@ -0,0 +1,63 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import shutil
+import tempfile
+import unittest
+import mock
+
+from azext_ssh import ip_utils
+
+NIC_ID = "/subscriptions/sub/resourceGroups/nicrg/providers/Microsoft.Network/networkInterfaces/nic"
+
+
+class IPUtilsTest(unittest.TestCase):
+    def setUp(self):
+        self.cmd = mock.Mock()
+        self.cmd.cli_ctx.config.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cmd.cli_ctx.config.config_dir, ignore_errors=True)
+
+    def _get_clients(self, public_ip="1.2.3.4", private_ip="10.0.0.4"):
+        compute_client = mock.Mock()
+        network_client = mock.Mock()
+        compute_client.virtual_machines.get.return_value.network_profile.network_interfaces = [mock.Mock(id=NIC_ID)]
+        ip_config = mock.Mock(private_ip_address=private_ip)
+        ip_config.public_ip_address = mock.Mock(ip_address=public_ip) if public_ip else None
+        network_client.network_interfaces.get.return_value.ip_configurations = [ip_config]
+        return compute_client, network_client
+
+    @mock.patch('azext_ssh.ip_utils.client_factory')
+    def test_get_ssh_ip(self, mock_client_factory):
+        compute_client, network_client = self._get_clients()
+        mock_client_factory.get_subscription_id.return_value = "sub"
+        mock_client_factory.get_mgmt_service_client.side_effect = [compute_client, network_client]
+
+        self.assertEqual("1.2.3.4", ip_utils.get_ssh_ip(self.cmd, "rg", "vm", False))
+        self.assertEqual("1.2.3.4", ip_utils.get_ssh_ip(self.cmd, "rg", "vm", False))
+
+        compute_client.virtual_machines.get.assert_called_once_with("rg", "vm")
+        network_client.network_interfaces.get.assert_called_once_with(
+            "nicrg", "nic", expand='ipConfigurations/publicIPAddress')
+        network_client.public_ip_addresses.get.assert_not_called()
+
+    @mock.patch('azext_ssh.ip_utils.client_factory')
+    def test_get_ssh_private_ip(self, mock_client_factory):
+        mock_client_factory.get_subscription_id.return_value = "sub"
+        mock_client_factory.get_mgmt_service_client.side_effect = self._get_clients(public_ip=None)
+
+        self.assertEqual("10.0.0.4", ip_utils.get_ssh_ip(self.cmd, "rg", "vm", True))
+
+    @mock.patch('azext_ssh.ip_utils.client_factory')
+    def test_get_ssh_ip_no_public_ip_is_not_cached(self, mock_client_factory):
+        mock_client_factory.get_subscription_id.return_value = "sub"
+        mock_client_factory.get_mgmt_service_client.side_effect = \
+            list(self._get_clients(public_ip=None)) + list(self._get_clients())
+
+        self.assertIsNone(ip_utils.get_ssh_ip(self.cmd, "rg", "vm", False))
+        self.assertEqual("1.2.3.4", ip_utils.get_ssh_ip(self.cmd, "rg", "vm", False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,7 @@ import unittest
 import platform
 
 from azext_ssh import ssh_utils
+from azext_ssh.tests.latest import test_cert_parser
 
 
 class SSHUtilsTests(unittest.TestCase):
@@ -29,6 +30,21 @@ class SSHUtilsTests(unittest.TestCase):
         mock_build.assert_called_once_with("cert", "private")
         mock_call.assert_called_once_with(expected_command, shell=platform.system() == 'Windows')
 
+    @mock.patch('subprocess.check_output')
+    def test_get_ssh_cert_principals(self, mock_check_output):
+        cert_text = "ssh-rsa-cert-v01@openssh.com " + test_cert_parser.get_certificate(("user@contoso.com", "user"))
+
+        with mock.patch('builtins.open', mock.mock_open(read_data=cert_text)) as mock_open:
+            principals = ssh_utils.get_ssh_cert_principals("cert")
+
+        self.assertEqual(["user@contoso.com", "user"], principals)
+        mock_open.assert_called_once_with("cert", 'r')
+        mock_check_output.assert_not_called()
+
+    def test_get_ssh_cert_principals_bad_cert(self):
+        with mock.patch('builtins.open', mock.mock_open(read_data="ssh-rsa-cert-v01@openssh.com bm90YWNlcnQ=")):
+            self.assertRaises(util.CLIError, ssh_utils.get_ssh_cert_principals, "cert")
+
     @mock.patch('azext_ssh.ssh_utils.file_utils.make_dirs_for_file')
     def test_write_ssh_config_ip_and_vm(self, mock_make_dirs):
         expected_lines = [
@@ -20,6 +20,7 @@ from azure.cli.command_modules.storage.util import (create_blob_service_from_sto
 from knack.log import get_logger
 from knack.util import CLIError
 from ..profiles import CUSTOM_DATA_STORAGE_BLOB
+from ..util import retry_transient_errors, run_concurrently
 
 logger = get_logger(__name__)
 
@@ -99,7 +100,7 @@ def set_service_properties(client, delete_retention=None, delete_retention_perio
 
 def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
                             destination_path=None, source_container=None, source_share=None,
-                            source_sas=None, pattern=None, dryrun=False):
+                            source_sas=None, pattern=None, dryrun=False, max_parallel=1):
     """Copy a group of blob or files to a blob container."""
     if dryrun:
         logger.warning('copy files or blobs to blob container')
@@ -109,6 +110,7 @@ def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
         logger.warning('source type %s', 'blob' if source_container else 'file')
         logger.warning('    pattern %s', pattern)
         logger.warning(' operations')
+        max_parallel = 1
 
     if source_container:
         # copy blobs for blob container
@@ -127,9 +129,8 @@ def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
                 return _copy_blob_to_blob_container(client, source_client, container_name, destination_path,
                                                     source_container, source_sas, blob_name)
 
-        return list(filter_none(action_blob_copy(blob) for blob in collect_blobs(source_client,
-                                                                                 source_container,
-                                                                                 pattern)))
+        source_blobs = (blob_name for blob_name, _ in collect_blob_objects(source_client, source_container, pattern))
+        return list(filter_none(run_concurrently(action_blob_copy, source_blobs, max_parallel)))
 
     if source_share:
         # copy blob from file share
@@ -150,17 +151,16 @@ def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
                 return _copy_file_to_blob_container(client, source_client, container_name, destination_path,
                                                     source_share, source_sas, dir_name, file_name)
 
-        return list(filter_none(action_file_copy(file) for file in collect_files(cmd,
-                                                                                 source_client,
-                                                                                 source_share,
-                                                                                 pattern)))
+        source_files = collect_files(cmd, source_client, source_share, pattern)
+        return list(filter_none(run_concurrently(action_file_copy, source_files, max_parallel)))
     raise ValueError('Fail to find source. Neither blob container or file share is specified')
 
 
 # pylint: disable=unused-argument
 def storage_blob_download_batch(client, source, destination, source_container_name, pattern=None, dryrun=False,
-                                progress_callback=None, max_connections=2):
+                                progress_callback=None, max_connections=2, max_parallel=1):
 
+    @retry_transient_errors
     def _download_blob(blob_service, container, destination_folder, normalized_blob_name, blob_name):
         # TODO: try catch IO exception
         destination_path = os.path.join(destination_folder, normalized_blob_name)
@@ -172,6 +172,10 @@ def storage_blob_download_batch(client, source, destination, source_container_na
                                              progress_callback=progress_callback)
         return blob.name
 
+    if max_parallel > 1 and not dryrun:
+        return _download_blobs_concurrently(client, source_container_name, destination, pattern, _download_blob,
+                                            max_parallel)
+
     source_blobs = collect_blobs(client, source_container_name, pattern)
     blobs_to_download = {}
     for blob_name in source_blobs:
@@ -213,6 +217,30 @@ def storage_blob_download_batch(client, source, destination, source_container_na
     return results
 
 
+def _download_blobs_concurrently(client, source_container_name, destination, pattern, download_func, max_parallel):
+    """
+    Download blobs on a pool of max_parallel workers while the container is still being listed. Per-blob
+    progress is not reported in this mode since many blobs are transferred at once.
+    """
+    def _iter_blobs_to_download():
+        normalized_blob_names = set()
+        for blob_name, _ in collect_blob_objects(client, source_container_name, pattern):
+            # remove starting path seperator and normalize
+            normalized_blob_name = normalize_blob_file_path(None, blob_name)
+            if normalized_blob_name in normalized_blob_names:
+                raise CLIError('Multiple blobs with download path: `{}`. As a solution, use the `--pattern` '
+                               'parameter to select for a subset of blobs to download OR utilize the `storage blob '
+                               'download` command instead to download individual blobs.'.format(normalized_blob_name))
+            normalized_blob_names.add(normalized_blob_name)
+            yield normalized_blob_name, blob_name
+
+    def _download_action(blob_info):
+        normalized_blob_name, blob_name = blob_info
+        return download_func(client, source_container_name, destination, normalized_blob_name, blob_name)
+
+    return list(run_concurrently(_download_action, _iter_blobs_to_download(), max_parallel))
+
+
 def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  # pylint: disable=too-many-locals
                               source_files=None, destination_path=None,
                               destination_container_name=None, blob_type=None,
@@ -316,8 +344,9 @@ def show_blob(cmd, client, container_name, blob_name, snapshot=None, lease_id=No
 
 def storage_blob_delete_batch(client, source, source_container_name, pattern=None, lease_id=None,
                               delete_snapshots=None, if_modified_since=None, if_unmodified_since=None, if_match=None,
-                              if_none_match=None, timeout=None, dryrun=False):
+                              if_none_match=None, timeout=None, dryrun=False, max_parallel=1):
     @check_precondition_success
+    @retry_transient_errors
     def _delete_blob(blob_name):
         delete_blob_args = {
             'container_name': source_container_name,
@@ -332,7 +361,7 @@ def storage_blob_delete_batch(client, source, source_container_name, pattern=Non
         }
         return client.delete_blob(**delete_blob_args)
 
-    source_blobs = list(collect_blob_objects(client, source_container_name, pattern))
+    source_blobs = collect_blob_objects(client, source_container_name, pattern)
 
     if dryrun:
         from datetime import timezone
@@ -352,10 +381,15 @@ def storage_blob_delete_batch(client, source, source_container_name, pattern=Non
             logger.warning('  - %s', blob)
         return []
 
-    results = [result for include, result in (_delete_blob(blob[0]) for blob in source_blobs) if include]
-    num_failures = len(source_blobs) - len(results)
+    results = []
+    num_blobs = 0
+    for include, result in run_concurrently(_delete_blob, (blob[0] for blob in source_blobs), max_parallel):
+        num_blobs += 1
+        if include:
+            results.append(result)
+    num_failures = num_blobs - len(results)
     if num_failures:
-        logger.warning('%s of %s blobs not deleted due to "Failed Precondition"', num_failures, len(source_blobs))
+        logger.warning('%s of %s blobs not deleted due to "Failed Precondition"', num_failures, num_blobs)
 
 
 def generate_container_shared_access_signature(client, container_name, permission=None,
@@ -387,7 +421,7 @@ def _copy_blob_to_blob_container(blob_service, source_blob_service, destination_
                                                         sas_token=source_sas)
     destination_blob_name = normalize_blob_file_path(destination_path, source_blob_name)
     try:
-        blob_service.copy_blob(destination_container, destination_blob_name, source_blob_url)
+        retry_transient_errors(blob_service.copy_blob)(destination_container, destination_blob_name, source_blob_url)
         return blob_service.make_blob_url(destination_container, destination_blob_name)
     except AzureException:
         error_template = 'Failed to copy blob {} to container {}.'
@@ -405,7 +439,7 @@ def _copy_file_to_blob_container(blob_service, source_file_service, destination_
     destination_blob_name = normalize_blob_file_path(destination_path, source_path)
 
     try:
-        blob_service.copy_blob(destination_container, destination_blob_name, file_url)
+        retry_transient_errors(blob_service.copy_blob)(destination_container, destination_blob_name, file_url)
         return blob_service.make_blob_url(destination_container, destination_blob_name)
     except AzureException as ex:
         error_template = 'Failed to copy file {} to container {}. {}'
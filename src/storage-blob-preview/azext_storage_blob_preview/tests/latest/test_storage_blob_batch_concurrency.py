@@ -0,0 +1,135 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+import unittest
+
+from azure.common import AzureException, AzureHttpError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from ...operations.blob import storage_blob_delete_batch
+from ...util import retry_transient_errors, run_concurrently
+
+
+class FakeBlob(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeBlobService(object):
+    """An in-memory blob service that simulates per-request latency and counts concurrent requests."""
+
+    def __init__(self, blob_count, request_latency=0.005, page_size=100):
+        self.blobs = ['logs/{:06d}.log'.format(i) for i in range(blob_count)]
+        self.request_latency = request_latency
+        self.page_size = page_size
+        self.deleted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def list_blobs(self, container_name):
+        for start in range(0, len(self.blobs), self.page_size):
+            time.sleep(self.request_latency)
+            for name in self.blobs[start:start + self.page_size]:
+                yield FakeBlob(name)
+
+    def delete_blob(self, container_name, blob_name, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.request_latency)
+        with self._lock:
+            self.in_flight -= 1
+            self.deleted.append(blob_name)
+
+
+class StorageBlobBatchConcurrencyTest(unittest.TestCase):
+    def test_run_concurrently_keeps_order_and_bounds_pending_work(self):
+        pulled = []
+
+        def _items():
+            for i in range(20):
+                pulled.append(i)
+                yield i
+
+        results = run_concurrently(lambda i: i * 2, _items(), max_parallel=2)
+        self.assertEqual(next(results), 0)
+        # only a bounded number of items are pulled from the listing ahead of the consumer
+        self.assertLessEqual(len(pulled), 5)
+        self.assertEqual(list(results), [i * 2 for i in range(1, 20)])
+
+    def test_retry_transient_errors(self):
+        calls = []
+
+        def _flaky(status_code):
+            calls.append(status_code)
+            if len(calls) < 3:
+                raise AzureHttpError('server busy', status_code)
+            return 'done'
+
+        self.assertEqual(retry_transient_errors(_flaky, backoff=0)(503), 'done')
+        self.assertEqual(len(calls), 3)
+
+        del calls[:]
+        with self.assertRaises(AzureHttpError):
+            retry_transient_errors(_flaky, backoff=0)(404)
+        self.assertEqual(len(calls), 1)
+
+    def test_retry_connection_errors(self):
+        calls = []
+
+        def _disconnected():
+            calls.append(1)
+            if len(calls) < 2:
+                try:
+                    raise RequestsConnectionError('connection reset')
+                except RequestsConnectionError as ex:
+                    raise AzureException(ex.args[0])
+            return 'done'
+
+        self.assertEqual(retry_transient_errors(_disconnected, backoff=0)(), 'done')
+        self.assertEqual(len(calls), 2)
+
+    def test_non_transient_errors_are_not_retried(self):
+        calls = []
+
+        def _invalid():
+            calls.append(1)
+            raise AzureException('no credentials provided')
+
+        with self.assertRaises(AzureException):
+            retry_transient_errors(_invalid, backoff=0)()
+        self.assertEqual(len(calls), 1)
+
+        del calls[:]
+
+        def _bad_argument():
+            calls.append(1)
+            raise ValueError('invalid blob name')
+
+        with self.assertRaises(ValueError):
+            retry_transient_errors(_bad_argument, backoff=0)()
+        self.assertEqual(len(calls), 1)
+
+    def test_delete_batch_throughput(self):
+        blob_count = 400
+        throughput = {}
+        for max_parallel in [1, 16]:
+            service = FakeBlobService(blob_count)
+            start = time.time()
+            storage_blob_delete_batch(service, 'container', 'container', pattern='logs/*', max_parallel=max_parallel)
+            throughput[max_parallel] = blob_count / (time.time() - start)
+
+            self.assertEqual(sorted(service.deleted), service.blobs)
+            self.assertLessEqual(service.max_in_flight, max_parallel)
+            print('delete-batch max_parallel={}: {:.0f} blobs/sec'.format(max_parallel, throughput[max_parallel]))
+
+        self.assertGreater(throughput[16], throughput[1] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -232,3 +232,65 @@ def check_precondition_success(func):
                 raise
             return False, None
     return wrapper
+
+
+def retry_transient_errors(func, max_retries=3, backoff=0.5):
+    """
+    Wrap a single-blob request so that throttling, server and connection errors are retried with an
+    exponential backoff before being surfaced. Other errors are raised immediately.
+    """
+    def wrapper(*args, **kwargs):
+        import time
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as ex:  # pylint: disable=broad-except
+                if attempt >= max_retries or not _is_transient_error(ex):
+                    raise
+            time.sleep(backoff * (2 ** attempt))
+            attempt += 1
+    return wrapper
+
+
+def _is_transient_error(ex):
+    from azure.common import AzureHttpError
+    from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+    if isinstance(ex, AzureHttpError):
+        return ex.status_code in [408, 429, 500, 502, 503, 504]
+    # the storage client raises connection failures as an AzureException chained to the requests error
+    while ex is not None:
+        if isinstance(ex, (RequestsConnectionError, Timeout)):
+            return True
+        ex = ex.__cause__ or ex.__context__
+    return False
+
+
+def run_concurrently(action, items, max_parallel=1):
+    """
+    Apply action to every item of the given iterable and yield the results in the order of the items.
+    Up to max_parallel actions run at the same time. Items are pulled from the iterable only as worker
+    slots free up, so a lazy listing overlaps with the work on the blobs already listed and the number
+    of in-flight requests stays bounded.
+    """
+    if max_parallel <= 1:
+        for item in items:
+            yield action(item)
+        return
+
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        try:
+            for item in items:
+                pending.append(executor.submit(action, item))
+                if len(pending) >= max_parallel * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
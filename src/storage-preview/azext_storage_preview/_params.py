@@ -355,6 +355,9 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('source', options_list=('--source', '-s'), validator=process_file_upload_batch_parameters)
         c.argument('destination', options_list=('--destination', '-d'))
         c.argument('max_connections', arg_group='Upload Control', type=int)
+        c.argument('max_parallel', arg_group='Upload Control', type=int,
+                   help='Maximum number of files to upload concurrently. Each file still uses up to '
+                        '--max-connections connections.')
         c.argument('validate_content', action='store_true', min_api='2016-05-31')
         c.register_content_settings_argument(t_file_content_settings, update=False, arg_group='Content Settings',
                                              process_md5=True)
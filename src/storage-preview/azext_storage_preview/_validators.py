@@ -597,6 +597,9 @@ def process_file_upload_batch_parameters(cmd, namespace):
     if not os.path.isdir(namespace.source):
         raise ValueError('incorrect usage: source must be a directory')
 
+    if getattr(namespace, 'max_parallel', None) is not None and namespace.max_parallel < 1:
+        raise ValueError('incorrect usage: --max-parallel must be a positive integer')
+
     # 2. try to extract account name and container name from destination string
     from .storage_url_helpers import StorageResourceIdentifier
     identifier = StorageResourceIdentifier(cmd.cli_ctx.cloud, namespace.destination)
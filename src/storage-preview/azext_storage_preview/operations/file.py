@@ -31,7 +31,7 @@ def storage_file_upload(client, local_file_path, content_settings=None,
 
 def storage_file_upload_batch(cmd, client, destination, source, destination_path=None, pattern=None, dryrun=False,
                               validate_content=False, content_settings=None, max_connections=1, metadata=None,
-                              progress_callback=None):
+                              progress_callback=None, max_parallel=1):
     """ Upload local files to Azure Storage File Share in batch """
 
     from ..util import glob_files_locally, normalize_blob_file_path, guess_content_type
@@ -50,23 +50,28 @@ def storage_file_upload_batch(cmd, client, destination, source, destination_path
                  'Type': guess_content_type(src, content_settings, settings_class).content_type} for src, dst in
                 source_files]
 
-    # TODO: Performance improvement
-    # 1. Upload files in parallel
-    def _upload_action(src, dst):
-        dst = normalize_blob_file_path(destination_path, dst)
-        dir_name = os.path.dirname(dst)
-        file_name = os.path.basename(dst)
+    upload_files = [(src, normalize_blob_file_path(destination_path, dst)) for src, dst in source_files]
 
-        _make_directory_in_files_share(client, dir_name)
+    # Create every destination directory exactly once, before any file is uploaded, so the uploads
+    # below never have to touch the directory tree again.
+    existing_dirs = set()
+    for dir_name in sorted(set(os.path.dirname(dst) for _, dst in upload_files)):
+        _make_directory_in_files_share(client, dir_name, existing_dirs)
 
+    def _upload_action(src, dst):
         logger.warning('uploading %s', src)
 
         storage_file_upload(client.get_file_client(dst), src, content_settings, metadata, validate_content,
                             progress_callback, max_connections)
 
-        return make_file_url(client, dir_name, file_name)
+        return make_file_url(client, os.path.dirname(dst), os.path.basename(dst))
+
+    if max_parallel > 1 and len(upload_files) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            return list(executor.map(lambda args: _upload_action(*args), upload_files))
 
-    return list(_upload_action(src, dst) for src, dst in source_files)
+    return list(_upload_action(src, dst) for src, dst in upload_files)
 
 
 def _make_directory_in_files_share(share_client, directory_path, existing_dirs=None):
@@ -89,7 +94,7 @@ def _make_directory_in_files_share(share_client, directory_path, existing_dirs=N
         p = os.path.dirname(p)
 
     for dir_name in reversed(parents):
-        if existing_dirs and (dir_name in existing_dirs):
+        if existing_dirs is not None and dir_name in existing_dirs:
             continue
 
         try:
@@ -100,5 +105,5 @@ def _make_directory_in_files_share(share_client, directory_path, existing_dirs=N
             from knack.util import CLIError
             raise CLIError('Failed to create directory {}'.format(dir_name))
 
-        if existing_dirs:
-            existing_dirs.add(directory_path)
+        if existing_dirs is not None:
+            existing_dirs.add(dir_name)
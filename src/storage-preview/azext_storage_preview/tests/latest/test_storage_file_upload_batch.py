@@ -0,0 +1,60 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from ...operations.file import storage_file_upload_batch
+
+
+class StorageFileUploadBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        for path in ['a/b/file_0', 'a/b/file_1', 'a/c/file_2', 'file_3']:
+            full_path = os.path.join(self.source, *path.split('/'))
+            if not os.path.isdir(os.path.dirname(full_path)):
+                os.makedirs(os.path.dirname(full_path))
+            with open(full_path, 'w') as f:
+                f.write(path)
+
+        self.client = mock.MagicMock()
+        self.client.primary_endpoint = 'https://account.file.core.windows.net/share'
+
+    def tearDown(self):
+        shutil.rmtree(self.source)
+
+    def _created_directories(self):
+        return [c[1]['directory_path'] for c in self.client.get_directory_client.call_args_list]
+
+    def _uploaded_files(self):
+        return sorted(c[0][0] for c in self.client.get_file_client.call_args_list)
+
+    def test_upload_batch_creates_each_directory_once(self):
+        urls = storage_file_upload_batch(mock.MagicMock(), self.client, 'share', self.source)
+
+        self.assertEqual(sorted(self._created_directories()), ['a', 'a/b', 'a/c'])
+        self.assertEqual(self._uploaded_files(), ['a/b/file_0', 'a/b/file_1', 'a/c/file_2', 'file_3'])
+        self.assertEqual(len(urls), 4)
+
+    def test_upload_batch_in_parallel(self):
+        urls = storage_file_upload_batch(mock.MagicMock(), self.client, 'share', self.source,
+                                         destination_path='dest', max_parallel=4)
+
+        self.assertEqual(sorted(self._created_directories()), ['dest', 'dest/a', 'dest/a/b', 'dest/a/c'])
+        self.assertEqual(self._uploaded_files(),
+                         ['dest/a/b/file_0', 'dest/a/b/file_1', 'dest/a/c/file_2', 'dest/file_3'])
+        self.assertEqual(sorted(urls), sorted('https://account.file.core.windows.net/share/' + f
+                                              for f in self._uploaded_files()))
+
+
+if __name__ == '__main__':
+    unittest.main()
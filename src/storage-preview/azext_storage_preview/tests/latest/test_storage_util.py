@@ -0,0 +1,76 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import types
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from ...util import collect_blobs, glob_files_remotely, _get_pattern_literal_prefix
+
+
+class _Directory(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class _File(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeFileService(object):
+    def __init__(self, paths):
+        self.paths = paths
+        self.listed = []
+
+    def list_directories_and_files(self, share_name, directory_name, prefix=None):
+        self.listed.append((directory_name, prefix))
+        entries = {}
+        base = directory_name + '/' if directory_name else ''
+        for path in self.paths:
+            if path.startswith(base):
+                name, _, rest = path[len(base):].partition('/')
+                if not prefix or name.startswith(prefix):
+                    entries[name] = _Directory(name) if rest else _File(name)
+        return iter(entries.values())
+
+
+class StorageUtilTest(unittest.TestCase):
+    def test_pattern_literal_prefix(self):
+        self.assertEqual(_get_pattern_literal_prefix(None), '')
+        self.assertEqual(_get_pattern_literal_prefix('*'), '')
+        self.assertEqual(_get_pattern_literal_prefix('logs/2020-*.log'), 'logs/2020-')
+        self.assertEqual(_get_pattern_literal_prefix('logs/file_?'), 'logs/file_')
+        self.assertEqual(_get_pattern_literal_prefix('logs/[ab]/*'), 'logs/')
+
+    def test_collect_blobs_is_lazy_and_uses_prefix(self):
+        blob_service = mock.MagicMock()
+        blob_service.list_blobs.return_value = iter(
+            [types.SimpleNamespace(name=n) for n in ['logs/a.log', 'logs/b.txt', 'logs/sub/c.log']])
+
+        blobs = collect_blobs(blob_service, 'container', 'logs/*.log')
+        blob_service.list_blobs.assert_not_called()
+
+        self.assertEqual(list(blobs), ['logs/a.log', 'logs/sub/c.log'])
+        blob_service.list_blobs.assert_called_once_with('container', prefix='logs/')
+
+    def test_glob_files_remotely_prunes_directories(self):
+        cmd = mock.MagicMock()
+        cmd.get_models.return_value = (_Directory, _File)
+        client = FakeFileService(['apple/file_0', 'apple/sub/file_1', 'butter/file_0', 'apple2/file_0', 'file_0'])
+
+        files = list(glob_files_remotely(cmd, client, 'share', 'apple/*'))
+
+        self.assertEqual(sorted(files), [('apple', 'file_0'), (os.path.join('apple', 'sub'), 'file_1')])
+        self.assertEqual(client.listed, [('', 'apple'), ('apple', None), (os.path.join('apple', 'sub'), None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
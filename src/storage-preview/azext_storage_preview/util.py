@@ -10,6 +10,8 @@ import os
 def collect_blobs(blob_service, container, pattern=None):
     """
     List the blobs in the given blob container, filter the blob by comparing their path to the given pattern.
+    Returns a generator which lists the container lazily, page by page, and asks the service only for the blobs
+    sharing the literal prefix of the pattern.
     """
     if not blob_service:
         raise ValueError('missing parameter blob_service')
@@ -18,10 +20,15 @@ def collect_blobs(blob_service, container, pattern=None):
         raise ValueError('missing parameter container')
 
     if not _pattern_has_wildcards(pattern):
-        return [pattern] if blob_service.exists(container, pattern) else []
+        return iter([pattern] if blob_service.exists(container, pattern) else [])
 
-    results = []
-    for blob in blob_service.list_blobs(container):
+    return _iter_blobs(blob_service, container, pattern)
+
+
+def _iter_blobs(blob_service, container, pattern):
+    prefix = _get_pattern_literal_prefix(pattern)
+    list_args = {'prefix': prefix} if prefix else {}
+    for blob in blob_service.list_blobs(container, **list_args):
         try:
             blob_name = blob.name.encode(
                 'utf-8') if isinstance(blob.name, unicode) else blob.name
@@ -29,9 +36,7 @@ def collect_blobs(blob_service, container, pattern=None):
             blob_name = blob.name
 
         if not pattern or _match_path(blob_name, pattern):
-            results.append(blob_name)
-
-    return results
+            yield blob_name
 
 
 def collect_files(cmd, file_service, share, pattern=None):
@@ -84,19 +89,27 @@ def glob_files_locally(folder_path, pattern):
 
 
 def glob_files_remotely(cmd, client, share_name, pattern):
-    """glob the files in remote file share based on the given pattern"""
+    """
+    glob the files in remote file share based on the given pattern. Directories which cannot contain a match
+    of the pattern's literal prefix are not listed.
+    """
     from collections import deque
     t_dir, t_file = cmd.get_models('file.models#Directory', 'file.models#File')
 
+    prefix = _get_pattern_literal_prefix(pattern)
     queue = deque([""])
     while queue:
         current_dir = queue.pop()
-        for f in client.list_directories_and_files(share_name, current_dir):
+        name_prefix = _get_directory_listing_prefix(current_dir, prefix)
+        list_args = {'prefix': name_prefix} if name_prefix else {}
+        for f in client.list_directories_and_files(share_name, current_dir, **list_args):
             if isinstance(f, t_file):
                 if not pattern or _match_path(os.path.join(current_dir, f.name), pattern):
                     yield current_dir, f.name
             elif isinstance(f, t_dir):
-                queue.appendleft(os.path.join(current_dir, f.name))
+                dir_path = os.path.join(current_dir, f.name)
+                if _directory_may_match_prefix(dir_path, prefix):
+                    queue.appendleft(dir_path)
 
 
 def create_short_lived_blob_sas(cmd, account_name, account_key, container, blob):
@@ -173,6 +186,31 @@ def _pattern_has_wildcards(p):
     return not p or p.find('*') != -1 or p.find('?') != -1 or p.find('[') != -1
 
 
+def _get_pattern_literal_prefix(pattern):
+    """Return the part of the pattern before its first wildcard, e.g. 'logs/2020-' for 'logs/2020-*.log'."""
+    if not pattern:
+        return ''
+    for i, c in enumerate(pattern):
+        if c in '*?[':
+            return pattern[:i]
+    return pattern
+
+
+def _get_directory_listing_prefix(directory, prefix):
+    """Return the name prefix the entries listed under the directory must start with to match the prefix."""
+    directory = directory.replace(os.path.sep, '/') + '/' if directory else ''
+    if not prefix.startswith(directory):
+        return ''
+    return prefix[len(directory):].split('/', 1)[0]
+
+
+def _directory_may_match_prefix(directory, prefix):
+    """Wildcards can match '/', so only the literal prefix can rule a directory out."""
+    directory = os.path.normcase(directory + '/')
+    prefix = os.path.normcase(prefix)
+    return directory.startswith(prefix) or prefix.startswith(directory)
+
+
 def _match_path(path, pattern):
     from fnmatch import fnmatch
     return fnmatch(path, pattern)